@@ -1,10 +1,18 @@
+import os
+import sys
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import time
 import uuid
 import holidays
 
+# Wspólny silnik analityczny z aplikacją Dash (new/engine)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "new"))
+
+from engine import loader
+from engine.queries import filter_sales, summary_metrics, period_series, heatmap_grid, HOURS
+
 st.set_page_config(layout="wide")
 
 
@@ -36,68 +44,27 @@ def style_plotly(fig, hovertemplate=None):
 
 @st.cache_data(ttl=3600, show_spinner="Ładowanie mapy HOIS...")
 def load_hois_map():
-    file_path = "hois_map.csv"
-    hois_df = pd.read_csv(file_path, encoding="utf-8", sep=";")
-    hois_df.columns = [col.strip() for col in hois_df.columns]
-
-    expected_columns = ["HOIS", "Grupa towarowa", "Grupa sklepowa"]
-    actual_columns = hois_df.columns.tolist()
-
-    if len(actual_columns) != len(expected_columns):
-        st.error(f"Plik CSV powinien mieć kolumny: {expected_columns}, ale znaleziono: {actual_columns}")
+    try:
+        return loader.load_hois_map()
+    except Exception as e:
+        st.error(str(e))
         return {}
 
-    return {row["HOIS"]: (row["Grupa towarowa"], row["Grupa sklepowa"]) for _, row in hois_df.iterrows()}
-
 
 hois_map = load_hois_map()
 
 
 @st.cache_data(ttl=3600, show_spinner="Ładowanie danych sprzedażowych...")
 def load_data():
-    files = ["data01.xlsx", "data02.xlsx", "data03.xlsx"]
-    dfs = []
-
-    for file in files:
-        try:
-            df_month = pd.read_excel(file)
-
-            if "Data" not in df_month.columns:
-                st.error(f"W pliku {file} brak kolumny 'Data'")
-                continue
-
-            # Zamiana na datetime z godziną
-            df_month["Data_full"] = pd.to_datetime(df_month["Data"], errors="coerce", format=None)
-
-            null_dates = df_month["Data_full"].isnull().sum()
-            if null_dates > 0:
-                st.warning(f"W pliku {file} znaleziono {null_dates} pustych lub błędnych dat.")
-
-            # Dodatkowa kolumna tylko z datą (bez godziny) – do filtrowania
-            df_month["Data"] = df_month["Data_full"].dt.date
-
-            dfs.append(df_month)
-
-            with st.container():
-                placeholder = st.empty()
-                placeholder.markdown(f"""
-                    <div style='margin-top: 30px;'>
-                        <p style='color: green; font-weight: bold;'>Wczytano poprawnie {file}, {len(df_month)} wierszy.</p>
-                    </div>
-                """, unsafe_allow_html=True)
-                time.sleep(3)
-                placeholder.empty()
-
-        except Exception as e:
-            st.error(f"Błąd przy wczytywaniu {file}: {e}")
-
-    if len(dfs) == 0:
-        st.error("Brak poprawnych danych do połączenia!")
+    loaded = []
+    try:
+        df = loader.load_data(on_loaded=lambda file, rows: loaded.append(f"{file}: {rows} wierszy"),
+                              on_error=st.error)
+    except Exception as e:
+        st.error(str(e))
         return pd.DataFrame()
-
-    df = pd.concat(dfs, ignore_index=True)
-    df = df.dropna(subset=["Data_full"])
-
+    if loaded:
+        st.toast("Wczytano poprawnie " + ", ".join(loaded))
     return df
 
 
@@ -107,8 +74,7 @@ if df.empty or df["Data"].isnull().all():
     st.error("Dane są puste lub wszystkie daty są niepoprawne!")
     st.stop()
 
-df["Grupa towarowa"] = df["HOIS"].map(lambda x: hois_map.get(x, ("Nieznana", "Nieznana"))[0])
-df["Grupa sklepowa"] = df["HOIS"].map(lambda x: hois_map.get(x, ("Nieznana", "Nieznana"))[1])
+df = loader.map_hois_groups(df, hois_map)
 
 st.sidebar.header("Filtry")
 start_date = st.sidebar.date_input("Od", df["Data"].min())
@@ -126,9 +92,7 @@ selected_groups = group_options.tolist() if select_all_groups else st.sidebar.mu
                                                                                           group_options,
                                                                                           default=group_options)
 
-df_filtered = df[(df["Data"] >= start_date) & (df["Data"] <= end_date) & (df["Stacja"].isin(selected_stations)) & (
-    df["Grupa towarowa"].isin(selected_groups))].copy()
-df_filtered = df_filtered[df_filtered["Login POS"] != 99999].copy()
+df_filtered = filter_sales(df, start_date, end_date, selected_stations, selected_groups)
 
 if df_filtered.empty:
     st.warning("Brak danych po zastosowaniu wybranych filtrów!")
@@ -212,15 +176,9 @@ def plot_line_chart(df, x, y, color, title, key_suffix="", fill_area=False):
 
 with tab1:
     st.header("Ogólny")
-    total_netto = df_filtered["Netto"].sum()
-    total_transactions = df_filtered["#"].nunique()
-
-    # Nowe metryki
-    kawa_netto = df_filtered[df_filtered["Grupa sklepowa"] == "NAPOJE GORĄCE"]["Netto"].sum()
-    food_netto = \
-        df_filtered[df_filtered["Grupa towarowa"].str.strip().str.upper().isin(["FOOD SERVICE", "USLUGI DODATKOWE"])][
-            "Netto"].sum()
-    myjnia_netto = df_filtered[df_filtered["Grupa sklepowa"] == "MYJNIA INNE"]["Netto"].sum()
+    summary = summary_metrics(df_filtered)
+    total_netto, total_transactions = summary["total_netto"], summary["total_transactions"]
+    kawa_netto, food_netto, myjnia_netto = summary["kawa_netto"], summary["food_netto"], summary["myjnia_netto"]
 
     col1, col2, col3, col4, col5 = st.columns(5)
     col1.metric("Obrót netto(NFR+Fuel)", f"{total_netto / 1_000_000:.1f} mln zł")
@@ -229,12 +187,10 @@ with tab1:
     col4.metric("Sprzedaż food", f"{round(food_netto / 1000):,} tys. zł")
     col5.metric("Sprzedaż myjni", f"{round(myjnia_netto / 1000):,} tys. zł")
 
-    plot_line_chart(
-        df_filtered.groupby(["Okres"] + ([category_col] if category_col else []))["Netto"].sum().reset_index(),
-        "Okres", "Netto", category_col, "Obrót netto (NFR+Fuel)")
-    plot_line_chart(
-        df_filtered.groupby(["Okres"] + ([category_col] if category_col else []))["#"].nunique().reset_index(),
-        "Okres", "#", category_col, "Liczba transakcji")
+    plot_line_chart(period_series(df_filtered, "Netto", category_col),
+                    "Okres", "Netto", category_col, "Obrót netto (NFR+Fuel)")
+    plot_line_chart(period_series(df_filtered, "#", category_col, how="nunique"),
+                    "Okres", "#", category_col, "Liczba transakcji")
 
     # HEAT MAPA
 
@@ -253,53 +209,21 @@ with tab1:
         horizontal=True
     )
 
-    # Przygotowanie danych czasowych
-    df_filtered["Godzina"] = pd.to_datetime(df_filtered["Data_full"], errors="coerce").dt.hour
-    df_filtered["Dzień tygodnia"] = pd.to_datetime(df_filtered["Data_full"], errors="coerce").dt.dayofweek
-
-    dni = ["Pon", "Wt", "Śr", "Czw", "Pt", "Sob", "Nd"]
-    godziny = list(range(24))
-    full_index = pd.MultiIndex.from_product([range(7), godziny], names=["Dzień tygodnia", "Godzina"])
-
-    # 📊 Wyliczanie metryki
-    if selected_metric == "Liczba transakcji":
-        df_grouped = df_filtered.groupby(["Dzień tygodnia", "Godzina"])["#"].nunique()
-        df_grouped = df_grouped.reindex(full_index, fill_value=0).reset_index(name="Wartość")
-
-    elif selected_metric == "Obrót netto":
-        df_grouped = df_filtered.groupby(["Dzień tygodnia", "Godzina"])["Netto"].sum()
-        df_grouped = df_grouped.reindex(full_index, fill_value=0).reset_index(name="Wartość")
-
-    elif selected_metric == "Liczba sztuk":
-        df_grouped = df_filtered.groupby(["Dzień tygodnia", "Godzina"])["Ilość"].sum()
-        df_grouped = df_grouped.reindex(full_index, fill_value=0).reset_index(name="Wartość")
-
-    elif selected_metric == "Transakcje paliwowe":
-        paliwo_df = df_filtered[df_filtered["HOIS"] == 0]
-        df_grouped = paliwo_df.groupby(["Dzień tygodnia", "Godzina"])["#"].nunique()
-        df_grouped = df_grouped.reindex(full_index, fill_value=0).reset_index(name="Wartość")
-
-    elif selected_metric == "Penetracja lojalnościowa":
-        # Wszystkie transakcje
-        all_tx = df_filtered.groupby(["Dzień tygodnia", "Godzina"])["#"].nunique().rename("Wszystkie")
-        # Z kartą
-        loyal_tx = \
-        df_filtered[df_filtered["Karta lojalnościowa"].str.upper() == "TAK"].groupby(["Dzień tygodnia", "Godzina"])[
-            "#"].nunique().rename("Lojalnościowe")
-
-        merged = pd.merge(all_tx, loyal_tx, left_index=True, right_index=True, how="left").fillna(0)
-        merged["Penetracja"] = (merged["Lojalnościowe"] / merged["Wszystkie"]) * 100
-        df_grouped = merged["Penetracja"].reindex(full_index, fill_value=0).reset_index(name="Wartość")
-
-    # 🔁 Pivot + konwersja osi
-    heat_pivot = df_grouped.pivot(index="Dzień tygodnia", columns="Godzina", values="Wartość")
-    heat_pivot.index = [dni[i] for i in heat_pivot.index]
+    # 📊 Wyliczanie metryki (wspólne z heatmapą w Dash)
+    heatmap_metrics = {
+        "Liczba transakcji": "tx",
+        "Obrót netto": "netto",
+        "Liczba sztuk": "ilosc",
+        "Transakcje paliwowe": "paliwo",
+        "Penetracja lojalnościowa": "lojalnosc",
+    }
+    heat_pivot = heatmap_grid(df_filtered, heatmap_metrics[selected_metric])
 
     # 🎨 Heatmapa
     fig_heatmap = px.imshow(
         heat_pivot,
         labels=dict(x="Godzina", y="Dzień tygodnia", color=selected_metric),
-        x=[str(g) for g in godziny],
+        x=[str(g) for g in HOURS],
         aspect="auto",
         color_continuous_scale="Blues",
         title=f"📊 Heatmapa – {selected_metric}"
@@ -0,0 +1,92 @@
+from collections import namedtuple
+
+from flask import request, redirect, url_for
+from flask_login import LoginManager, current_user
+
+from enums.user_role import UserRole
+from services.users_service import UsersService
+
+PUBLIC = "public"
+AUTHENTICATED = "authenticated"
+ANONYMOUS = "anonymous"
+
+AccessRule = namedtuple("AccessRule", ["access", "roles", "redirect_to"])
+
+ADMIN_ROLES = [UserRole.SUPER_ADMIN, UserRole.COORDINATOR, UserRole.ADMIN]
+USERS_ADMIN_ROLES = [UserRole.SUPER_ADMIN, UserRole.COORDINATOR]
+
+# Najdłuższy pasujący prefiks wygrywa; redirect_to to nazwa endpointu albo ścieżka
+ROUTES = {
+    '/static': AccessRule(PUBLIC, None, None),
+    '/health': AccessRule(PUBLIC, None, None),
+    '/dashboard/_dash-component-suites': AccessRule(PUBLIC, None, None),
+    '/dashboard/assets': AccessRule(PUBLIC, None, None),
+    '/dashboard/_favicon.ico': AccessRule(PUBLIC, None, None),
+    '/dashboard': AccessRule(AUTHENTICATED, None, 'auth_form.login_form'),
+    '/admin': AccessRule(AUTHENTICATED, ADMIN_ROLES, '/dashboard'),
+    '/admin/users': AccessRule(AUTHENTICATED, USERS_ADMIN_ROLES, '/dashboard'),
+    '/auth/login': AccessRule(ANONYMOUS, None, '/dashboard'),
+}
+
+
+class RouteTrie:
+
+    def __init__(self, routes):
+        self.root = {}
+        for prefix, rule in routes.items():
+            self.insert(prefix, rule)
+
+    def insert(self, prefix, rule):
+        node = self.root
+        for segment in prefix.strip('/').split('/'):
+            node = node.setdefault(segment, {})
+        node[None] = rule
+
+    def match(self, path):
+        node = self.root
+        matched = node.get(None)
+        for segment in path.strip('/').split('/'):
+            node = node.get(segment)
+            if node is None:
+                break
+            matched = node.get(None, matched)
+        return matched
+
+
+def _redirect(target):
+    return redirect(target if target.startswith('/') else url_for(target))
+
+
+def check_access(rule):
+    if rule is None or rule.access == PUBLIC:
+        return None
+    if rule.access == ANONYMOUS:
+        if current_user.is_authenticated:
+            return _redirect(rule.redirect_to)
+        return None
+    if not current_user.is_authenticated:
+        return _redirect(rule.redirect_to)
+    if rule.roles is not None and current_user.role not in rule.roles:
+        return _redirect(rule.redirect_to)
+    return None
+
+
+def create_auth_middleware(app, routes=None):
+    # Jeden LoginManager i jeden before_request zamiast osobnych guardów
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    trie = RouteTrie(ROUTES if routes is None else routes)
+
+    @login_manager.user_loader
+    def load_user(id):
+        user = UsersService.get_user(id)
+        if user is None or user is False or not user.is_authenticated or not user.is_active:
+            return None
+        return user
+
+    @app.before_request
+    def auth():
+        return check_access(trie.match(request.path))
+
+    app.extensions['auth_routes'] = trie
+    return login_manager
@@ -0,0 +1,85 @@
+import argparse
+import time
+
+from flask import Flask
+from flask_login import login_user
+
+from auth_guard.middleware import create_auth_middleware
+from benchmarks.dash_requests import percentile
+from entities.user import User
+from enums.user_role import UserRole
+
+PATHS = [
+    '/dashboard/_dash-update-component',
+    '/dashboard/_dash-component-suites/dash/dcc/dash_core_components.js',
+    '/dashboard/',
+    '/admin/users/1',
+    '/auth/login',
+    '/static/style.css',
+    '/',
+]
+
+
+def create_bench_app(with_auth):
+    # Zalogowany użytkownik trzymany w pamięci – mierzymy sam narzut middleware, bez Redisa
+    app = Flask(__name__)
+    app.secret_key = 'bench'
+    user = User(id=1, name='bench', email='bench@example.com', role=UserRole.ADMIN, is_active=True,
+                is_signed=True)
+    if with_auth:
+        login_manager = create_auth_middleware(app)
+        login_manager.user_loader(lambda id: user if id == '1' else None)
+
+    @app.route('/bench-login')
+    def bench_login():
+        if with_auth:
+            login_user(user)
+        return 'ok'
+
+    @app.route('/dashboard/_dash-update-component', methods=['POST'])
+    def update_component():
+        return '{}'
+
+    return app
+
+
+def time_requests(app, repeat):
+    client = app.test_client()
+    client.get('/bench-login')
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        client.post('/dashboard/_dash-update-component', json={})
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Narzut middleware autoryzacji na żądanie callbacku Dash")
+    parser.add_argument('--repeat', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_bench_app(with_auth=True)
+    trie = app.extensions['auth_routes']
+    print(f"{'ścieżka':<70} {'reguła':<14} {'µs/dopasowanie':>15}")
+    for path in PATHS:
+        rule = trie.match(path)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            trie.match(path)
+        elapsed = (time.perf_counter() - started) / args.repeat * 1e6
+        print(f"{path:<70} {rule.access if rule else '-':<14} {elapsed:>15.2f}")
+
+    print()
+    results = {}
+    for label, with_auth in (('bez autoryzacji', False), ('middleware', True)):
+        timings = time_requests(create_bench_app(with_auth), args.repeat)
+        results[label] = timings
+        print(f"{label:<16} p50 {percentile(timings, 50) * 1e6:8.1f} µs   "
+              f"p95 {percentile(timings, 95) * 1e6:8.1f} µs")
+    overhead = percentile(results['middleware'], 50) - percentile(results['bez autoryzacji'], 50)
+    print(f"narzut p50: {overhead * 1e6:.1f} µs / żądanie")
+
+
+if __name__ == '__main__':
+    main()
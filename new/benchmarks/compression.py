@@ -0,0 +1,55 @@
+import argparse
+import statistics
+
+from compression.compression import ResponseCompressor, DEFAULT_MIMETYPES, brotli
+from benchmarks.dash_requests import TABS, create_bench_app, default_filters, tab_request, post_timed
+
+
+def run(args):
+    server, app = create_bench_app()
+    compressor = ResponseCompressor(algorithms=args.algorithms.split(','), level=args.level,
+                                    min_size=args.min_size, mimetypes=DEFAULT_MIMETYPES.split(','))
+    server.after_request(compressor.after_request)
+    client = server.test_client()
+    filters = default_filters(app)
+    if args.start:
+        filters['start_date'] = args.start
+    if args.end:
+        filters['end_date'] = args.end
+    if args.monthly:
+        filters['monthly'] = ['monthly']
+
+    bytes_per_second = args.mbps * 1_000_000 / 8
+    print(f"Algorytmy: {compressor.algorithms} (brotli {'dostępne' if brotli else 'niedostępne'}), "
+          f"poziom {args.level}, próg {args.min_size} B, łącze {args.mbps} Mbit/s")
+    print(f"{'Zakładka':<8} {'Bajty przed':>12} {'Bajty po':>10} {'Ratio':>6} "
+          f"{'Serwer przed':>13} {'Serwer po':>10} {'Razem przed':>12} {'Razem po':>9}")
+    for tab in TABS:
+        body = tab_request(tab, filters)
+        results = {}
+        for label, headers in (('plain', {'Accept-Encoding': 'identity'}),
+                               ('compressed', {'Accept-Encoding': 'br, gzip'})):
+            timings, size = [], 0
+            for _ in range(args.repeat):
+                response, elapsed = post_timed(client, body, headers)
+                timings.append(elapsed)
+                size = len(response.data)
+            server_time = statistics.median(timings)
+            results[label] = (size, server_time, server_time + size / bytes_per_second)
+        plain, compressed = results['plain'], results['compressed']
+        print(f"{tab:<8} {plain[0]:>12,} {compressed[0]:>10,} {plain[0] / max(compressed[0], 1):>6.1f} "
+              f"{plain[1] * 1000:>11.1f}ms {compressed[1] * 1000:>8.1f}ms "
+              f"{plain[2] * 1000:>10.1f}ms {compressed[2] * 1000:>7.1f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rozmiar i czas odpowiedzi zakładek z kompresją i bez')
+    parser.add_argument('--algorithms', default='br,gzip')
+    parser.add_argument('--level', type=int, default=6)
+    parser.add_argument('--min-size', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--mbps', type=float, default=10.0, help='Przepustowość łącza stacji do estymacji transferu')
+    parser.add_argument('--start', help='Data początkowa (domyślnie jak w dashboardzie)')
+    parser.add_argument('--end', help='Data końcowa (domyślnie jak w dashboardzie)')
+    parser.add_argument('--monthly', action='store_true')
+    run(parser.parse_args())
@@ -0,0 +1,111 @@
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from benchmarks.dash_requests import UPDATE_URL, create_bench_app, default_filters, tab_request, percentile
+
+HEAVY_TABS = ['tab1', 'tab2', 'tab3', 'tab5']
+
+
+def theme_request():
+    # Lekki callback – przełączenie motywu
+    return {
+        'output': 'theme-store.data',
+        'outputs': {'id': 'theme-store', 'property': 'data'},
+        'inputs': [
+            {'id': 'theme-toggle-button', 'property': 'n_clicks', 'value': 1},
+            {'id': 'theme-store', 'property': 'data', 'value': {'theme': 'light'}},
+        ],
+        'changedPropIds': ['theme-toggle-button.n_clicks'],
+        'state': [],
+    }
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def measure_cheap(url, count, pause):
+    timings = []
+    for _ in range(count):
+        timings.append(post(url, theme_request()))
+        time.sleep(pause)
+    return timings
+
+
+def heavy_loop(url, filters, stop, timings):
+    i = 0
+    while not stop.is_set():
+        timings.append(post(url, tab_request(HEAVY_TABS[i % len(HEAVY_TABS)], filters)))
+        i += 1
+
+
+def run(args):
+    server, app = create_bench_app()
+    filters = default_filters(app)
+    if args.start:
+        filters['start_date'] = args.start
+    if args.end:
+        filters['end_date'] = args.end
+    filters['monthly'] = ['monthly'] if args.monthly else []
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # Serwer wielowątkowy w jednym procesie – odpowiednik workera gthread
+    http_server = make_server('127.0.0.1', 0, server, threaded=args.threaded)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{http_server.server_port}{UPDATE_URL}'
+
+    idle = measure_cheap(url, args.cheap, args.pause)
+
+    stop = threading.Event()
+    heavy_timings = []
+    heavy_threads = [threading.Thread(target=heavy_loop, args=(url, filters, stop, heavy_timings), daemon=True)
+                     for _ in range(args.heavy)]
+    for thread in heavy_threads:
+        thread.start()
+    time.sleep(args.warmup)
+    loaded = measure_cheap(url, args.cheap, args.pause)
+    stop.set()
+    for thread in heavy_threads:
+        thread.join()
+    http_server.shutdown()
+
+    print(f"Serwer {'wielowątkowy' if args.threaded else 'jednowątkowy'}, {args.heavy} równoległych renderów zakładek")
+    print(f"{'':<28} {'p50':>9} {'p95':>9} {'max':>9}")
+    for label, timings in (('lekki callback (bez obc.)', idle), ('lekki callback (obciąż.)', loaded),
+                           ('render zakładki', heavy_timings)):
+        print(f"{label:<28} {percentile(timings, 50) * 1000:>7.1f}ms {percentile(timings, 95) * 1000:>7.1f}ms "
+              f"{max(timings, default=0) * 1000:>7.1f}ms")
+
+    cheap_p95 = percentile(loaded, 95) * 1000
+    if cheap_p95 > args.max_cheap_ms:
+        print(f"NIE OK: p95 lekkiego callbacku {cheap_p95:.1f} ms > {args.max_cheap_ms} ms")
+        return 1
+    print(f"OK: p95 lekkiego callbacku {cheap_p95:.1f} ms <= {args.max_cheap_ms} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Lekkie callbacki w trakcie ciężkich renderów zakładek')
+    parser.add_argument('--heavy', type=int, default=2, help='Liczba równoległych renderów zakładek')
+    parser.add_argument('--cheap', type=int, default=50, help='Liczba pomiarów lekkiego callbacku')
+    parser.add_argument('--pause', type=float, default=0.02)
+    parser.add_argument('--warmup', type=float, default=0.5)
+    parser.add_argument('--max-cheap-ms', type=float, default=250.0)
+    parser.add_argument('--no-threads', dest='threaded', action='store_false',
+                        help='Serwer jednowątkowy – jak worker sync')
+    parser.add_argument('--start', help='Data początkowa (domyślnie jak w dashboardzie)')
+    parser.add_argument('--end', help='Data końcowa (domyślnie jak w dashboardzie)')
+    parser.add_argument('--monthly', action='store_true')
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,126 @@
+import time
+
+from flask import Flask
+
+from main.app import create_dash
+
+TABS = ['tab1', 'tab2', 'tab3', 'tab4', 'tab5', 'tab6', 'tab7']
+UPDATE_URL = '/dashboard/_dash-update-component'
+
+
+def create_bench_app(data=None):
+    # Sam Dash bez logowania i bazy – do pomiarów callbacków, liczonych w żądaniu (bez procesów w tle)
+    # data: SalesData (np. z benchmarks.synthetic) zamiast plików xlsx
+    server = Flask(__name__)
+    app = create_dash(server, background=False, data=data)
+    return server, app
+
+
+def find_component(component, component_id):
+    if getattr(component, 'id', None) == component_id:
+        return component
+    for child in component._traverse():
+        if getattr(child, 'id', None) == component_id:
+            return child
+    return None
+
+
+def default_filters(app):
+    # Layout budowany przy wejściu na dashboard (funkcja) – z bieżącej wersji danych
+    layout = app.layout()
+    return {
+        'start_date': find_component(layout, 'start-date').date,
+        'end_date': find_component(layout, 'end-date').date,
+        'stations': find_component(layout, 'station-dropdown').value,
+        'groups': find_component(layout, 'group-dropdown').value,
+        'b2b': ['Tak', 'Nie'],
+        'monthly': [],
+        'products': None,
+        'theme': 'light',
+        'favorites': [],
+    }
+
+
+def _input(component_id, prop, value):
+    return {'id': component_id, 'property': prop, 'value': value}
+
+
+def filter_state(filters, rev=0, client=None):
+    return {
+        'start_date': str(filters['start_date']),
+        'end_date': str(filters['end_date']),
+        'stations': filters['stations'],
+        'groups': filters['groups'],
+        'b2b': filters['b2b'],
+        'monthly': filters['monthly'],
+        'products': filters['products'],
+        'rev': rev,
+        'client': client,
+    }
+
+
+def tab_request(tab, filters, rev=0, client=None):
+    return {
+        'output': 'tabs-content.children',
+        'outputs': {'id': 'tabs-content', 'property': 'children'},
+        'inputs': [
+            _input('tabs', 'value', tab),
+            _input('filter-state', 'data', filter_state(filters, rev, client)),
+            _input('theme-store', 'data', {'theme': filters['theme']}),
+            _input('favorites-store', 'data', filters.get('favorites', [])),
+        ],
+        'changedPropIds': ['tabs.value'],
+        'state': [_input('client-id', 'data', client)],
+    }
+
+
+def heatmap_request(metric, filters, rev=0, client=None):
+    return {
+        'output': 'heatmap-graph.figure',
+        'outputs': {'id': 'heatmap-graph', 'property': 'figure'},
+        'inputs': [
+            _input('metric-selector', 'value', metric),
+            _input('filter-state', 'data', filter_state(filters, rev, client)),
+            _input('theme-store', 'data', {'theme': filters['theme']}),
+        ],
+        'changedPropIds': ['metric-selector.value'],
+        'state': [_input('client-id', 'data', client)],
+    }
+
+
+def top_products_request(top_n, filters, rev=0, client=None):
+    return {
+        'output': 'top-products-container.children',
+        'outputs': {'id': 'top-products-container', 'property': 'children'},
+        'inputs': [_input('top-n-selector', 'value', top_n)],
+        'changedPropIds': ['top-n-selector.value'],
+        'state': [
+            _input('filter-state', 'data', filter_state(filters, rev, client)),
+            _input('theme-store', 'data', {'theme': filters['theme']}),
+            _input('client-id', 'data', client),
+        ],
+    }
+
+
+def product_options_request(groups):
+    return {
+        'output': 'product-dropdown.options',
+        'outputs': {'id': 'product-dropdown', 'property': 'options'},
+        'inputs': [_input('group-dropdown', 'value', groups)],
+        'changedPropIds': ['group-dropdown.value'],
+        'state': [],
+    }
+
+
+def post_timed(client, body, headers=None):
+    started = time.perf_counter()
+    response = client.post(UPDATE_URL, json=body, headers=headers or {})
+    return response, time.perf_counter() - started
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
@@ -0,0 +1,61 @@
+import argparse
+import json
+import statistics
+import time
+
+from main.serialization import orjson, orjson_dumps, _plotly_to_json
+from benchmarks.dash_requests import TABS, create_bench_app, default_filters, filter_state
+
+
+def render_tab(app, tab, filters):
+    render = app.callback_map['tabs-content.children']['callback'].__wrapped__
+    return render(tab, filter_state(filters), {'theme': filters['theme']}, filters.get('favorites', []), None)
+
+
+def time_encoder(encode, payload, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encoded = encode(payload)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), encoded
+
+
+def run(args):
+    server, app = create_bench_app()
+    filters = default_filters(app)
+    if args.start:
+        filters['start_date'] = args.start
+    if args.end:
+        filters['end_date'] = args.end
+    if args.monthly:
+        filters['monthly'] = ['monthly']
+
+    encoders = [('json', lambda p: _plotly_to_json(p, engine='json'))]
+    if orjson is not None:
+        encoders.append(('plotly-orjson', lambda p: _plotly_to_json(p, engine='orjson')))
+        encoders.append(('fast', orjson_dumps))
+    else:
+        print("orjson niedostępny – mierzę tylko standardowy enkoder")
+
+    print(f"{'Zakładka':<8} {'Bajty':>9} " + " ".join(f"{name:>14}" for name, _ in encoders))
+    for tab in TABS:
+        payload = {'multi': True, 'response': {'tabs-content': {'children': render_tab(app, tab, filters)}}}
+        row, reference = [], None
+        for name, encode in encoders:
+            elapsed, encoded = time_encoder(encode, payload, args.repeat)
+            if reference is None:
+                reference = encoded
+            elif json.loads(encoded) != json.loads(reference):
+                print(f"UWAGA: {name} daje inny wynik niż json dla {tab}")
+            row.append(f"{elapsed * 1000:>12.2f}ms")
+        print(f"{tab:<8} {len(reference):>9,} " + " ".join(row))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Czas serializacji odpowiedzi zakładek różnymi enkoderami JSON')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--start', help='Data początkowa (domyślnie jak w dashboardzie)')
+    parser.add_argument('--end', help='Data końcowa (domyślnie jak w dashboardzie)')
+    parser.add_argument('--monthly', action='store_true')
+    run(parser.parse_args())
@@ -0,0 +1,189 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from engine.loader import HOIS_MAP_FILE, load_hois_map, parse_dates, prepare_sales
+
+TOP_PRODUCTS_FILE = "top_products.csv"
+
+# Kolumny jak w eksporcie ze stacji (xlsx)
+COLUMNS = ["#", "Stacja", "Data", "Login POS", "Nazwa produktu", "PLU", "HOIS", "Ilość", "Netto", "Brutto",
+           "B2B", "Karta lojalnościowa", "Dokument"]
+
+STATIONS = [3004, 3007, 3009, 3010, 3016, 3020, 3021, 3035, 3038, 3039, 3050, 3054, 3067, 3068, 7308]
+# Rozkład paragonów w ciągu doby (marzec 2025)
+HOUR_WEIGHTS = [323, 224, 123, 172, 322, 452, 810, 1001, 1276, 1276, 1444, 1583, 1513, 1536, 1652, 1450, 1503,
+                1428, 1403, 1121, 957, 757, 488, 341]
+TECHNICAL_LOGIN = 99999
+VAT = 1.23
+
+# (nazwa, cena brutto za litr)
+FUELS = [("Shell FuelSave PB 95", 6.09), ("Shell FuelSave Diesel", 6.19), ("Shell V-Power 95", 6.79),
+         ("Shell AutoGas LPG", 3.19), ("Shell V-Power Diesel", 6.89), ("Shell V-Power Racing", 7.29),
+         ("AdBlue", 3.99)]
+CARWASH = [("MYJNIA EXPRESS", 20.0, 1021), ("MYJNIA STANDARD", 30.0, 1021), ("Myjnia Extra", 35.0, 1021),
+           ("MYJNIA Ultra Błysk", 45.0, 1021), ("MYJNIA SUPER EXTRA", 40.0, 1021),
+           ("MYJNIA JET ŻETON", 5.0, 1185), ("MYJNIA JET ZAFISKALIZOWANA", 10.0, 1185)]
+FOOD_HOIS = 1013
+
+# Udział linii paragonu wg rodzaju produktu
+SHARES = {"fuel": 0.37, "carwash": 0.02, "top": 0.13, "shop": 0.48}
+
+
+def _find_hois(hois_map, fragment, default):
+    for hois, (_, shop_group) in hois_map.items():
+        if fragment in str(shop_group).upper():
+            return hois
+    return default
+
+
+def build_catalog(hois_map, top_products_path=TOP_PRODUCTS_FILE, rng=None, shop_products_per_hois=8):
+    rng = rng or np.random.default_rng(0)
+    rows = []
+    for i, (name, price) in enumerate(FUELS):
+        rows.append((10 + i, name, 0, price, "fuel"))
+    for i, (name, price, hois) in enumerate(CARWASH):
+        rows.append((100001 + i, name, hois, price, "carwash"))
+
+    # Produkty z listy TOP z prawdziwymi PLU i nazwami
+    top = pd.read_csv(top_products_path, sep=";", encoding="utf-8-sig")
+    top["PLU"] = pd.to_numeric(top["PLU"], errors="coerce")
+    top = top.dropna(subset=["PLU"]).drop_duplicates("PLU")
+    coffee_hois = _find_hois(hois_map, "GORĄCE", FOOD_HOIS)
+    packed_coffee_hois = _find_hois(hois_map, "KAWA", FOOD_HOIS)
+    for row in top.itertuples(index=False):
+        group = str(row[3]).upper()
+        if group.startswith("KARNET"):
+            hois, price = 1021, 99.0
+        elif group == "DOLEWKA":
+            hois, price = coffee_hois, 4.99
+        elif group == "KAWA PAKOWANA":
+            hois, price = packed_coffee_hois, 29.99
+        else:
+            hois, price = FOOD_HOIS, 12.99
+        rows.append((int(row[1]), str(row[2]), hois, price, "top"))
+
+    # Pozostały asortyment: kilka artykułów na każdą grupę HOIS, popularność w losowej kolejności
+    shop = []
+    for hois in sorted(h for h in hois_map if h != 0):
+        prices = np.round(rng.lognormal(mean=2.3, sigma=0.8, size=shop_products_per_hois), 2) + 0.99
+        for i, price in enumerate(prices):
+            shop.append((200000 + int(hois) * 100 + i, f"Artykuł {hois}-{i + 1}", hois, float(price), "shop"))
+    rows.extend(shop[i] for i in rng.permutation(len(shop)))
+    return pd.DataFrame(rows, columns=["PLU", "Nazwa produktu", "HOIS", "Cena", "Rodzaj"])
+
+
+def _pick_products(catalog, size, rng):
+    kinds = catalog["Rodzaj"].to_numpy()
+    probabilities = np.zeros(len(catalog))
+    for kind, share in SHARES.items():
+        members = kinds == kind
+        if members.any():
+            # W obrębie rodzaju popularność jak w handlu – kilka produktów dominuje (Zipf)
+            ranks = np.arange(1, members.sum() + 1)
+            probabilities[members] = share * (1 / ranks) / (1 / ranks).sum()
+    return rng.choice(len(catalog), size=size, p=probabilities / probabilities.sum())
+
+
+def _chunk(catalog, rows, first_receipt, days, rng):
+    # Paragony średnio ~1.5 linii, do 12 linii
+    lines = np.minimum(rng.geometric(0.68, size=int(rows / 1.3) + 16), 12)
+    lines = lines[:np.searchsorted(np.cumsum(lines), rows) + 1]
+    lines[-1] -= lines.sum() - rows
+    receipts = len(lines)
+
+    day = rng.integers(0, len(days), size=receipts)
+    hour = rng.choice(24, size=receipts, p=np.array(HOUR_WEIGHTS) / sum(HOUR_WEIGHTS))
+    seconds = rng.integers(0, 3600, size=receipts)
+    timestamps = days[day] + (hour * 3600 + seconds).astype("timedelta64[s]")
+    # Większe stacje mają ~2x więcej paragonów niż najmniejsze
+    station_weights = np.linspace(2, 1, len(STATIONS))
+    station = rng.choice(STATIONS, size=receipts, p=station_weights / station_weights.sum())
+    login = rng.integers(1, 71, size=receipts)
+    login[rng.random(receipts) < 0.005] = TECHNICAL_LOGIN
+    b2b = rng.random(receipts) < 0.04
+    loyalty = rng.random(receipts) < 0.25
+    invoice = b2b | (rng.random(receipts) < 0.09)
+
+    receipt = np.repeat(np.arange(receipts), lines)
+    product = _pick_products(catalog, rows, rng)
+    kinds = catalog["Rodzaj"].to_numpy()[product]
+    quantity = np.where(kinds == "fuel", np.round(rng.gamma(2.0, 17.0, size=rows), 2),
+                        rng.choice([1.0, 1.0, 1.0, 2.0, 3.0], size=rows))
+    quantity[rng.random(rows) < 0.003] *= -1
+    brutto = np.round(quantity * catalog["Cena"].to_numpy()[product], 2)
+
+    return pd.DataFrame({
+        "#": first_receipt + receipt,
+        "Stacja": station[receipt],
+        "Data": timestamps[receipt],
+        "Login POS": login[receipt],
+        "Nazwa produktu": pd.array(catalog["Nazwa produktu"].to_numpy()[product], dtype="str"),
+        "PLU": catalog["PLU"].to_numpy()[product],
+        "HOIS": catalog["HOIS"].to_numpy()[product],
+        "Ilość": quantity,
+        "Netto": np.round(brutto / VAT, 2),
+        "Brutto": brutto,
+        "B2B": pd.array(np.where(b2b, "Tak", "Nie")[receipt], dtype="str"),
+        "Karta lojalnościowa": pd.array(np.where(loyalty, "Tak", "Nie")[receipt], dtype="str"),
+        "Dokument": pd.array(np.where(invoice, "Faktura", "Paragon")[receipt], dtype="str"),
+    }, columns=COLUMNS), receipts
+
+
+def generate_sales(rows, start="2025-01-01", months=3, seed=0, hois_path=HOIS_MAP_FILE,
+                   top_products_path=TOP_PRODUCTS_FILE, chunk_rows=1_000_000):
+    # Surowe linie paragonów w schemacie eksportu xlsx (przed parse_dates)
+    rng = np.random.default_rng(seed)
+    hois_map = load_hois_map(hois_path)
+    catalog = build_catalog(hois_map, top_products_path, rng)
+    first_day = pd.Timestamp(start)
+    days = pd.date_range(first_day, first_day + pd.DateOffset(months=months) - pd.Timedelta(days=1)) \
+        .to_numpy().astype("datetime64[s]")
+
+    chunks, first_receipt = [], 201_000_000
+    for offset in range(0, rows, chunk_rows):
+        chunk, receipts = _chunk(catalog, min(chunk_rows, rows - offset), first_receipt, days, rng)
+        chunks.append(chunk)
+        first_receipt += receipts
+    return pd.concat(chunks, ignore_index=True), hois_map
+
+
+def synthetic_sales(rows, **kwargs):
+    # Gotowe dane dla create_dash(data=...) – ta sama ścieżka co load_sales()
+    df, hois_map = generate_sales(rows, **kwargs)
+    return prepare_sales(parse_dates(df), hois_map)
+
+
+def write_xlsx(df, prefix="synthetic"):
+    # Plik na miesiąc, jak eksporty ze stacji (limit arkusza: 1 048 575 wierszy)
+    months = pd.to_datetime(df["Data"]).dt.to_period("M")
+    paths = []
+    for month, part in df.groupby(months, sort=True):
+        if len(part) > 1_048_575:
+            raise Exception(f"Miesiąc {month} ma {len(part)} wierszy – więcej niż mieści arkusz xlsx")
+        path = f"{prefix}_{month}.xlsx"
+        part.to_excel(path, index=False)
+        paths.append(path)
+    return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Syntetyczne linie paragonów w schemacie eksportu stacji')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--start', default='2025-01-01')
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--xlsx', metavar='PREFIX', help='Zapis do plików xlsx (jeden na miesiąc)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    frame, _ = generate_sales(args.rows, start=args.start, months=args.months, seed=args.seed)
+    print(f"Wygenerowano {len(frame)} wierszy, {frame['#'].nunique()} paragonów "
+          f"w {time.perf_counter() - started:.1f} s ({frame.memory_usage(deep=True).sum() / 2 ** 20:.0f} MB)")
+    if args.xlsx:
+        for path in write_xlsx(frame, args.xlsx):
+            print(f"Zapisano {path}")
+    sys.exit(0)
@@ -0,0 +1,200 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.dash_requests import TABS, UPDATE_URL, create_bench_app, tab_request, heatmap_request, \
+    top_products_request, product_options_request, percentile
+from benchmarks.synthetic import synthetic_sales
+from engine.aggregates import TOP_N_OPTIONS
+from engine.loader import load_sales
+from engine.queries import HEATMAP_METRICS
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(__file__), "tab_thresholds.json")
+
+
+def filter_states(df):
+    # Reprezentatywne stany filtrów wyliczone z zakresu danych (domyślny zakres dashboardu bywa pusty)
+    min_date, max_date = df["Data"].min(), df["Data"].max()
+    last_month = max(min_date, max_date.replace(day=1))
+    stations = sorted(df["Stacja"].unique().tolist())
+    groups = df["Grupa towarowa"].unique().tolist()
+    top_products = df["PLU_nazwa"].value_counts().index[:20].tolist()
+    base = {'start_date': last_month, 'end_date': max_date, 'stations': stations, 'groups': groups,
+            'b2b': ['Tak', 'Nie'], 'monthly': [], 'products': None, 'theme': 'light', 'favorites': []}
+    return {
+        'miesiac': base,
+        'caly-zakres': {**base, 'start_date': min_date},
+        'miesiecznie': {**base, 'start_date': min_date, 'monthly': ['monthly']},
+        'jedna-stacja': {**base, 'stations': stations[:1]},
+        'b2b-produkty': {**base, 'b2b': ['Tak'], 'products': top_products},
+    }
+
+
+def build_cases(df, states):
+    cases = []
+    for state_name, filters in states.items():
+        for tab in TABS:
+            cases.append((f"{state_name}/{tab}", tab_request(tab, filters)))
+        for metric in HEATMAP_METRICS:
+            cases.append((f"{state_name}/heatmap-{metric}", heatmap_request(metric, filters)))
+        for top_n in TOP_N_OPTIONS:
+            cases.append((f"{state_name}/top-{top_n}", top_products_request(top_n, filters)))
+    groups = df["Grupa towarowa"].value_counts().index.tolist()
+    cases.append(("opcje-produktow/wszystkie-grupy", product_options_request(groups)))
+    cases.append(("opcje-produktow/jedna-grupa", product_options_request(groups[:1])))
+    return cases
+
+
+def run_case(client, body, repeat, warmup):
+    for _ in range(warmup):
+        client.post(UPDATE_URL, json=body)
+    timings, payload, status = [], 0, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.post(UPDATE_URL, json=body)
+        timings.append(time.perf_counter() - started)
+        payload, status = len(response.data), response.status_code
+
+    # Osobny przebieg pod tracemalloc – śledzenie alokacji spowalnia, więc nie wchodzi do czasów
+    tracemalloc.start()
+    client.post(UPDATE_URL, json=body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'status': status,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'max_ms': max(timings) * 1000,
+        'payload_kb': payload / 1024,
+        'peak_mb': peak / 2 ** 20,
+    }
+
+
+def case_group(name):
+    # Progi definiowane per rodzaj przypadku (tab1, heatmap-tx, top-10, ...), niezależnie od stanu filtrów
+    return name.split("/", 1)[1]
+
+
+def check(results, rows, baseline=None, thresholds=None, tolerance=0.25, min_delta_ms=5.0):
+    problems = []
+    for name, result in results.items():
+        if result['status'] not in (200, 204):
+            problems.append(f"{name}: HTTP {result['status']}")
+
+    budgets = (thresholds or {}).get(str(rows))
+    if thresholds is not None and budgets is None:
+        print(f"Brak progów dla {rows} wierszy w {THRESHOLDS_FILE} – pomijam progi bezwzględne")
+    for name, result in results.items():
+        budget = (budgets or {}).get(case_group(name))
+        if budget:
+            for key in ('p95_ms', 'payload_kb', 'peak_mb'):
+                if key in budget and result[key] > budget[key]:
+                    problems.append(f"{name}: {key} {result[key]:.1f} > próg {budget[key]}")
+
+    if baseline:
+        if baseline['meta']['rows'] != rows:
+            print(f"Punkt odniesienia ma {baseline['meta']['rows']} wierszy, bieżący pomiar {rows} – porównanie orientacyjne")
+        for name, result in results.items():
+            before = baseline['cases'].get(name)
+            if not before:
+                continue
+            if result['p95_ms'] > before['p95_ms'] * (1 + tolerance) and \
+                    result['p95_ms'] - before['p95_ms'] > min_delta_ms:
+                problems.append(f"{name}: p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+            if result['payload_kb'] > before['payload_kb'] * (1 + tolerance):
+                problems.append(f"{name}: payload {before['payload_kb']:.1f} -> {result['payload_kb']:.1f} KB")
+    return problems
+
+
+def budgets_from(results, margin):
+    # Progi per rodzaj przypadku: najgorszy wynik ze wszystkich stanów filtrów z zapasem
+    budgets = {}
+    for name, result in results.items():
+        budget = budgets.setdefault(case_group(name), {'p95_ms': 0.0, 'payload_kb': 0.0, 'peak_mb': 0.0})
+        for key in budget:
+            budget[key] = max(budget[key], round(result[key] * (1 + margin), 1))
+    return budgets
+
+
+def load_json(path):
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run(args):
+    started = time.perf_counter()
+    # Bez --rows: prawdziwe pliki xlsx, te same co w dashboardzie
+    data = synthetic_sales(args.rows, start=args.start, months=args.months, seed=args.seed) if args.rows \
+        else load_sales()
+    server, app = create_bench_app(data)
+    df = data.df
+    rows = len(df)
+    print(f"Dane: {rows} wierszy, przygotowanie {time.perf_counter() - started:.1f} s")
+
+    client = server.test_client()
+    cases = [case for case in build_cases(df, filter_states(df)) if re.search(args.cases, case[0])]
+    results = {}
+    print(f"{'przypadek':<36} {'p50':>9} {'p95':>9} {'max':>9} {'payload':>10} {'pamięć':>9}")
+    for name, body in cases:
+        result = results[name] = run_case(client, body, args.repeat, args.warmup)
+        print(f"{name:<36} {result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms {result['max_ms']:>7.1f}ms "
+              f"{result['payload_kb']:>8.1f}KB {result['peak_mb']:>7.1f}MB"
+              + ("" if result['status'] == 200 else f"  HTTP {result['status']}"))
+    print(f"Maks. RSS procesu: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    report = {
+        'meta': {
+            'rows': rows, 'synthetic': bool(args.rows), 'months': args.months, 'seed': args.seed,
+            'repeat': args.repeat, 'python': platform.python_version(), 'pandas': pd.__version__,
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        },
+        'cases': results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Zapisano wyniki do {args.save}")
+
+    thresholds = load_json(args.thresholds) if args.thresholds and os.path.exists(args.thresholds) else None
+    if args.write_thresholds is not None:
+        thresholds = {**(thresholds or {}), str(rows): budgets_from(results, args.write_thresholds)}
+        with open(args.thresholds, "w", encoding="utf-8") as f:
+            json.dump(thresholds, f, indent=2, ensure_ascii=False, sort_keys=True)
+        print(f"Zapisano progi dla {rows} wierszy do {args.thresholds}")
+    problems = check(results, rows, load_json(args.baseline), thresholds, args.tolerance)
+    for problem in problems:
+        print(f"NIE OK {problem}")
+    if problems:
+        return 1
+    print(f"OK: {len(results)} przypadków w granicach progów")
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Czasy, payload i pamięć callbacków dashboardu dla każdej zakładki')
+    parser.add_argument('--rows', type=int, default=1_000_000,
+                        help='Liczba syntetycznych wierszy (0 – prawdziwe pliki xlsx)')
+    parser.add_argument('--start', default='2025-01-01')
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--cases', default='.', help='Wyrażenie regularne wybierające przypadki')
+    parser.add_argument('--save', help='Zapis wyników (JSON) – punkt odniesienia dla kolejnych wydań')
+    parser.add_argument('--baseline', help='Wyniki poprzedniego wydania do porównania')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Dopuszczalny wzrost p95/payload względem baseline')
+    parser.add_argument('--thresholds', default=THRESHOLDS_FILE, help='Progi bezwzględne per skala danych')
+    parser.add_argument('--write-thresholds', type=float, metavar='ZAPAS',
+                        help='Zapisz progi z bieżącego pomiaru z zapasem (np. 1.0 = 2x wynik)')
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+
+from benchmarks.dash_requests import TABS, UPDATE_URL, tab_request
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 2 ** 20
+
+
+def find_master():
+    # Workery to fork() procesu głównego – ta sama linia poleceń co u rodzica, inna niż u jego rodzica
+    pids = [pid for pid in _all_pids() if "gunicorn" in _cmdline(pid)]
+    masters = [pid for pid in pids if _cmdline(_parent(pid)) != _cmdline(pid)
+               and any(_parent(child) == pid and _cmdline(child) == _cmdline(pid) for child in pids)]
+    return min(masters) if masters else None
+
+
+def _all_pids():
+    if psutil is not None:
+        return psutil.pids()
+    return [int(name) for name in os.listdir("/proc") if name.isdigit()]
+
+
+def _cmdline(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace")
+    except OSError:
+        return ""
+
+
+def _parent(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return int(f.read().rsplit(")", 1)[1].split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_tree(master):
+    # (pid, rola): proces główny, workery i procesy zadań w tle uruchomione przez workery
+    tree = [(master, "master")]
+    children = {}
+    for pid in _all_pids():
+        children.setdefault(_parent(pid), []).append(pid)
+    for worker in sorted(children.get(master, [])):
+        tree.append((worker, "worker"))
+        pending = list(children.get(worker, []))
+        while pending:
+            pid = pending.pop()
+            tree.append((pid, "zadanie"))
+            pending += children.get(pid, [])
+    return tree
+
+
+def memory(pid):
+    # RSS, PSS (udział w stronach współdzielonych) i USS (strony tylko tego procesu) w bajtach
+    if psutil is not None:
+        info = psutil.Process(pid).memory_full_info()
+        return {"rss": info.rss, "pss": info.pss, "uss": info.uss}
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                values[name] = int(rest.split()[0]) * 1024
+    return {"rss": values["Rss"], "pss": values["Pss"],
+            "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)}
+
+
+def _find_store(node, store_id):
+    if isinstance(node, dict):
+        if node.get("props", {}).get("id") == store_id:
+            return node["props"].get("data")
+        nodes = node.values()
+    elif isinstance(node, list):
+        nodes = node
+    else:
+        return None
+    for child in nodes:
+        found = _find_store(child, store_id)
+        if found is not None:
+            return found
+    return None
+
+
+def _get(url, cookie):
+    request = urllib.request.Request(url, headers={"Cookie": cookie} if cookie else {})
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def _post(url, body, cookie):
+    headers = {"Content-Type": "application/json", **({"Cookie": cookie} if cookie else {})}
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method="POST", headers=headers)
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+
+
+def touch(url, cookie, rounds):
+    # Zapytania o wszystkie zakładki na domyślnych filtrach – workery czytają wszystkie kolumny danych
+    state = _find_store(_get(url + "/dashboard/_dash-layout", cookie), "filter-state")
+    if state is None:
+        raise Exception("Brak filter-state w layoucie dashboardu (zalogowany? --cookie)")
+    filters = {**state, "theme": "light", "favorites": []}
+    for _ in range(rounds):
+        for tab in TABS:
+            _post(url + UPDATE_URL, tab_request(tab, filters), cookie)
+
+
+def report(tree):
+    print(f"{'pid':>8} {'rola':<8} {'RSS':>9} {'PSS':>9} {'USS':>9} {'wspólne':>9}")
+    totals = {"rss": 0, "pss": 0, "uss": 0}
+    for pid, role in tree:
+        try:
+            usage = memory(pid)
+        except (OSError, KeyError) as e:
+            print(f"{pid:>8} {role:<8} brak danych: {e}")
+            continue
+        for key in totals:
+            totals[key] += usage[key]
+        print(f"{pid:>8} {role:<8} {usage['rss'] / MB:>7.0f}MB {usage['pss'] / MB:>7.0f}MB "
+              f"{usage['uss'] / MB:>7.0f}MB {(usage['rss'] - usage['uss']) / MB:>7.0f}MB")
+    # Suma PSS to faktyczne zużycie pamięci; suma RSS liczy strony współdzielone wielokrotnie
+    print(f"{'razem':>8} {'':<8} {totals['rss'] / MB:>7.0f}MB {totals['pss'] / MB:>7.0f}MB "
+          f"{totals['uss'] / MB:>7.0f}MB")
+
+
+def main(args):
+    master = args.pid or find_master()
+    if master is None:
+        print("Nie znaleziono procesu gunicorna (--pid)")
+        return 1
+    if psutil is None:
+        print("Bez psutil – pomiar z /proc/<pid>/smaps_rollup (tylko Linux)")
+    if args.url:
+        started = time.perf_counter()
+        touch(args.url.rstrip("/"), args.cookie, args.rounds)
+        print(f"Zapytania o {len(TABS)} zakładek x {args.rounds}: {time.perf_counter() - started:.1f} s")
+    for i in range(args.repeat):
+        if i:
+            time.sleep(args.interval)
+            print()
+        report(process_tree(master))
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pamięć unikalna (USS) i współdzielona workerów gunicorna')
+    parser.add_argument('--pid', type=int, help='PID procesu głównego gunicorna (domyślnie wyszukiwany)')
+    parser.add_argument('--url', help='Adres aplikacji, np. http://localhost:8050 – przed pomiarem '
+                                      'zapytania o wszystkie zakładki')
+    parser.add_argument('--cookie', help='Ciasteczko sesji zalogowanego użytkownika, np. "session=..."')
+    parser.add_argument('--rounds', type=int, default=3, help='Ile razy odpytać każdą zakładkę')
+    parser.add_argument('--repeat', type=int, default=1, help='Liczba pomiarów')
+    parser.add_argument('--interval', type=float, default=10, help='Odstęp między pomiarami (s)')
+    sys.exit(main(parser.parse_args()))
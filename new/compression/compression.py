@@ -0,0 +1,101 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_PREFIXES = ("/dashboard/_dash-component-suites/", "/dashboard/assets/", "/static/")
+DEFAULT_MIMETYPES = 'application/json,text/html,text/css,text/plain,application/javascript,text/javascript'
+
+
+class ResponseCompressor:
+
+    def __init__(self, algorithms=("br", "gzip"), level=6, min_size=500, mimetypes=(), cache_size=64):
+        self.algorithms = [a for a in algorithms if a == "gzip" or (a == "br" and brotli is not None)]
+        self.level = level
+        self.min_size = min_size
+        self.mimetypes = set(mimetypes)
+        self.cache_size = cache_size
+        self._static_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def choose_encoding(self, accept_encoding):
+        accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+        for algorithm in self.algorithms:
+            if algorithm in accepted:
+                return algorithm
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == "br":
+            return brotli.compress(data, quality=min(self.level, 11))
+        return gzip.compress(data, compresslevel=min(self.level, 9), mtime=0)
+
+    def compress_static(self, key, data, encoding):
+        # Pliki statyczne (bundle JS, CSS) kompresujemy raz i trzymamy w małym LRU
+        cache_key = key + (encoding,)
+        with self._lock:
+            if cache_key in self._static_cache:
+                self._static_cache.move_to_end(cache_key)
+                return self._static_cache[cache_key]
+        compressed = self.compress(data, encoding)
+        with self._lock:
+            self._static_cache[cache_key] = compressed
+            while len(self._static_cache) > self.cache_size:
+                self._static_cache.popitem(last=False)
+        return compressed
+
+    def should_compress(self, response):
+        # Pliki z send_file (assets, static) są "streamed" z direct_passthrough – czytamy je w całości;
+        # prawdziwe strumienie (generatory), odpowiedzi częściowe (Range/206) i HEAD zostają bez zmian
+        return (
+            200 <= response.status_code < 300
+            and response.status_code != 206
+            and request.method != "HEAD"
+            and "Range" not in request.headers
+            and (not response.is_streamed or response.direct_passthrough)
+            and "Content-Encoding" not in response.headers
+            and response.mimetype in self.mimetypes
+        )
+
+    def after_request(self, response):
+        if not self.algorithms or not self.should_compress(response):
+            return response
+        encoding = self.choose_encoding(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        if request.method == "GET" and request.path.startswith(STATIC_PREFIXES):
+            etag, _ = response.get_etag()
+            compressed = self.compress_static((request.path, etag or len(data)), data, encoding)
+        else:
+            compressed = self.compress(data, encoding)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        response.headers["Content-Length"] = str(len(compressed))
+        response.vary.add("Accept-Encoding")
+        return response
+
+
+def create_compression(app):
+    compressor = ResponseCompressor(
+        algorithms=[a.strip() for a in app.config.get('COMPRESS_ALGORITHMS', 'br,gzip').split(',') if a.strip()],
+        level=int(app.config.get('COMPRESS_LEVEL', 6)),
+        min_size=int(app.config.get('COMPRESS_MIN_SIZE', 500)),
+        mimetypes=[m.strip() for m in app.config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES).split(',')]
+    )
+    if app.config.get('COMPRESS_ENABLED', 'True') == 'True':
+        app.after_request(compressor.after_request)
+    app.extensions['compressor'] = compressor
+    return compressor
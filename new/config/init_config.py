@@ -6,7 +6,11 @@ def load_config(app):
     app.config.update({
         'REDIS_URL': os.environ.get('REDIS_URL'),
         'REDIS_DECODE_RESPONSES':  os.environ.get('REDIS_DECODE_RESPONSES'),
-        'WTF_CSRF_ENABLED': os.environ.get('WTF_CSRF_ENABLED')
+        'WTF_CSRF_ENABLED': os.environ.get('WTF_CSRF_ENABLED'),
+        'COMPRESS_ENABLED': os.environ.get('COMPRESS_ENABLED', 'True'),
+        'COMPRESS_ALGORITHMS': os.environ.get('COMPRESS_ALGORITHMS', 'br,gzip'),
+        'COMPRESS_LEVEL': os.environ.get('COMPRESS_LEVEL', '6'),
+        'COMPRESS_MIN_SIZE': os.environ.get('COMPRESS_MIN_SIZE', '500')
     })
     app.secret_key = os.environ.get("SECRET")
 
@@ -1,17 +1,86 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+import contextlib
+import logging
 import os
+import time
+
+from dotenv import load_dotenv
+from flask import has_app_context
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+from monitoring import metrics
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "True") == "True"
+# Oczekiwanie na połączenie dłuższe niż próg trafia do logów
+DB_POOL_SLOW_WAIT = float(os.environ.get("DB_POOL_SLOW_WAIT", 0.5))
+
 engine = create_engine(
-   os.environ.get("DB_AUTH")
+    os.environ.get("DB_AUTH"),
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False – encje zwracane z repozytoriów są używane po zamknięciu sesji
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+Session = scoped_session(SessionLocal)
 
-def get_db():
-    db = SessionLocal()
+pool_wait = metrics.histogram("db_pool_wait_seconds", "Czas oczekiwania na połączenie z puli")
+pool_timeouts = metrics.counter("db_pool_timeouts_total", "Przekroczenia czasu oczekiwania na połączenie")
+metrics.gauge("db_pool_size", "Rozmiar puli połączeń", lambda: engine.pool.size())
+metrics.gauge("db_pool_checked_out", "Połączenia wypożyczone z puli", lambda: engine.pool.checkedout())
+metrics.gauge("db_pool_overflow", "Połączenia ponad rozmiar puli", lambda: max(engine.pool.overflow(), 0))
+
+
+def pool_stats():
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "wait": pool_wait.snapshot().get((), {"sum": 0.0, "count": 0}),
+        "timeouts": pool_timeouts.snapshot().get((), 0),
+    }
+
+
+@contextlib.contextmanager
+def session_scope():
+    # Sesja współdzielona w obrębie żądania; transakcja kończy się razem z blokiem,
+    # więc połączenie wraca do puli zanim callback zacznie liczyć wykresy
+    db = Session()
+    started = time.perf_counter()
+    try:
+        db.connection()
+    except PoolTimeoutError:
+        pool_timeouts.inc()
+        logger.error("Brak wolnego połączenia w puli po %.1f s: %s", DB_POOL_TIMEOUT, pool_stats())
+        raise
+    waited = time.perf_counter() - started
+    pool_wait.observe(waited)
+    if waited > DB_POOL_SLOW_WAIT:
+        logger.warning("Oczekiwanie na połączenie z bazą %.3f s: %s", waited, pool_stats())
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
-        db.close()
\ No newline at end of file
+        if not has_app_context():
+            Session.remove()
+
+
+def create_db_session(app):
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        Session.remove()
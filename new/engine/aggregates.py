@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+TECHNICAL_LOGIN = 99999
+TOP_N_OPTIONS = [10, 30, 100]
+
+PRODUCT_TOTALS_KEYS = ["Data", "Stacja", "B2B", "HOIS", "Grupa towarowa", "Grupa sklepowa", "Produkt_kod"]
+
+
+def build_product_totals(df):
+    # Sumy per (dzień, stacja, produkt) – rankingi liczone są na nich zamiast na liniach paragonów
+    facts = df[df["Login POS"] != TECHNICAL_LOGIN]
+    return facts.groupby(PRODUCT_TOTALS_KEYS, sort=False, observed=True)[["Ilość", "Netto"]].sum().reset_index()
+
+
+def filter_product_totals(totals, start_date, end_date, stations, groups, b2b):
+    return totals[
+        (totals["Data"] >= start_date) &
+        (totals["Data"] <= end_date) &
+        (totals["Stacja"].isin(stations)) &
+        (totals["Grupa towarowa"].isin(groups)) &
+        (totals["B2B"].isin(b2b))
+    ]
+
+
+def top_n_indices(values, n):
+    # Częściowa selekcja (argpartition), sortowane jest tylko n wybranych pozycji
+    n = min(n, len(values))
+    if n <= 0:
+        return np.array([], dtype=np.intp)
+    picked = np.argpartition(-values, n - 1)[:n] if n < len(values) else np.arange(len(values))
+    return picked[np.lexsort((picked, -values[picked]))]
+
+
+def rank_products(frame, product_dim, column, n=10, exclude_tags=0):
+    # Ranking po nazwie produktu; działa na agregacie i na surowych liniach (kolumna Produkt_kod)
+    name_codes, names = pd.factorize(product_dim["Nazwa produktu"], sort=True, use_na_sentinel=False)
+    product_codes = frame["Produkt_kod"].to_numpy()
+    weights = frame[column].to_numpy(dtype="float64")
+    if exclude_tags:
+        keep = ((product_dim["Tagi"].to_numpy() & exclude_tags) == 0)[product_codes]
+        product_codes, weights = product_codes[keep], weights[keep]
+    codes = name_codes[product_codes]
+    values = np.bincount(codes, weights=weights, minlength=len(names))
+    present = np.flatnonzero(np.bincount(codes, minlength=len(names)))
+    picked = present[top_n_indices(values[present], n)]
+    return pd.DataFrame({
+        "Nazwa produktu": np.asarray(names, dtype="object")[picked],
+        column: values[picked]
+    })
@@ -0,0 +1,46 @@
+import threading
+from collections import namedtuple
+
+from engine.aggregates import build_product_totals
+from engine.loader import data_version
+from engine.partitions import MonthPartitions, sort_by_month
+
+# Zbudowana wersja danych: fakty, agregat pod rankingi, identyfikator wersji i zakresy do filtrów;
+# partitions / totals_partitions – te same ramki podzielone na miesiące (zapytania o zakres dat);
+# source – stan plików i licznik przeładowań sprzed wczytania (main.reload.source_state)
+Engine = namedtuple("Engine", ["data", "product_totals", "version", "load_duration",
+                               "min_date", "max_date", "stations", "groups", "partitions", "totals_partitions",
+                               "source"], defaults=(None,))
+
+
+def build_engine(data, product_totals=None, load_duration=0.0):
+    df = sort_by_month(data.df)
+    if df is not data.df:
+        # Dane spoza prepare_sales – po ułożeniu miesiącami agregat liczony od nowa
+        data, product_totals = data._replace(df=df), None
+    if product_totals is None:
+        product_totals = build_product_totals(df)
+    return Engine(data, product_totals, data_version(df), load_duration, df["Data"].min(), df["Data"].max(),
+                  df["Stacja"].unique().tolist(), df["Grupa towarowa"].unique().tolist(),
+                  MonthPartitions(df, "Data_full"), MonthPartitions(product_totals))
+
+
+class EngineHandle:
+    # Wskaźnik na bieżącą wersję danych. Wywołanie bierze wersję raz (current) i liczy na niej do końca;
+    # nowa wersja powstaje obok starej i jest podmieniana jednym przypisaniem. Stara znika z pamięci,
+    # gdy skończą się korzystające z niej wywołania.
+
+    def __init__(self, engine):
+        self._current = engine
+        self._lock = threading.Lock()
+        # Najwyżej jedna wersja budowana naraz – w pamięci są co najwyżej dwie
+        self.building = threading.Lock()
+
+    @property
+    def current(self):
+        return self._current
+
+    def swap(self, engine):
+        with self._lock:
+            previous, self._current = self._current, engine
+        return previous
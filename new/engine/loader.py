@@ -0,0 +1,114 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from engine.partitions import sort_by_month
+from engine.products import build_product_dim, attach_product_dim
+
+HOIS_MAP_FILE = "hois_map.csv"
+DATA_FILES = ["data01.xlsx", "data02.xlsx", "data03.xlsx", "data04.xlsx", "data05.xlsx"]
+UNKNOWN_GROUP = "Nieznana"
+
+# Dane po wczytaniu: fakty z kodami produktów, mapa HOIS i wymiar produktów
+SalesData = namedtuple("SalesData", ["df", "hois_map", "product_codes", "product_dim"])
+
+
+def _report(message):
+    print(message)
+
+
+def load_hois_map(file_path=HOIS_MAP_FILE):
+    hois_df = pd.read_csv(file_path, encoding="utf-8", sep=";")
+    hois_df.columns = [col.strip() for col in hois_df.columns]
+    expected_columns = ["HOIS", "Grupa towarowa", "Grupa sklepowa"]
+    actual_columns = hois_df.columns.tolist()
+    if len(actual_columns) != len(expected_columns):
+        raise Exception(f"Plik CSV powinien mieć kolumny: {expected_columns}, ale znaleziono: {actual_columns}")
+    return dict(zip(hois_df["HOIS"], zip(hois_df["Grupa towarowa"], hois_df["Grupa sklepowa"])))
+
+
+def parse_dates(df):
+    # "Data_full" z godziną (heatmapy), "Data" bez godziny – do filtrowania
+    df["Data_full"] = pd.to_datetime(df["Data"], errors="coerce")
+    df["Data"] = df["Data_full"].dt.date
+    return df
+
+
+def load_data(files=DATA_FILES, on_loaded=None, on_error=_report):
+    # on_loaded(plik, wiersze) / on_error(komunikat) – front-end decyduje, jak to pokazać
+    dfs = []
+    for file in files:
+        try:
+            df_month = pd.read_excel(file)
+            if "Data" not in df_month.columns:
+                on_error(f"Błąd: W pliku {file} brak kolumny 'Data'")
+                continue
+            dfs.append(parse_dates(df_month))
+            if on_loaded is not None:
+                on_loaded(file, len(df_month))
+        except Exception as e:
+            on_error(f"Błąd przy wczytywaniu {file}: {e}")
+    if not dfs:
+        raise Exception("Brak poprawnych danych do połączenia!")
+    df = pd.concat(dfs, ignore_index=True)
+    df = df.dropna(subset=["Data_full"])
+    return df
+
+
+# Kolumny liczbowe do skrótu zawartości – tanie w haszowaniu i takie same w każdym układzie kolumn
+VERSION_COLUMNS = ["#", "Stacja", "PLU", "Ilość", "Netto", "Data_full"]
+
+
+def data_version(df):
+    # Identyfikator zestawu danych: liczba wierszy, ostatnia transakcja i skrót zawartości
+    # (poprawione dane z tą samą liczbą wierszy to też nowa wersja)
+    digest = pd.util.hash_pandas_object(df[VERSION_COLUMNS], index=False).sum()
+    return f"{len(df)}:{df['Data_full'].max()}:{int(digest) & 0xffffffff:08x}"
+
+
+def compact_frame(df):
+    # Kody + słowniki zamiast obiektu Pythona w każdej komórce: odczyt nie zmienia refcountów
+    # w buforach kolumn, więc strony pamięci współdzielone po fork() zostają wspólne
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if column == "Data":
+            # Daty zostają obiektami (porównania z datetime.date), ale jeden obiekt na dzień zamiast na wiersz
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+            columns[column] = np.asarray(uniques, dtype=object)[codes]
+        elif pd.api.types.is_string_dtype(values.dtype):
+            columns[column] = values.astype("category")
+        else:
+            columns[column] = values.to_numpy()
+    # Nowa ramka – kolumny tego samego typu sklejone w ciągłe bloki
+    return pd.DataFrame(columns, index=df.index)
+
+
+def compact_sales(data):
+    return data._replace(df=compact_frame(data.df))
+
+
+def map_hois_groups(df, hois_map):
+    # Słownik zamiast lambdy per wiersz – mapowanie po unikalnych HOIS
+    df["Grupa towarowa"] = df["HOIS"].map({k: v[0] for k, v in hois_map.items()}).fillna(UNKNOWN_GROUP)
+    df["Grupa sklepowa"] = df["HOIS"].map({k: v[1] for k, v in hois_map.items()}).fillna(UNKNOWN_GROUP)
+    return df
+
+
+def load_sales(files=DATA_FILES, hois_path=HOIS_MAP_FILE, on_loaded=None, on_error=_report):
+    hois_map = load_hois_map(hois_path)
+    return prepare_sales(load_data(files, on_loaded=on_loaded, on_error=on_error), hois_map)
+
+
+def prepare_sales(df, hois_map):
+    # Wspólne dla danych z plików i danych syntetycznych (benchmarki)
+    # Fakty ułożone miesiącami – zapytania o zakres dat czytają tylko pasujące miesiące (MonthPartitions)
+    df = sort_by_month(df)
+    df["PLU_nazwa"] = df["PLU"].astype(str).str.strip() + " - " + df["Nazwa produktu"].astype(str).str.strip()
+
+    # Wymiar produktów (PLU -> nazwa, HOIS, grupy, tagi); do faktów trafiają tylko kody i flagi
+    product_codes, product_dim = build_product_dim(df, hois_map)
+    df = attach_product_dim(df, product_codes, product_dim)
+    df = map_hois_groups(df, hois_map)
+    return SalesData(df, hois_map, product_codes, product_dim)
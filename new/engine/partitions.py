@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+
+def month_keys(dates):
+    # Numer miesiąca (rok * 12 + miesiąc - 1) – rosnący razem z datą
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    return (dates.year * 12 + dates.month - 1).to_numpy(dtype="int64")
+
+
+def month_key(day):
+    return day.year * 12 + day.month - 1
+
+
+def month_label(key):
+    return f"{key // 12}-{key % 12 + 1:02d}"
+
+
+def sort_by_month(df, column="Data_full"):
+    # Stabilne sortowanie po miesiącu: kolejność wierszy wewnątrz miesiąca zostaje bez zmian,
+    # dane już ułożone miesiącami (pliki miesięczne) nie są kopiowane
+    keys = month_keys(df[column])
+    if len(keys) < 2 or (np.diff(keys) >= 0).all():
+        return df
+    return df.iloc[np.argsort(keys, kind="stable")].reset_index(drop=True)
+
+
+class MonthPartitions:
+    # Ramka ułożona miesiącami + granice miesięcy. Zapytanie o zakres dat czyta tylko miesiące,
+    # które na niego zachodzą (ciągły wycinek iloc, bez kopii); filtr dni robi dalej filter_sales
+
+    def __init__(self, frame, column="Data"):
+        keys = month_keys(frame[column])
+        if len(keys) > 1 and (np.diff(keys) < 0).any():
+            raise ValueError("Ramka nie jest ułożona miesiącami (sort_by_month)")
+        self.frame = frame
+        self.months, starts = np.unique(keys, return_index=True)
+        self.offsets = np.append(starts, len(frame))
+
+    def __len__(self):
+        return len(self.months)
+
+    def bounds(self, start_date, end_date):
+        first = np.searchsorted(self.months, month_key(start_date), side="left")
+        last = np.searchsorted(self.months, month_key(end_date), side="right")
+        return self.offsets[first], self.offsets[max(first, last)]
+
+    def between(self, start_date, end_date):
+        begin, end = self.bounds(start_date, end_date)
+        return self.frame.iloc[begin:end]
+
+    def describe(self):
+        # [(miesiąc "RRRR-MM", wiersze)]
+        return [(month_label(int(key)), int(self.offsets[i + 1] - self.offsets[i]))
+                for i, key in enumerate(self.months)]
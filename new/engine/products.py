@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+PRODUCT_OVERRIDES_FILE = "product_overrides.csv"
+
+# Programy myjni – pozycja na liście jest kodem w kolumnie "Program_kod"
+CARWASH_PROGRAMS = ["Myjnia Express", "Myjnia Standard", "Pozostałe"]
+PROGRAM_EXPRESS, PROGRAM_STANDARD, PROGRAM_OTHER = range(len(CARWASH_PROGRAMS))
+
+# Tagi produktów – bity w kolumnie "Tagi"
+TAG_KARNET = 1
+TAG_EXCLUDED_TOP = 2
+TAG_VPOWER = 4
+TAG_ADBLUE = 8
+
+TAG_NAMES = {
+    "karnet": TAG_KARNET,
+    "wykluczony_top": TAG_EXCLUDED_TOP,
+    "vpower": TAG_VPOWER,
+    "adblue": TAG_ADBLUE,
+}
+
+# Produkty pomijane w rankingach TOP / Pareto
+EXCLUDED_FROM_TOP = [
+    "myjnia jet zafiskalizowana",
+    "opłata opak. kubek 0,25zł",
+    "myjnia jet żeton"
+]
+
+# Reguły tagowania po nazwie produktu (małymi literami): (tag, operacja, wzorce)
+PRODUCT_TAG_RULES = [
+    (TAG_KARNET, "startswith", ["karnet"]),
+    (TAG_EXCLUDED_TOP, "equals", EXCLUDED_FROM_TOP),
+    (TAG_VPOWER, "contains", ["v-power", "vpower"]),
+    (TAG_ADBLUE, "contains", ["adblue"]),
+]
+
+# Reguły programów myjni – pierwsza pasująca wygrywa, reszta to "Pozostałe"
+CARWASH_PROGRAM_RULES = [
+    (PROGRAM_STANDARD, "standard"),
+    (PROGRAM_EXPRESS, "express"),
+]
+
+
+def classify_program(names):
+    lowered = names.fillna("").str.lower()
+    return np.select(
+        [lowered.str.contains(pattern, regex=False) for _, pattern in CARWASH_PROGRAM_RULES],
+        [program for program, _ in CARWASH_PROGRAM_RULES],
+        PROGRAM_OTHER
+    ).astype("int8")
+
+
+def _match_rule(lowered, operation, patterns):
+    if operation == "startswith":
+        return lowered.str.startswith(tuple(patterns))
+    if operation == "equals":
+        return lowered.str.strip().isin(patterns)
+    if operation == "contains":
+        return np.logical_or.reduce([lowered.str.contains(p, regex=False) for p in patterns])
+    raise ValueError(f"Nieznana operacja reguły: {operation}")
+
+
+def tag_products(names):
+    lowered = names.fillna("").str.lower()
+    tags = np.zeros(len(names), dtype="int8")
+    for tag, operation, patterns in PRODUCT_TAG_RULES:
+        tags[np.asarray(_match_rule(lowered, operation, patterns), dtype=bool)] |= tag
+    return tags
+
+
+def load_product_overrides(file_path=PRODUCT_OVERRIDES_FILE):
+    # Plik opcjonalny, kolumny: PLU;Program;Tagi
+    # Tagi to lista po przecinku, np. "karnet,-wykluczony_top" ("-" zdejmuje tag)
+    if not file_path or not os.path.exists(file_path):
+        return pd.DataFrame(columns=["PLU", "Program", "Tagi"])
+    overrides = pd.read_csv(file_path, encoding="utf-8", sep=";", dtype=str).fillna("")
+    overrides.columns = [col.strip() for col in overrides.columns]
+    missing = {"PLU", "Program", "Tagi"} - set(overrides.columns)
+    if missing:
+        raise Exception(f"Plik {file_path} nie zawiera kolumn: {sorted(missing)}")
+    return overrides
+
+
+def apply_product_overrides(product_dim, overrides):
+    plu_keys = product_dim["PLU"].astype(str).str.strip()
+    for row in overrides.itertuples(index=False):
+        mask = (plu_keys == row.PLU.strip()).to_numpy()
+        if not mask.any():
+            continue
+        program = row.Program.strip()
+        if program:
+            if program not in CARWASH_PROGRAMS:
+                raise Exception(f"Nieznany program myjni w nadpisaniu PLU {row.PLU}: {program}")
+            product_dim.loc[mask, "Program_kod"] = CARWASH_PROGRAMS.index(program)
+        for tag_name in filter(None, (t.strip().lower() for t in row.Tagi.split(","))):
+            tag = TAG_NAMES.get(tag_name.lstrip("-"))
+            if tag is None:
+                raise Exception(f"Nieznany tag w nadpisaniu PLU {row.PLU}: {tag_name}")
+            if tag_name.startswith("-"):
+                product_dim.loc[mask, "Tagi"] &= ~tag
+            else:
+                product_dim.loc[mask, "Tagi"] |= tag
+    return product_dim
+
+
+def tag_product_dim(product_dim, overrides_path=PRODUCT_OVERRIDES_FILE):
+    # Reguły działają na małej tabeli wymiaru, fakty dostają tylko wynik przez kod
+    product_dim["Program_kod"] = classify_program(product_dim["Nazwa produktu"])
+    product_dim["Tagi"] = tag_products(product_dim["Nazwa produktu"])
+    return apply_product_overrides(product_dim, load_product_overrides(overrides_path))
+
+
+def build_product_dim(df, hois_map, overrides_path=PRODUCT_OVERRIDES_FILE):
+    # Jeden wiersz na PLU: ostatnio widziana nazwa i HOIS
+    codes, plu_values = pd.factorize(df["PLU"], use_na_sentinel=False)
+    latest = df[["Nazwa produktu", "HOIS"]].groupby(codes).last()
+
+    product_dim = pd.DataFrame({
+        "PLU": plu_values,
+        "Nazwa produktu": latest["Nazwa produktu"].astype("object").to_numpy(),
+        "HOIS": latest["HOIS"].to_numpy(),
+    })
+    groups = product_dim["HOIS"].map(lambda x: hois_map.get(x, ("Nieznana", "Nieznana")))
+    product_dim["Grupa towarowa"] = groups.str[0]
+    product_dim["Grupa sklepowa"] = groups.str[1]
+    product_dim.index.name = "Produkt_kod"
+    return codes.astype("int32"), tag_product_dim(product_dim, overrides_path)
+
+
+def attach_product_dim(df, codes, product_dim):
+    df["Produkt_kod"] = codes
+    return refresh_product_flags(df, product_dim)
+
+
+def refresh_product_flags(df, product_dim):
+    # Po zmianie reguł wystarczy przebudować wymiar i ponownie zebrać flagi po kodach
+    codes = df["Produkt_kod"].to_numpy()
+    df["Program_kod"] = product_dim["Program_kod"].to_numpy()[codes]
+    df["Tagi"] = product_dim["Tagi"].to_numpy()[codes]
+    return df
+
+
+def has_tag(frame, tag):
+    return (frame["Tagi"] & tag) != 0
@@ -0,0 +1,80 @@
+import pandas as pd
+
+from engine.aggregates import TECHNICAL_LOGIN
+
+WEEKDAYS = ["Pon", "Wt", "Śr", "Czw", "Pt", "Sob", "Nd"]
+HOURS = list(range(24))
+HEATMAP_METRICS = ["tx", "netto", "ilosc", "paliwo", "lojalnosc"]
+
+FOOD_GROUPS = ["FOOD SERVICE", "USLUGI DODATKOWE"]
+
+
+def filter_sales(df, start_date, end_date, stations, groups, b2b=None, products=None):
+    # Wspólny filtr obu front-endów; login techniczny nigdy nie wchodzi do analiz
+    mask = (
+        (df["Data"] >= start_date) &
+        (df["Data"] <= end_date) &
+        (df["Stacja"].isin(stations)) &
+        (df["Grupa towarowa"].isin(groups)) &
+        (df["Login POS"] != TECHNICAL_LOGIN)
+    )
+    if b2b is not None:
+        mask &= df["B2B"].isin(b2b)
+    if products:
+        mask &= df["PLU_nazwa"].isin(products)
+    return df[mask].copy()
+
+
+def add_period(dff, monthly):
+    # Kolumna "Okres": dzień albo miesiąc; w widoku miesięcznym serie rozbijane są po stacjach
+    if monthly:
+        dff["Okres"] = pd.to_datetime(dff["Data"]).dt.to_period("M").astype(str)
+        return "Stacja"
+    dff["Okres"] = dff["Data"]
+    return None
+
+
+def summary_metrics(dff):
+    return {
+        "total_netto": dff["Netto"].sum(),
+        "total_transactions": dff["#"].nunique(),
+        "kawa_netto": dff.loc[dff["Grupa sklepowa"] == "NAPOJE GORĄCE", "Netto"].sum(),
+        "food_netto": dff.loc[dff["Grupa towarowa"].str.strip().str.upper().isin(FOOD_GROUPS), "Netto"].sum(),
+        "myjnia_netto": dff.loc[dff["Grupa sklepowa"] == "MYJNIA INNE", "Netto"].sum(),
+    }
+
+
+def period_series(dff, column, category_col=None, how="sum"):
+    keys = ["Okres"] + ([category_col] if category_col else [])
+    grouped = dff.groupby(keys)[column]
+    return (grouped.nunique() if how == "nunique" else grouped.sum()).reset_index()
+
+
+def heatmap_grid(dff, metric):
+    # Siatka dzień tygodnia x godzina, brakujące komórki jako 0
+    data_full = pd.to_datetime(dff["Data_full"], errors="coerce")
+    keys = [data_full.dt.dayofweek.rename("Dzień tygodnia"), data_full.dt.hour.rename("Godzina")]
+    full_index = pd.MultiIndex.from_product([range(7), HOURS], names=["Dzień tygodnia", "Godzina"])
+
+    if metric == "tx":
+        grouped = dff.groupby(keys)["#"].nunique()
+    elif metric == "netto":
+        grouped = dff.groupby(keys)["Netto"].sum()
+    elif metric == "ilosc":
+        grouped = dff.groupby(keys)["Ilość"].sum()
+    elif metric == "paliwo":
+        fuel = (dff["HOIS"] == 0).to_numpy()
+        grouped = dff[fuel].groupby([key[fuel] for key in keys])["#"].nunique()
+    elif metric == "lojalnosc":
+        all_tx = dff.groupby(keys)["#"].nunique().rename("Wszystkie")
+        loyal = (dff["Karta lojalnościowa"].str.upper() == "TAK").to_numpy()
+        loyal_tx = dff[loyal].groupby([key[loyal] for key in keys])["#"].nunique().rename("Lojalnościowe")
+        merged = pd.merge(all_tx, loyal_tx, left_index=True, right_index=True, how="left").fillna(0)
+        grouped = (merged["Lojalnościowe"] / merged["Wszystkie"] * 100).rename("Penetracja")
+    else:
+        grouped = pd.Series(dtype=float)
+
+    grouped = grouped.reindex(full_index, fill_value=0).reset_index(name="Wartość")
+    heat_pivot = grouped.pivot(index="Dzień tygodnia", columns="Godzina", values="Wartość")
+    heat_pivot.index = [WEEKDAYS[i] for i in heat_pivot.index]
+    return heat_pivot
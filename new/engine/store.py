@@ -0,0 +1,138 @@
+import datetime
+import json
+import os
+
+import pandas as pd
+
+from engine.loader import HOIS_MAP_FILE, load_data, load_hois_map, prepare_sales
+from engine.partitions import month_keys, month_label
+
+# Fakty na dysku podzielone na miesiące: jeden plik na miesiąc + manifest z metadanymi partycji.
+# Zarchiwizowane miesiące nie są wczytywane (pliki w archive/), usunięte znikają z manifestu.
+MANIFEST_FILE = "manifest.json"
+ARCHIVE_DIR = "archive"
+ACTIVE, ARCHIVED = "active", "archived"
+
+
+def manifest_path(store_dir):
+    return os.path.join(store_dir, MANIFEST_FILE)
+
+
+def read_manifest(store_dir):
+    try:
+        with open(manifest_path(store_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"partitions": {}}
+
+
+def write_manifest(store_dir, manifest):
+    # Zapis przez plik tymczasowy – czytający (workery) widzą stary albo nowy manifest, nigdy połowę
+    path = manifest_path(store_dir)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def partition_file(store_dir, entry):
+    folder = os.path.join(store_dir, ARCHIVE_DIR) if entry["state"] == ARCHIVED else store_dir
+    return os.path.join(folder, entry["file"])
+
+
+def write_partitions(store_dir, df, source=None):
+    # Miesiące obecne w df zastępują w całości dotychczasowe partycje tych miesięcy
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = read_manifest(store_dir)
+    keys = month_keys(df["Data_full"])
+    written = []
+    for key in sorted(set(keys.tolist())):
+        month = month_label(key)
+        part = df[keys == key].reset_index(drop=True)
+        previous = manifest["partitions"].get(month)
+        if previous is not None and previous["state"] == ARCHIVED:
+            os.remove(partition_file(store_dir, previous))
+        entry = {"file": f"{month}.pkl", "rows": len(part), "state": ACTIVE,
+                 "min_date": str(part["Data"].min()), "max_date": str(part["Data"].max()),
+                 "source": source, "updated": datetime.datetime.now().isoformat(timespec="seconds")}
+        path = partition_file(store_dir, entry)
+        part.to_pickle(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        manifest["partitions"][month] = entry
+        written.append((month, len(part)))
+    write_manifest(store_dir, manifest)
+    return written
+
+
+def import_files(store_dir, files, on_loaded=None):
+    df = load_data(files, on_loaded=on_loaded)
+    return write_partitions(store_dir, df, source=", ".join(os.path.basename(file) for file in files))
+
+
+def active_months(manifest, start_month=None, end_month=None):
+    # Miesiące "RRRR-MM" porównywane jako tekst; zakres domknięty z obu stron
+    return [month for month, entry in sorted(manifest["partitions"].items())
+            if entry["state"] == ACTIVE
+            and (start_month is None or month >= start_month) and (end_month is None or month <= end_month)]
+
+
+def read_partitions(store_dir, start_month=None, end_month=None):
+    # Tylko aktywne miesiące z zakresu, po kolei – wynik jest już ułożony miesiącami
+    manifest = read_manifest(store_dir)
+    months = active_months(manifest, start_month, end_month)
+    if not months:
+        raise Exception(f"Brak aktywnych partycji w {store_dir}")
+    return pd.concat([pd.read_pickle(partition_file(store_dir, manifest["partitions"][month]))
+                      for month in months], ignore_index=True)
+
+
+def load_store_sales(store_dir, hois_path=HOIS_MAP_FILE, start_month=None, end_month=None):
+    return prepare_sales(read_partitions(store_dir, start_month, end_month), load_hois_map(hois_path))
+
+
+def _set_state(store_dir, months, state):
+    manifest = read_manifest(store_dir)
+    changed = []
+    for month in months:
+        entry = manifest["partitions"].get(month)
+        if entry is None or entry["state"] == state:
+            continue
+        source = partition_file(store_dir, entry)
+        entry = {**entry, "state": state, "updated": datetime.datetime.now().isoformat(timespec="seconds")}
+        target = partition_file(store_dir, entry)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(source, target)
+        manifest["partitions"][month] = entry
+        changed.append(month)
+    write_manifest(store_dir, manifest)
+    return changed
+
+
+def archive_partitions(store_dir, months):
+    return _set_state(store_dir, months, ARCHIVED)
+
+
+def restore_partitions(store_dir, months):
+    return _set_state(store_dir, months, ACTIVE)
+
+
+def months_before(store_dir, month):
+    # Aktywne miesiące starsze niż podany – kandydaci do archiwizacji (retencja)
+    return [m for m in active_months(read_manifest(store_dir)) if m < month]
+
+
+def drop_partitions(store_dir, months):
+    # Usuwane są tylko miesiące zarchiwizowane – aktywne trzeba najpierw zarchiwizować
+    manifest = read_manifest(store_dir)
+    dropped = []
+    for month in months:
+        entry = manifest["partitions"].get(month)
+        if entry is None or entry["state"] != ARCHIVED:
+            continue
+        try:
+            os.remove(partition_file(store_dir, entry))
+        except FileNotFoundError:
+            pass
+        del manifest["partitions"][month]
+        dropped.append(month)
+    write_manifest(store_dir, manifest)
+    return dropped
@@ -0,0 +1,27 @@
+import os
+
+# Tryby: gthread (domyślny) – lekkie callbacki (motyw, panel filtrów, zaznacz wszystkie) nie czekają
+# w kolejce za ciężkim renderem zakładki; sync – dotychczasowy tryb, jeden request na worker.
+# gevent się nie nadaje: obliczenia pandas nie oddają pętli zdarzeń.
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("GUNICORN_WORKERS", 5))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4)) if worker_class == "gthread" else 1
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+# PRELOAD_DATA=True – dane wczytuje raz proces główny (kolumny jako kody + słowniki, bez obiektu Pythona
+# na komórkę), workery dostają je przez fork() i współdzielą strony copy-on-write zamiast pięciu kopii.
+# Aplikacja (baza, Redis, Dash) startuje dalej w każdym workerze. HUP wczytuje dane od nowa przed
+# uruchomieniem nowych workerów. Pomiar: python -m benchmarks.worker_memory
+if os.environ.get("PRELOAD_DATA", "False") == "True":
+    def on_starting(server):
+        from main.preload import preload
+        preload()
+
+    def on_reload(server):
+        from main.preload import preload
+        preload()
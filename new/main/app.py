@@ -1,6 +1,7 @@
-from random import random
+import os
+
 import dash
-from dash import dcc, html, Input, Output, State, dash_table
+from dash import dcc, html, Input, Output, State, ClientsideFunction, dash_table
 import dash_bootstrap_components as dbc
 import pandas as pd
 # from mlxtend.frequent_patterns import apriori, association_rules
@@ -9,9 +10,28 @@ import plotly.express as px
 import plotly.io as pio
 import holidays
 import datetime
+import functools
 import plotly.graph_objects as go
 # import dash_mantine_components as dmc
 
+from engine.products import CARWASH_PROGRAMS, TAG_KARNET, TAG_EXCLUDED_TOP, TAG_VPOWER, TAG_ADBLUE, has_tag
+from engine.handle import EngineHandle, build_engine
+from engine.queries import HOURS, filter_sales, add_period, summary_metrics, period_series, heatmap_grid
+from engine.aggregates import TOP_N_OPTIONS, filter_product_totals, rank_products
+from main.figures import compact_components, compact_figure
+from main.serialization import configure_json_engine
+from main.generations import cancellable, checkpoint
+from main.background import create_background_manager, background_options, in_background
+from main.singleflight import flights, flight_key
+from main.instrumentation import create_instrumentation, record_rows
+from main.warmup import WarmView, create_warmup, rewarm
+from main.preload import load_engine, preloaded, watched_files
+from main.reload import create_reloader, report_engine
+from monitoring import health
+
+# Opóźnienie zastosowania filtrów w trybie automatycznym (ms od ostatniej zmiany)
+FILTER_DEBOUNCE_MS = int(os.environ.get("FILTER_DEBOUNCE_MS", 800))
+
 corporate_blue_palette = [
     "#0F4C81",  # Dark navy Blue
     "#2A9D8F",  # Soft navy
@@ -101,6 +121,11 @@ def format_metric_value(value, suffix=""):
     return formatted + suffix
 
 
+# Szablon przekazywany jawnie do każdego wykresu – bez zmiany globalnego pio.templates.default
+def theme_template(theme):
+    return "corporate_dark" if theme == "dark" else "corporate_blue"
+
+
 def get_free_days(start_date, end_date):
     pl_holidays = holidays.Poland(years=range(start_date.year, end_date.year + 1))
     date_range = pd.date_range(start=start_date, end=end_date)
@@ -117,67 +142,38 @@ def generate_metric_card(label, value, delta=None):
 
 
 
-def load_hois_map():
-    file_path = "hois_map.csv"
-    hois_df = pd.read_csv(file_path, encoding="utf-8", sep=";")
-    hois_df.columns = [col.strip() for col in hois_df.columns]
-    expected_columns = ["HOIS", "Grupa towarowa", "Grupa sklepowa"]
-    actual_columns = hois_df.columns.tolist()
-    if len(actual_columns) != len(expected_columns):
-        raise Exception(f"Plik CSV powinien mieć kolumny: {expected_columns}, ale znaleziono: {actual_columns}")
-    return {row["HOIS"]: (row["Grupa towarowa"], row["Grupa sklepowa"]) for _, row in hois_df.iterrows()}
-
+def create_dash(flask_app, background=True, data=None):
+    # Szybki enkoder JSON (orjson) dla odpowiedzi callbacków, z powrotem do json gdy niedostępny
+    configure_json_engine()
 
-def load_data():
-    files = ["data01.xlsx", "data02.xlsx", "data03.xlsx", "data04.xlsx", "data05.xlsx"]
-    dfs = []
-    for file in files:
-        try:
-            df_month = pd.read_excel(file)
-            if "Data" not in df_month.columns:
-                print(f"Błąd: W pliku {file} brak kolumny 'Data'")
-                continue
-            df_month["Data_full"] = pd.to_datetime(df_month["Data"], errors="coerce")
-            df_month["Data"] = df_month["Data_full"].dt.date
-            dfs.append(df_month)
-        except Exception as e:
-            print(f"Błąd przy wczytywaniu {file}: {e}")
-    if not dfs:
-        raise Exception("Brak poprawnych danych do połączenia!")
-    df = pd.concat(dfs, ignore_index=True)
-    df = df.dropna(subset=["Data_full"])
-    
-    return df
-
-
-def create_dash(flask_app):
     # ---------------------------------------------
     # Wczytanie danych
     # ---------------------------------------------
-    hois_map = load_hois_map()
-    df = load_data()
-    df["PLU_nazwa"] = df["PLU"].astype(str).str.strip() + " - " + df["Nazwa produktu"].astype(str).str.strip()
-    
-    # Obliczenie pierwszego dnia poprzedniego miesiąca jako domyślny start_date
-    today = datetime.date.today()
-    first_day_this_month = today.replace(day=1)
-    last_month = first_day_this_month - datetime.timedelta(days=1)
-    first_day_last_month = last_month.replace(day=1)
-
-
+    # Wspólny silnik z aplikacją Streamlit: fakty z kodami produktów, grupy HOIS i wymiar produktów,
+    # plus agregat (dzień, stacja, produkt) pod rankingi TOP-N i Pareto
+    health.report("data", "loading")
+    # Przy PRELOAD_DATA dane wczytał już proces główny gunicorna – worker współdzieli je po fork()
+    shared = preloaded() if data is None else None
+    if shared is not None:
+        current = shared
+    elif data is not None:
+        current = build_engine(data)
+    else:
+        current = load_engine()
+    # Callbacki biorą bieżącą wersję z uchwytu – przeładowanie podmienia ją bez restartu workera
+    engine = EngineHandle(current)
+    report_engine(current, preloaded=shared is not None)
 
-    # Mapowanie dodatkowych kolumn
-    df["Grupa towarowa"] = df["HOIS"].map(lambda x: hois_map.get(x, ("Nieznana", "Nieznana"))[0])
-    df["Grupa sklepowa"] = df["HOIS"].map(lambda x: hois_map.get(x, ("Nieznana", "Nieznana"))[1])
+    def default_start(current):
+        # Pierwszy dzień poprzedniego miesiąca jako domyślny start_date
+        today = datetime.date.today()
+        first_day_this_month = today.replace(day=1)
+        last_month = first_day_this_month - datetime.timedelta(days=1)
+        first_day_last_month = last_month.replace(day=1)
+        return max(current.min_date, first_day_last_month)
 
-    # Ustalenie zakresu dat i opcji do filtrów
-    min_date = df["Data"].min()
-    max_date = df["Data"].max()
-    station_options = df["Stacja"].unique().tolist()
-    group_options = df["Grupa towarowa"].unique().tolist()
-    global df_cached, hois_cached
-    df_cached = df.copy()
-    hois_cached = hois_map.copy()
+    # Ciężkie callbacki w procesach w tle, z cache wyników per stan filtrów i wersja danych
+    background_manager = create_background_manager(lambda: engine.current.version) if background else None
 
 
 
@@ -190,14 +186,40 @@ def create_dash(flask_app):
         server=flask_app,
         url_base_pathname="/dashboard/",
         suppress_callback_exceptions=True,  # Added to handle dynamic components
+        background_callback_manager=background_manager,
         title="Kompas"
     )
+    # Pomiar etapów, wierszy, payloadu i cache każdego callbacku (metryki w /admin/metrics)
+    create_instrumentation(app, lambda: engine.current.version)
+
+    def default_filters(current):
+        # Zatwierdzony stan filtrów – jedyne wejście callbacków liczących dane
+        return {
+            'start_date': str(default_start(current)),
+            'end_date': str(current.max_date),
+            'stations': current.stations,
+            'groups': current.groups,
+            'b2b': ['Tak', 'Nie'],
+            'monthly': [],
+            'products': None,
+        }
 
-    # Mock session state for favorites
-    app.server.config['FAVORITES'] = set()
-
-    app.layout = dbc.Container([
+    def serve_layout():
+        # Budowany przy każdym wejściu na dashboard – po przeładowaniu danych nowe zakresy dat i opcje filtrów
+        current = engine.current
+        min_date, max_date = current.min_date, current.max_date
+        station_options, group_options = current.stations, current.groups
+        initial_filters = default_filters(current)
+        return dbc.Container([
     dcc.Store(id='theme-store', data={'theme': 'light'}),
+    dcc.Store(id='pending-filters', data=initial_filters),
+    dcc.Store(id='filter-state', data={**initial_filters, 'rev': 0, 'client': None}),
+    dcc.Store(id='filter-debounce'),
+    dcc.Store(id='filter-config', data={'debounce_ms': FILTER_DEBOUNCE_MS}),
+    # Identyfikator karty przeglądarki – zakres tokenów generacji callbacków
+    dcc.Store(id='client-id'),
+    # Ulubione trzymane w przeglądarce użytkownika, nie we współdzielonym configu serwera
+    dcc.Store(id='favorites-store', storage_type='local', data=[]),
     dcc.Store(id="trigger-graph-resize", data={"value": 0}),
     dcc.Interval(id="theme-init", n_intervals=0, max_intervals=1, interval=200),
 
@@ -234,7 +256,7 @@ def create_dash(flask_app):
                                         id='start-date',
                                         min_date_allowed=min_date,
                                         max_date_allowed=max_date,
-                                        date=max(min_date, first_day_last_month),
+                                        date=default_start(current),
                                         display_format='YYYY-MM-DD',
                                         className="form-control"
                                     )
@@ -322,7 +344,18 @@ def create_dash(flask_app):
                                 options=[{'label': 'Widok miesięczny według stacji', 'value': 'monthly'}],
                                 value=[],
                                 className="form-check"
-                            )
+                            ),
+
+                            html.Div([
+                                dbc.Button("Zastosuj filtry", id='apply-filters-button', color="primary",
+                                           n_clicks=0, disabled=True, className="me-3"),
+                                dcc.Checklist(
+                                    id='auto-apply-check',
+                                    options=[{'label': 'Stosuj automatycznie', 'value': 'auto'}],
+                                    value=['auto'],
+                                    className="form-check"
+                                )
+                            ], className="d-flex align-items-center mt-4")
                         ], className="filter-form")
                     ]),
                     className="custom-card"
@@ -340,6 +373,11 @@ def create_dash(flask_app):
                 dcc.Tab(label='Ulubione', value='tab6'),
                 dcc.Tab(label='Sprzedaż per kasjer', value='tab7')
             ]),
+            # Postęp obliczeń zakładki liczonej w tle
+            html.Div(id='tab-progress-container', style={'display': 'none'}, children=[
+                dbc.Progress(id='tab-progress', value=0, striped=True, animated=True,
+                             style={'marginTop': '10px', 'height': '18px'})
+            ]),
             dcc.Loading(
                 id="loading-main",
                 type="circle",
@@ -351,51 +389,87 @@ def create_dash(flask_app):
     ], className="dashboard-layout")
 ], className="main-container", fluid=True, style={"width": "100%"})
 
+    app.layout = serve_layout
+
 
 
     # ---------------------------------------------
-    # Callback dla przycisków stacji
+    # Przyciski zaznacz/odznacz wszystkie (po stronie przeglądarki)
     # ---------------------------------------------
-    @app.callback(
+    # Wartości brane z opcji dropdownu – bez zapytania do serwera
+    select_all_js = """
+    function(selectAll, deselectAll, options) {
+        const triggered = window.dash_clientside.callback_context.triggered.map(t => t.prop_id);
+        if (triggered.some(id => id.startsWith('%s.'))) {
+            return (options || []).map(o => o.value);
+        }
+        if (triggered.some(id => id.startsWith('%s.'))) {
+            return [];
+        }
+        return window.dash_clientside.no_update;
+    }
+    """
+
+    app.clientside_callback(
+        select_all_js % ('select-all-stations', 'deselect-all-stations'),
         Output('station-dropdown', 'value'),
         Input('select-all-stations', 'n_clicks'),
         Input('deselect-all-stations', 'n_clicks'),
+        State('station-dropdown', 'options'),
         prevent_initial_call=True
     )
-    def update_stations(select_all, deselect_all):
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            return dash.no_update
-        else:
-            button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-            if button_id == 'select-all-stations':
-                return station_options
-            elif button_id == 'deselect-all-stations':
-                return []
-        return dash.no_update
-
-
 
-    # ---------------------------------------------
-    # Callback dla przycisków grup towarowych
-    # ---------------------------------------------
-    @app.callback(
+    app.clientside_callback(
+        select_all_js % ('select-all-groups', 'deselect-all-groups'),
         Output('group-dropdown', 'value'),
         Input('select-all-groups', 'n_clicks'),
         Input('deselect-all-groups', 'n_clicks'),
+        State('group-dropdown', 'options'),
         prevent_initial_call=True
     )
-    def update_groups(select_all, deselect_all):
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            return dash.no_update
-        else:
-            button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-            if button_id == 'select-all-groups':
-                return group_options
-            elif button_id == 'deselect-all-groups':
-                return []
-        return dash.no_update
+
+    # ---------------------------------------------
+    # Zatwierdzanie filtrów (main/assets/filters.js)
+    # ---------------------------------------------
+    app.clientside_callback(
+        ClientsideFunction(namespace='filters', function_name='clientId'),
+        Output('client-id', 'data'),
+        Input('client-id', 'id')
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='filters', function_name='collect'),
+        Output('pending-filters', 'data'),
+        Input('start-date', 'date'),
+        Input('end-date', 'date'),
+        Input('station-dropdown', 'value'),
+        Input('group-dropdown', 'value'),
+        Input('b2b-checklist', 'value'),
+        Input('monthly-check', 'value'),
+        Input('product-dropdown', 'value'),
+        State('auto-apply-check', 'value'),
+        State('filter-config', 'data'),
+        prevent_initial_call=True
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='filters', function_name='commit'),
+        Output('filter-state', 'data'),
+        Input('apply-filters-button', 'n_clicks'),
+        Input('filter-debounce', 'data'),
+        Input('auto-apply-check', 'value'),
+        State('pending-filters', 'data'),
+        State('filter-state', 'data'),
+        State('client-id', 'data'),
+        prevent_initial_call=True
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='filters', function_name='unchanged'),
+        Output('apply-filters-button', 'disabled'),
+        Input('pending-filters', 'data'),
+        Input('filter-state', 'data')
+    )
     # Callback do aktualizacji listy produktów na podstawie wybranych grup towarowych
     @app.callback(
     Output('product-dropdown', 'options'),
@@ -405,7 +479,9 @@ def create_dash(flask_app):
         if not selected_groups:
             return []
 
-        df_filtered = df_cached[df_cached["Grupa towarowa"].isin(selected_groups)].copy()
+        df = engine.current.data.df
+        df_filtered = df[df["Grupa towarowa"].isin(selected_groups)].copy()
+        record_rows(len(df), len(df_filtered))
         
         if df_filtered.empty:
             return []
@@ -416,73 +492,132 @@ def create_dash(flask_app):
 
 
 
+    # ---------------------------------------------
+    # Rankingi produktów sklepowych (TOP-N, Pareto)
+    # ---------------------------------------------
+    def shop_product_totals(current, start_date_obj, end_date_obj, selected_stations, selected_groups,
+                            selected_b2b, selected_products, dff=None):
+        # Bez wyboru produktów wystarcza agregat; z wyborem liczymy z przefiltrowanych linii.
+        # Czytane są tylko miesiące zachodzące na zakres dat
+        df = current.partitions.between(start_date_obj, end_date_obj)
+        product_totals = current.totals_partitions.between(start_date_obj, end_date_obj)
+        if selected_products:
+            if dff is None:
+                dff = df[
+                    (df["Data"] >= start_date_obj) &
+                    (df["Data"] <= end_date_obj) &
+                    (df["Stacja"].isin(selected_stations)) &
+                    (df["Grupa towarowa"].isin(selected_groups)) &
+                    (df["B2B"].isin(selected_b2b)) &
+                    (df["PLU_nazwa"].isin(selected_products)) &
+                    (df["Login POS"] != 99999)
+                ]
+                record_rows(len(df), len(dff))
+            totals = dff
+        else:
+            totals = filter_product_totals(product_totals, start_date_obj, end_date_obj, selected_stations,
+                                           selected_groups, selected_b2b)
+            record_rows(len(product_totals), len(totals))
+        return totals[totals["HOIS"] != 0]
+
+    def render_top_products(shop_totals, product_dim, top_n, template):
+        top_products = rank_products(shop_totals, product_dim, "Ilość", top_n, exclude_tags=TAG_EXCLUDED_TOP)
+        if top_products.empty:
+            return html.Div(f"Brak danych do wygenerowania wykresu TOP {top_n}.",
+                            style={'color': 'gray', 'fontStyle': 'italic'})
+        fig_top_products = px.bar(top_products, x="Nazwa produktu", y="Ilość",
+                                  title=f"Top {top_n} najlepiej sprzedających się produktów (bez paliwa)", template=template)
+        return dcc.Graph(className="custom-graph", figure=fig_top_products)
+
+    @app.callback(
+        Output('top-products-container', 'children'),
+        Input('top-n-selector', 'value'),
+        State('filter-state', 'data'),
+        State('theme-store', 'data'),
+        State('client-id', 'data'),
+        prevent_initial_call=True
+    )
+    @cancellable('top-products')
+    def update_top_products(top_n, filter_state, theme_data, client_id):
+        theme = theme_data.get("theme", "light")
+        template = theme_template(theme)
+        current = engine.current
+        shop_totals = shop_product_totals(current, pd.to_datetime(filter_state['start_date']).date(),
+                                          pd.to_datetime(filter_state['end_date']).date(),
+                                          filter_state['stations'], filter_state['groups'], filter_state['b2b'],
+                                          filter_state['products'])
+        return compact_components(render_top_products(shop_totals, current.data.product_dim, top_n, template))
+
     # ---------------------------------------------
     # Callback renderujący zawartość zakładki
     # ---------------------------------------------
     @app.callback(
         Output('tabs-content', 'children'),
         Input('tabs', 'value'),  # Fixed from 'value_1value' to 'value'
-        Input('start-date', 'date'),
-        Input('end-date', 'date'),
-
-        Input('station-dropdown', 'value'),
-        Input('group-dropdown', 'value'),
-        Input('monthly-check', 'value'),
-        Input('b2b-checklist', 'value'),
+        Input('filter-state', 'data'),
         Input('theme-store', 'data'),
-        Input('product-dropdown', 'value')
-
-        
-
+        Input('favorites-store', 'data'),
+        State('client-id', 'data'),
+        **background_options(
+            background_manager,
+            progress=[Output('tab-progress', 'value'), Output('tab-progress', 'label')],
+            running=[(Output('tab-progress-container', 'style'), {'display': 'block'}, {'display': 'none'})],
+            ignore=[4]
+        )
     )
-    def render_tab_content(tab, start_date, end_date, selected_stations, selected_groups, monthly_check, selected_b2b,theme_data,selected_products):
+    @in_background(background_manager, progress=True)
+    @cancellable('tabs-content')
+    def render_tab_content(tab, filter_state, theme_data, favorites, client_id):
+        # Identyczne równoczesne żądania (ta sama zakładka, filtry, motyw i wersja danych) liczone raz na cały klaster
+        current = engine.current
+        return flights.do(flight_key('tabs-content', current.version, tab, filter_state, theme_data, favorites),
+                          lambda: compute_tab_content(tab, filter_state, theme_data, favorites, current))
+
+    def compute_tab_content(tab, filter_state, theme_data, favorites, current=None):
+        # Jedna wersja danych na całe wywołanie – przeładowanie w trakcie nie miesza wersji
+        if current is None:
+            current = engine.current
+        content = build_tab_content(current, tab, filter_state['start_date'], filter_state['end_date'],
+                                    filter_state['stations'], filter_state['groups'], filter_state['monthly'],
+                                    filter_state['b2b'], theme_data, filter_state['products'], favorites)
+        checkpoint("figure")
+        # Wykresy przechodzą przez kompresję (typed arrays, szablon, downsampling) przed wysyłką
+        return compact_components(content)
+
+    def build_tab_content(current, tab, start_date, end_date, selected_stations, selected_groups, monthly_check, selected_b2b,theme_data,selected_products,favorites=None):
+        hois_map, product_dim = current.data.hois_map, current.data.product_dim
         theme = theme_data.get("theme", "light")
-        pio.templates.default = "corporate_dark" if theme == "dark" else "corporate_blue"
+        template = theme_template(theme)
         start_date_obj = pd.to_datetime(start_date).date()
         end_date_obj = pd.to_datetime(end_date).date()
+        # Tylko miesiące zachodzące na wybrany zakres – czas zapytania rośnie z zakresem, nie z historią
+        df = current.partitions.between(start_date_obj, end_date_obj)
+        product_totals = current.totals_partitions.between(start_date_obj, end_date_obj)
 
-        # Filtrowanie danych
-        dff = df[
-            (df["Data"] >= start_date_obj) &
-            (df["Data"] <= end_date_obj) &
-            (df["Stacja"].isin(selected_stations)) &
-            (df["Grupa towarowa"].isin(selected_groups)) &
-            (df["B2B"].isin(selected_b2b))  # filtr B2B
-        ].copy()
-        if selected_products:
-            dff = dff[dff["PLU_nazwa"].isin(selected_products)]
-
-
-        # Usunięcie loginu technicznego
-        dff = dff[dff["Login POS"] != 99999].copy()
+        # Filtrowanie danych (bez loginu technicznego)
+        dff = filter_sales(df, start_date_obj, end_date_obj, selected_stations, selected_groups,
+                           selected_b2b, selected_products)
+        record_rows(len(df), len(dff))
+        checkpoint("filter")
 
         # Obsługa widoku miesięcznego
-        if 'monthly' in monthly_check:
-            dff["Okres"] = pd.to_datetime(dff["Data"]).dt.to_period("M").astype(str)
-            category_col = "Stacja"
-        else:
-            dff["Okres"] = dff["Data"]
-            category_col = None
-        
+        category_col = add_period(dff, 'monthly' in monthly_check)
 
     # Dalej możesz robić wykresy itp. na podstawie dff
     # return np. wykres, tabela lub komponent html
 
         if tab == 'tab1':
-            total_netto = dff["Netto"].sum()
-            total_transactions = dff["#"].nunique()
-            kawa_netto = dff[dff["Grupa sklepowa"] == "NAPOJE GORĄCE"]["Netto"].sum()
-            food_netto = dff[dff["Grupa towarowa"].str.strip().str.upper().isin(["FOOD SERVICE", "USLUGI DODATKOWE"])][
-                "Netto"].sum()
-            myjnia_netto = dff[dff["Grupa sklepowa"] == "MYJNIA INNE"]["Netto"].sum()
-
-            grouped_netto = dff.groupby(["Okres"] + ([category_col] if category_col else []))[
-                "Netto"].sum().reset_index()
+            summary = summary_metrics(dff)
+            total_netto, total_transactions = summary["total_netto"], summary["total_transactions"]
+            kawa_netto, food_netto, myjnia_netto = summary["kawa_netto"], summary["food_netto"], summary["myjnia_netto"]
+
+            grouped_netto = period_series(dff, "Netto", category_col)
+            checkpoint("aggregate")
             fig_netto = px.line(grouped_netto, x="Okres", y="Netto", color=category_col, title="Obrót netto (NFR+Fuel)",
-                                markers=True)
+                                markers=True, template=template)
 
-            grouped_tx = dff.groupby(["Okres"] + ([category_col] if category_col else []))["#"].nunique().reset_index()
-            fig_tx = px.line(grouped_tx, x="Okres", y="#", color=category_col, title="Liczba transakcji", markers=True)
+            grouped_tx = period_series(dff, "#", category_col, how="nunique")
+            fig_tx = px.line(grouped_tx, x="Okres", y="#", color=category_col, title="Liczba transakcji", markers=True, template=template)
 
             try:
                 start_dt = pd.to_datetime(dff["Okres"].min())
@@ -560,9 +695,10 @@ def create_dash(flask_app):
             netto_shop_df = dff[dff["HOIS"] != 0].groupby(["Okres"] + ([category_col] if category_col else []))[
                 "Netto"].sum().reset_index()
 
+            checkpoint("aggregate")
             fig_shop_netto = px.line(netto_shop_df, x="Okres", y="Netto", color=category_col,
 
-                                     title="Obrót sklepowy netto (bez paliwa)", markers=True)
+                                     title="Obrót sklepowy netto (bez paliwa)", markers=True, template=template)
 
             netto_bez_hois0_mies = dff[dff["HOIS"] != 0].groupby("Okres")["Netto"].sum()
 
@@ -574,7 +710,7 @@ def create_dash(flask_app):
 
             avg_mies_df["Srednia"] = avg_mies_df["Netto_bez_HOIS0"] / avg_mies_df["Transakcje_all"]
 
-            fig_avg_tx = px.line(avg_mies_df, x="Okres", y="Srednia", title="Średnia wartość transakcji", markers=True)
+            fig_avg_tx = px.line(avg_mies_df, x="Okres", y="Srednia", title="Średnia wartość transakcji", markers=True, template=template)
 
             try:
 
@@ -593,32 +729,8 @@ def create_dash(flask_app):
 
                 print("Błąd przy dodawaniu dni wolnych: ", e)
 
-            df_nonzero_hois = dff[dff["HOIS"] != 0].copy()
-
-            excluded_products = [
-
-                "myjnia jet zafiskalizowana",
-
-                "opłata opak. kubek 0,25zł",
-
-                "myjnia jet żeton"
-
-            ]
-
-            top_products = df_nonzero_hois[
-
-                ~df_nonzero_hois["Nazwa produktu"].str.lower().str.strip().isin(excluded_products)]
-
-            top_products = top_products.groupby("Nazwa produktu")["Ilość"].sum().reset_index()
-
-            top_products = top_products.sort_values(by="Ilość", ascending=False).head(10)
-
-            fig_top_products = None
-
-            if not top_products.empty:
-                fig_top_products = px.bar(top_products, x="Nazwa produktu", y="Ilość",
-
-                                          title="Top 10 najlepiej sprzedających się produktów (bez paliwa)")
+            shop_totals = shop_product_totals(current, start_date_obj, end_date_obj, selected_stations,
+                                              selected_groups, selected_b2b, selected_products, dff)
 
             fig_station_avg = None
 
@@ -637,7 +749,7 @@ def create_dash(flask_app):
 
                 fig_station_avg = px.line(avg_mies_stacje_df, x="Okres", y="Srednia", color="Stacja",
 
-                                          title="Średnia wartość transakcji per stacja", markers=True)
+                                          title="Średnia wartość transakcji per stacja", markers=True, template=template)
 
                 try:
 
@@ -674,27 +786,25 @@ def create_dash(flask_app):
             if fig_station_avg:
                 content.append(dcc.Graph(className="custom-graph", figure=fig_station_avg))
 
-            if fig_top_products:
+            content.extend([
 
-                content.append(dcc.Graph(className="custom-graph", figure=fig_top_products))
-
-            else:
+                dcc.RadioItems(
 
-                content.append(html.Div("Brak danych do wygenerowania wykresu TOP 10.",
+                    id='top-n-selector',
 
-                                        style={'color': 'gray', 'fontStyle': 'italic'}))
+                    options=[{'label': f"Top {n}", 'value': n} for n in TOP_N_OPTIONS],
 
-            import plotly.graph_objects as go
+                    value=TOP_N_OPTIONS[0],
 
-            pareto_df = df_nonzero_hois[
+                    labelStyle={'display': 'inline-block', 'marginRight': '15px'}
 
-                ~df_nonzero_hois["Nazwa produktu"].str.lower().str.strip().isin(excluded_products)
+                ),
 
-            ].copy()
+                html.Div(id='top-products-container', children=render_top_products(shop_totals, product_dim, TOP_N_OPTIONS[0], template))
 
-            pareto_df = pareto_df.groupby("Nazwa produktu")["Netto"].sum().reset_index()
+            ])
 
-            pareto_df = pareto_df.sort_values(by="Netto", ascending=False).head(30)
+            pareto_df = rank_products(shop_totals, product_dim, "Netto", 30, exclude_tags=TAG_EXCLUDED_TOP)
 
             pareto_df["Kumulacja"] = pareto_df["Netto"].cumsum() / pareto_df["Netto"].sum() * 100
 
@@ -702,7 +812,7 @@ def create_dash(flask_app):
 
             pareto_df["Kolor"] = ["#0F4C81" if i < pareto_cutoff else "#B0BEC5" for i in range(len(pareto_df))]
 
-            fig_pareto = go.Figure()
+            fig_pareto = go.Figure(layout={"template": template})
 
             fig_pareto.add_bar(
 
@@ -770,12 +880,11 @@ def create_dash(flask_app):
 
             
         elif tab == 'tab3':
-            global df_cached, hois_cached
-            df_all = df_cached.copy()
+            df_all = df.copy()
 
             # Dodaj brakujące kolumny
-            df_all["Grupa towarowa"] = df_all["HOIS"].map(lambda x: hois_cached.get(x, ("Nieznana", "Nieznana"))[0])
-            df_all["Grupa sklepowa"] = df_all["HOIS"].map(lambda x: hois_cached.get(x, ("Nieznana", "Nieznana"))[1])
+            df_all["Grupa towarowa"] = df_all["HOIS"].map(lambda x: hois_map.get(x, ("Nieznana", "Nieznana"))[0])
+            df_all["Grupa sklepowa"] = df_all["HOIS"].map(lambda x: hois_map.get(x, ("Nieznana", "Nieznana"))[1])
 
             # Dodaj "Okres"
             if 'monthly' in monthly_check:
@@ -795,6 +904,8 @@ def create_dash(flask_app):
                 (df_all["B2B"].isin(selected_b2b)) &
                 (df_all["Login POS"] != 99999)
             ].copy()
+            record_rows(len(df_all), len(fuel_df))
+            checkpoint("filter")
 
     
 
@@ -813,12 +924,11 @@ def create_dash(flask_app):
             avg_liters_per_tx = fuel_liters / fuel_tx if fuel_tx != 0 else 0
 
             # Oblicz penetrację V-Power
-            vpower_keywords = ["V-POWER", "VPOWER"]
-            vpower_df = fuel_df[fuel_df["Nazwa produktu"].str.upper().str.contains("|".join(vpower_keywords))]
+            vpower_df = fuel_df[has_tag(fuel_df, TAG_VPOWER)]
             vpower_liters = vpower_df["Ilość"].sum()
 
             # Odfiltruj AdBlue
-            non_adblue_df = fuel_df[~fuel_df["Nazwa produktu"].str.upper().str.contains("ADBLUE")]
+            non_adblue_df = fuel_df[~has_tag(fuel_df, TAG_ADBLUE)]
             non_adblue_liters = non_adblue_df["Ilość"].sum()
 
             penetracja_vpower = (vpower_liters / non_adblue_liters * 100) if non_adblue_liters else 0
@@ -833,8 +943,9 @@ def create_dash(flask_app):
 
             # Wykres sprzedaży paliwa
             fuel_sales_grouped = fuel_df.groupby(["Okres"] + ([category_col] if category_col else []))["Ilość"].sum().reset_index()
+            checkpoint("aggregate")
             fig_fuel_sales = px.line(fuel_sales_grouped, x="Okres", y="Ilość", color=category_col,
-                                    title="Sprzedaż paliw", markers=True)
+                                    title="Sprzedaż paliw", markers=True, template=template)
 
             # Potencjał flotowy
             non_b2b_invoice = fuel_df[(fuel_df["B2B"] != "TAK") & (fuel_df["Dokument"].str.upper() == "FAKTURA")]
@@ -843,7 +954,7 @@ def create_dash(flask_app):
                 "Liczba": [len(non_b2b_invoice), len(fuel_df) - len(non_b2b_invoice)]
             })
             fig_flota = px.pie(flota_data, names="Typ", values="Liczba",
-                            title="Potencjał B2B", hole=0.4)
+                            title="Potencjał B2B", hole=0.4, template=template)
             fig_flota.update_traces(textposition='inside', textinfo='percent+label')
 
             # Analiza transakcji: paliwo vs paliwo + sklep
@@ -862,20 +973,23 @@ def create_dash(flask_app):
 
 
             fig_mix = px.pie(tx_summary, names="Typ", values="Liczba",
-                            title="Tylko paliwo vs paliwo + sklep", hole=0.4)
+                            title="Tylko paliwo vs paliwo + sklep", hole=0.4, template=template)
             fig_mix.update_traces(textposition='inside', textinfo='percent+label')
 
             # B2B / B2C
-            fuel_df["Typ klienta"] = fuel_df["B2B"].apply(lambda x: "B2B" if str(x).upper() == "TAK" else "B2C")
+            # astype(str): przy danych z preload kolumna jest kategorią, a apply na niej zwraca kategorię
+            fuel_df["Typ klienta"] = fuel_df["B2B"].astype(str).apply(lambda x: "B2B" if x.upper() == "TAK" else "B2C")
             customer_types = fuel_df.groupby("Typ klienta")["Ilość"].sum().reset_index()
             fig_customer_types = px.pie(customer_types, values="Ilość", names="Typ klienta",
-                                        title="Stosunek tankowań B2C do B2B", hole=0.4)
+                                        title="Stosunek tankowań B2C do B2B", hole=0.4, template=template)
             fig_customer_types.update_traces(textposition='inside', textinfo='percent+label')
 
             # Udział produktów paliwowych
-            fuel_sales = fuel_df.groupby("Nazwa produktu")["Ilość"].sum().nlargest(10).reset_index()
+            fuel_totals = filter_product_totals(product_totals, start_date_obj, end_date_obj, selected_stations,
+                                                selected_groups, selected_b2b)
+            fuel_sales = rank_products(fuel_totals[fuel_totals["Grupa sklepowa"] == "PALIWO"], product_dim, "Ilość", 10)
             fig_fuel_products = px.pie(fuel_sales, names="Nazwa produktu", values="Ilość",
-                                    title="Udział paliw", hole=0.4)
+                                    title="Udział paliw", hole=0.4, template=template)
 
             # Dni wolne
             try:
@@ -932,9 +1046,10 @@ def create_dash(flask_app):
             start_date_prev = start_date_current - pd.Timedelta(days=30)
             end_date_prev = start_date_current - pd.Timedelta(days=1)
 
-            df_prev_filtered = df[
-                (df["Data"] >= start_date_prev.date()) &
-                (df["Data"] <= end_date_prev.date())
+            df_prev = current.partitions.between(start_date_prev.date(), end_date_prev.date())
+            df_prev_filtered = df_prev[
+                (df_prev["Data"] >= start_date_prev.date()) &
+                (df_prev["Data"] <= end_date_prev.date())
                 ].copy()
 
             df_prev_filtered["Grupa towarowa"] = df_prev_filtered["HOIS"].map(
@@ -970,13 +1085,14 @@ def create_dash(flask_app):
             free_days = [day for day in pd.to_datetime(merged_df["Okres"]).dt.date.unique() if
                          day.weekday() >= 5 or day in pl_holidays]
 
-            fig_pen = px.line(merged_df, x="Okres", y="Penetracja", title="Penetracja lojalnościowa (%)")
+            checkpoint("aggregate")
+            fig_pen = px.line(merged_df, x="Okres", y="Penetracja", title="Penetracja lojalnościowa (%)", template=template)
             fig_pen.update_traces(mode="lines+markers")
             fig_pen.update_layout(xaxis_tickformat="%d.%m")
             for day in free_days:
                 fig_pen.add_vline(x=day, line_dash="dot", line_color="orange", opacity=0.2)
 
-            fig_loyal = px.line(loyal_daily, x="Okres", y="Lojalnościowe", title="Transakcje lojalnościowe")
+            fig_loyal = px.line(loyal_daily, x="Okres", y="Lojalnościowe", title="Transakcje lojalnościowe", template=template)
             fig_loyal.update_traces(mode="lines+markers")
             fig_loyal.update_layout(xaxis_tickformat="%d.%m")
             for day in free_days:
@@ -987,7 +1103,7 @@ def create_dash(flask_app):
                                           var_name="Typ transakcji", value_name="Liczba")
 
             fig_combined = px.line(df_both_melted, x="Okres", y="Liczba", color="Typ transakcji",
-                                   title="Transakcje lojalnościowe vs. wszystkie")
+                                   title="Transakcje lojalnościowe vs. wszystkie", template=template)
             fig_combined.update_traces(mode="lines+markers")
             fig_combined.update_layout(
                 xaxis_tickformat="%d.%m",
@@ -1127,33 +1243,22 @@ def create_dash(flask_app):
 
             sales_total = carwash_df["Ilość"].sum()
 
-            sales_karnet = carwash_df[carwash_df["Nazwa produktu"].str.lower().str.startswith("karnet")]["Ilość"].sum()
-
-            def classify_program_all(nazwa):
-
-                nazwa = nazwa.lower()
-
-                if "standard" in nazwa:
-
-                    return "Myjnia Standard"
-
-                elif "express" in nazwa:
+            # Sumy grupowane po kodach z wymiaru produktów
+            program_totals = carwash_df.groupby("Program_kod")["Ilość"].sum()
 
-                    return "Myjnia Express"
+            program_df_all = pd.DataFrame({
 
-                else:
+                "Program": [CARWASH_PROGRAMS[code] for code in program_totals.index],
 
-                    return "Pozostałe"
+                "Ilość": program_totals.to_numpy()
 
-            carwash_df["Program"] = carwash_df["Nazwa produktu"].apply(classify_program_all)
-
-            program_sales = carwash_df.groupby("Program")["Ilość"].sum().to_dict()
+            })
 
-            carwash_df["Typ produktu"] = carwash_df["Nazwa produktu"].str.lower().apply(
+            program_sales = dict(zip(program_df_all["Program"], program_df_all["Ilość"]))
 
-                lambda x: "Karnet" if x.startswith("karnet") else "Inne"
+            karnet_totals = carwash_df.groupby(has_tag(carwash_df, TAG_KARNET))["Ilość"].sum()
 
-            )
+            sales_karnet = karnet_totals.get(True, 0)
 
             all_tx = dff["#"].nunique()
 
@@ -1173,9 +1278,10 @@ def create_dash(flask_app):
 
                 "Ilość"].sum().reset_index()
 
+            checkpoint("aggregate")
             fig_carwash = px.line(carwash_grouped, x="Okres", y="Ilość", color=category_col,
 
-                                  title="Sprzedaż usług myjni", markers=True)
+                                  title="Sprzedaż usług myjni", markers=True, template=template)
 
             sales_grouped = carwash_df.groupby(["Okres"] + ([category_col] if category_col else []))[
 
@@ -1183,18 +1289,22 @@ def create_dash(flask_app):
 
             fig_sales = px.line(sales_grouped, x="Okres", y="Netto", color=category_col,
 
-                                title="Sprzedaż netto grupy Myjnia", markers=True)
+                                title="Sprzedaż netto grupy Myjnia", markers=True, template=template)
 
-            pie_df = carwash_df.groupby("Typ produktu")["Ilość"].sum().reset_index()
+            pie_df = pd.DataFrame({
+
+                "Typ produktu": ["Karnet" if code else "Inne" for code in karnet_totals.index],
+
+                "Ilość": karnet_totals.to_numpy()
+
+            })
 
             fig_karnet = px.pie(pie_df, values="Ilość", names="Typ produktu",
 
-                                title="Udział karnetów w sprzedaży MYJNIA INNE", hole=0.4)
+                                title="Udział karnetów w sprzedaży MYJNIA INNE", hole=0.4, template=template)
 
             fig_karnet.update_traces(textposition='inside', textinfo='percent+label')
 
-            program_df_all = carwash_df.groupby("Program")["Ilość"].sum().reset_index()
-
             fig_program_all = px.pie(
 
                 program_df_all,
@@ -1205,7 +1315,9 @@ def create_dash(flask_app):
 
                 title="Udział programów Standard i Express w sprzedaży MYJNIA INNE",
 
-                hole=0.4
+                hole=0.4,
+
+                template=template
 
             )
 
@@ -1259,7 +1371,6 @@ def create_dash(flask_app):
 
 
         elif tab == 'tab6':
-            favorites = app.server.config.get('FAVORITES', set())
             if not favorites:
                 return html.Div(children=[
                     html.H3("Ulubione"),
@@ -1299,10 +1410,11 @@ def create_dash(flask_app):
             kasjer_summary = kasjer_summary.sort_values("Obrót netto", ascending=False)
 
             top10 = kasjer_summary.head(10)
-            fig_kasjer = px.bar(top10, x="Kasjer", y="Obrót netto", title="TOP 10 kasjerów wg obrotu netto")
-            fig_trans = px.bar(top10, x="Kasjer", y="Liczba transakcji", title="TOP 10 kasjerów wg liczby transakcji")
+            checkpoint("aggregate")
+            fig_kasjer = px.bar(top10, x="Kasjer", y="Obrót netto", title="TOP 10 kasjerów wg obrotu netto", template=template)
+            fig_trans = px.bar(top10, x="Kasjer", y="Liczba transakcji", title="TOP 10 kasjerów wg liczby transakcji", template=template)
             fig_avg = px.bar(top10, x="Kasjer", y="Średnia wartość transakcji",
-                            title="TOP 10 kasjerów wg średniej wartości transakcji")
+                            title="TOP 10 kasjerów wg średniej wartości transakcji", template=template)
 
             df_loyal = dff[dff["Karta lojalnościowa"].str.upper() == "TAK"].copy()
             df_all = dff.copy()
@@ -1322,7 +1434,8 @@ def create_dash(flask_app):
                 x="Kasjer",
                 y="Penetracja",
                 title="Penetracja lojalnościowa per kasjer (%)",
-                text_auto=".1f"
+                text_auto=".1f",
+                template=template
             )
             fig_penetracja.update_layout(yaxis_title="%", xaxis_title="Kasjer")
             # Sekcja layout
@@ -1399,20 +1512,22 @@ def create_dash(flask_app):
         Output("top-products-graph", "figure"),
         Output("top-products-per-tx-graph", "figure"),
         Input("top-month-dropdown", "value"),
-        Input('start-date', 'date'),
-        Input('end-date', 'date'),
-
-        State('station-dropdown', 'value'),
-        State('group-dropdown', 'value'),
-        Input("theme-store", "data")
+        Input('filter-state', 'data'),
+        Input("theme-store", "data"),
+        State('client-id', 'data')
     )
-    def update_top_products_graphs(selected_month, start_date, end_date, selected_stations, selected_groups, theme_data):
+    @cancellable('top-products-graphs')
+    def update_top_products_graphs(selected_month, filter_state, theme_data, client_id):
+        start_date, end_date = filter_state['start_date'], filter_state['end_date']
+        selected_stations, selected_groups = filter_state['stations'], filter_state['groups']
         theme = theme_data.get("theme", "light")
-        pio.templates.default = "corporate_dark" if theme == "dark" else "corporate_blue"
+        template = theme_template(theme)
         try:
             # Szybko: użycie cache zamiast ponownego wczytywania
-            df_all = df_cached.copy()
-            hois_map = hois_cached.copy()
+            current = engine.current
+            df_all = current.partitions.between(pd.to_datetime(start_date).date(),
+                                                pd.to_datetime(end_date).date()).copy()
+            hois_map = current.data.hois_map.copy()
 
             df_all["Grupa towarowa"] = df_all["HOIS"].map(lambda x: hois_map.get(x, ("Nieznana", "Nieznana"))[0])
             df_all["Data"] = pd.to_datetime(df_all["Data"])
@@ -1425,6 +1540,7 @@ def create_dash(flask_app):
                 (df_all["Stacja"].isin(selected_stations)) &
                 (df_all["Grupa towarowa"].isin(selected_groups))
             ].copy()
+            record_rows(len(df_all), len(df_filtered))
 
             # Przygotowanie danych
             df_filtered["Kasjer"] = df_filtered["Stacja"].astype(str) + " - " + df_filtered["Login POS"].astype(str)
@@ -1463,7 +1579,8 @@ def create_dash(flask_app):
                 y="Ilość",
                 color="PLU_nazwa",
                 title=f"Sprzedaż sztukowa top produktów ({selected_month})",
-                text_auto=".2s"
+                text_auto=".2s",
+                template=template
             )
             fig1.update_layout(barmode="stack", xaxis_tickangle=-45)
 
@@ -1478,11 +1595,12 @@ def create_dash(flask_app):
                 y="Sztuki na transakcję",
                 color="PLU_nazwa",
                 title=f"Średnia liczba sprzedanych top produktów na transakcję ({selected_month})",
-                text_auto=".2f"
+                text_auto=".2f",
+                template=template
             )
             fig2.update_layout(barmode="stack", xaxis_tickangle=-45)
 
-            return fig1, fig2
+            return compact_figure(fig1), compact_figure(fig2)
 
         except Exception as e:
             print(f"Błąd w callbacku top produktów: {e}")
@@ -1495,70 +1613,45 @@ def create_dash(flask_app):
     @app.callback(
         Output('heatmap-graph', 'figure'),
         Input('metric-selector', 'value'),
-        Input('start-date', 'date'),
-        Input('end-date', 'date'),
-
-        Input('station-dropdown', 'value'),
-        Input('group-dropdown', 'value'),
+        Input('filter-state', 'data'),
         Input("theme-store", "data"),
-        Input('product-dropdown', 'value'),
-        Input('b2b-checklist', 'value')
-
-        
+        State('client-id', 'data'),
+        **background_options(background_manager, ignore=[3])
     )
-    def update_heatmap(metric, start_date, end_date, selected_stations, selected_groups,theme_data, selected_products, selected_b2b):
+    @in_background(background_manager)
+    @cancellable('heatmap')
+    def update_heatmap(metric, filter_state, theme_data, client_id):
+        current = engine.current
+        return flights.do(flight_key('heatmap', current.version, metric, filter_state, theme_data),
+                          lambda: build_heatmap(metric, filter_state, theme_data, current))
+
+    def build_heatmap(metric, filter_state, theme_data, current=None):
+        if current is None:
+            current = engine.current
+        selected_stations, selected_groups = filter_state['stations'], filter_state['groups']
+        selected_products, selected_b2b = filter_state['products'], filter_state['b2b']
         theme = theme_data.get("theme", "light")
-        pio.templates.default = "corporate_dark" if theme == "dark" else "corporate_blue"
-        start_date_obj = pd.to_datetime(start_date).date()
-        end_date_obj = pd.to_datetime(end_date).date()
-        dff = df[(df["Data"] >= start_date_obj) &
-                 (df["Data"] <= end_date_obj) &
-                 (df["Stacja"].isin(selected_stations)) &
-                 (df["B2B"].isin(selected_b2b)) &
-                 (df["Grupa towarowa"].isin(selected_groups))].copy()
-        
-        dff = dff[dff["Login POS"] != 99999].copy()
-        if selected_products:
-            dff = dff[dff["PLU_nazwa"].isin(selected_products)]
-
-
-        dff["Godzina"] = pd.to_datetime(dff["Data_full"], errors="coerce").dt.hour
-        dff["Dzień tygodnia"] = pd.to_datetime(dff["Data_full"], errors="coerce").dt.dayofweek
-
-        dni = ["Pon", "Wt", "Śr", "Czw", "Pt", "Sob", "Nd"]
-        godziny = list(range(24))
-        full_index = pd.MultiIndex.from_product([range(7), godziny], names=["Dzień tygodnia", "Godzina"])
-
-        if metric == "tx":
-            grouped = dff.groupby(["Dzień tygodnia", "Godzina"])["#"].nunique()
-        elif metric == "netto":
-            grouped = dff.groupby(["Dzień tygodnia", "Godzina"])["Netto"].sum()
-        elif metric == "ilosc":
-            grouped = dff.groupby(["Dzień tygodnia", "Godzina"])["Ilość"].sum()
-        elif metric == "paliwo":
-            grouped = dff[dff["HOIS"] == 0].groupby(["Dzień tygodnia", "Godzina"])["#"].nunique()
-        elif metric == "lojalnosc":
-            all_tx = dff.groupby(["Dzień tygodnia", "Godzina"])["#"].nunique().rename("Wszystkie")
-            loyal_tx = dff[dff["Karta lojalnościowa"].str.upper() == "TAK"].groupby(["Dzień tygodnia", "Godzina"])[
-                "#"].nunique().rename("Lojalnościowe")
-            merged = pd.merge(all_tx, loyal_tx, left_index=True, right_index=True, how="left").fillna(0)
-            grouped = (merged["Lojalnościowe"] / merged["Wszystkie"] * 100).rename("Penetracja")
-        else:
-            grouped = pd.Series(dtype=float)
-
-        grouped = grouped.reindex(full_index, fill_value=0).reset_index(name="Wartość")
-        heat_pivot = grouped.pivot(index="Dzień tygodnia", columns="Godzina", values="Wartość")
-        heat_pivot.index = [dni[i] for i in heat_pivot.index]
+        template = theme_template(theme)
+        start_date_obj = pd.to_datetime(filter_state['start_date']).date()
+        end_date_obj = pd.to_datetime(filter_state['end_date']).date()
+        df = current.partitions.between(start_date_obj, end_date_obj)
+        dff = filter_sales(df, start_date_obj, end_date_obj, selected_stations, selected_groups,
+                           selected_b2b, selected_products)
+        record_rows(len(df), len(dff))
+        checkpoint("filter")
+        heat_pivot = heatmap_grid(dff, metric)
+        checkpoint("aggregate")
 
         color_scale = "Blues" if theme != "dark" else "Blues_r"
 
         fig = px.imshow(
             heat_pivot,
             labels=dict(x="Godzina", y="Dzień tygodnia", color=metric),
-            x=[str(g) for g in godziny],
+            x=[str(g) for g in HOURS],
             aspect="auto",
             color_continuous_scale=color_scale,
-            title=f"📊 Heatmapa – {metric}"
+            title=f"📊 Heatmapa – {metric}",
+            template=template
         )
 
         fig.update_layout(
@@ -1568,38 +1661,42 @@ def create_dash(flask_app):
             xaxis=dict(type="category", tickmode="linear")
         )
 
-        return fig
+        checkpoint("figure")
+        return compact_figure(fig)
 
     # ---------------------------------------------
     # Callback do usuwania wykresów z ulubionych
     # ---------------------------------------------
     @app.callback(
-        Output('tabs-content', 'children', allow_duplicate=True),
+        Output('favorites-store', 'data'),
         Input({'type': 'remove-favorite', 'index': dash.ALL}, 'n_clicks'),
-        Input('start-date', 'date'),
-        Input('end-date', 'date'),
-
-        State('station-dropdown', 'value'),
-        State('group-dropdown', 'value'),
-        State('monthly-check', 'value'),
+        State('favorites-store', 'data'),
         prevent_initial_call=True
     )
-    def remove_favorite(n_clicks, start_date, end_date, selected_stations, selected_groups, monthly_check):
+    def remove_favorite(n_clicks, favorites):
+        # Zmiana store'a odświeża zakładkę przez render_tab_content
         ctx = dash.callback_context
         if not ctx.triggered or not any(n_clicks):
             return dash.no_update
 
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        fav_key = eval(button_id)['index']
-
-        favorites = app.server.config.get('FAVORITES', set())
-        if fav_key in favorites:
-            favorites.remove(fav_key)
-            app.server.config['FAVORITES'] = favorites
-
-        return render_tab_content('tab6', start_date, end_date, selected_stations, selected_groups, monthly_check)
+        fav_key = ctx.triggered_id['index']
+        favorites = favorites or []
+        if fav_key not in favorites:
+            return dash.no_update
+        return [fav for fav in favorites if fav != fav_key]
 
-    @app.callback(
+    app.clientside_callback(
+        """
+        function(nClicks, currentClass) {
+            const resize = {value: Math.random()};  // wyzwalacz dla clientside resize
+            if ((currentClass || '').includes('hidden')) {
+                // filtr znowu widoczny, normalna szerokość wykresów
+                return ['', 'responsive-filter', 'responsive-content', resize];
+            }
+            // chowamy panel, wykresy na całą szerokość
+            return ['hidden', 'responsive-filter hidden', 'responsive-content expanded', resize];
+        }
+        """,
         Output("filter-panel", "className"),
         Output("filter-column", "className"),
         Output("content-column", "className"),
@@ -1608,33 +1705,19 @@ def create_dash(flask_app):
         State("filter-panel", "className"),
         prevent_initial_call=True
     )
-    def toggle_filter_panel(n_clicks, current_class):
-        filters_hidden = "hidden" in current_class
-
-        if filters_hidden:
-            return (
-                "",  # filtr znowu widoczny
-                "responsive-filter",
-                "responsive-content",  # normalna szerokość wykresów
-                {"value": random()}  # wyzwalacz dla clientside resize
-            )
-        else:
-            return (
-                "hidden",  # chowamy panel
-                "responsive-filter hidden",
-                "responsive-content expanded",  # wykresy na całą szerokość
-                {"value": random()}  # wyzwalacz dla clientside resize
-            )
     #przełączanie trybu jasny/ciemny
-    @app.callback(
+    app.clientside_callback(
+    """
+    function(n, currentTheme) {
+        const theme = (currentTheme && currentTheme.theme) || 'light';
+        return {theme: theme === 'light' ? 'dark' : 'light'};
+    }
+    """,
     Output('theme-store', 'data'),
     Input('theme-toggle-button', 'n_clicks'),
-    Input('theme-store', 'data'),
+    State('theme-store', 'data'),
     prevent_initial_call=True
 )
-    def toggle_theme(n, current_theme):
-        new_theme = 'dark' if current_theme.get('theme') == 'light' else 'light'
-        return {'theme': new_theme}
     
     app.clientside_callback(
     """
@@ -1673,11 +1756,36 @@ def create_dash(flask_app):
         Output("theme-toggle-button", "n_clicks"),  # dummy output
         Input("trigger-graph-resize", "data")
     )
-    
-
-    
 
+    # ---------------------------------------------
+    # Rozgrzewanie cache wyników po wczytaniu danych
+    # ---------------------------------------------
+    # Domyślny zakres (poprzedni miesiąc) dla każdej zakładki i heatmapa z pierwszej zakładki,
+    # potem najczęściej otwierane widoki z poprzednich uruchomień
+    warm_views = {
+        'tabs-content': WarmView('tabs-content.children', render_tab_content,
+                                 lambda tab, filter_state, theme_data, favorites, client_id:
+                                 compute_tab_content(tab, filter_state, theme_data, favorites), [4]),
+        'heatmap': WarmView('heatmap-graph.figure', update_heatmap,
+                            lambda metric, filter_state, theme_data, client_id:
+                            build_heatmap(metric, filter_state, theme_data), [3]),
+    }
+    default_theme = {'theme': 'light'}
 
+    def warm_defaults(current):
+        initial_filters = default_filters(current)
+        defaults = [('tabs-content', [tab, initial_filters, default_theme, [], None])
+                    for tab in ['tab1', 'tab2', 'tab3', 'tab4', 'tab5', 'tab6', 'tab7']]
+        defaults.append(('heatmap', ['tx', initial_filters, default_theme, None]))
+        return defaults
+    create_warmup(app, background_manager, warm_views, warm_defaults(current))
 
+    # ---------------------------------------------
+    # Przeładowanie danych bez restartu (panel administratora albo zmiana plików)
+    # ---------------------------------------------
+    # Benchmarki podają dane wprost – nie ma czego obserwować
+    if data is None:
+        create_reloader(engine, functools.partial(load_engine, compact=shared is not None), watched_files(),
+                        lambda current: rewarm(background_manager, warm_views, warm_defaults(current)))
 
     return app
@@ -0,0 +1,49 @@
+// Filtry: zmiany trafiają najpierw do 'pending-filters', a do 'filter-state' (od którego zależą
+// wykresy) dopiero po kliknięciu "Zastosuj" albo po debounce w trybie automatycznym.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    filters: {
+        fields: ['start_date', 'end_date', 'stations', 'groups', 'b2b', 'monthly', 'products'],
+
+        same: function(a, b) {
+            const fields = window.dash_clientside.filters.fields;
+            return JSON.stringify(fields.map(f => (a || {})[f] ?? null)) ===
+                JSON.stringify(fields.map(f => (b || {})[f] ?? null));
+        },
+
+        collect: function(startDate, endDate, stations, groups, b2b, monthly, products, autoApply, config) {
+            if ((autoApply || []).includes('auto')) {
+                clearTimeout(window._filterDebounce);
+                window._filterDebounce = setTimeout(function() {
+                    window.dash_clientside.set_props('filter-debounce', {data: Date.now()});
+                }, (config && config.debounce_ms) || 0);
+            }
+            return {
+                start_date: startDate, end_date: endDate, stations: stations, groups: groups,
+                b2b: b2b, monthly: monthly, products: products
+            };
+        },
+
+        clientId: function() {
+            return window.crypto && window.crypto.randomUUID ? window.crypto.randomUUID()
+                : String(Date.now()) + Math.random().toString(16).slice(2);
+        },
+
+        commit: function(nClicks, debounced, autoApply, pending, committed, clientId) {
+            const triggered = window.dash_clientside.callback_context.triggered.map(t => t.prop_id);
+            const auto = (autoApply || []).includes('auto');
+            if (!triggered.includes('apply-filters-button.n_clicks') && !auto) {
+                return window.dash_clientside.no_update;
+            }
+            if (!pending || window.dash_clientside.filters.same(pending, committed)) {
+                return window.dash_clientside.no_update;
+            }
+            // Identyfikator karty przeglądarki – serwer porzuca obliczenia dla starszych rewizji
+            const client = clientId || (committed && committed.client) || window.dash_clientside.filters.clientId();
+            return Object.assign({}, pending, {rev: ((committed && committed.rev) || 0) + 1, client: client});
+        },
+
+        unchanged: function(pending, committed) {
+            return window.dash_clientside.filters.same(pending, committed);
+        }
+    }
+});
@@ -0,0 +1,237 @@
+import contextvars
+import functools
+import logging
+import os
+import time
+
+from main.instrumentation import record_cache, begin_trace, end_trace
+from main.slowlog import context_body, record_slow
+from monitoring import metrics
+
+try:
+    import diskcache
+    from dash import DiskcacheManager
+    import multiprocess  # noqa: F401 – wymagane przez DiskcacheManager
+    import psutil  # noqa: F401
+except ImportError:
+    diskcache = None
+    DiskcacheManager = object
+
+logger = logging.getLogger(__name__)
+
+# Ciężkie callbacki liczone w osobnym procesie – żądanie HTTP kończy się od razu,
+# przeglądarka odpytuje o postęp i wynik, więc timeout workera gunicorna nie ma znaczenia
+BACKGROUND_CALLBACKS = os.environ.get("BACKGROUND_CALLBACKS", "True") == "True"
+BACKGROUND_CACHE_DIR = os.environ.get("BACKGROUND_CACHE_DIR", "cache/background")
+BACKGROUND_CACHE_SIZE = int(os.environ.get("BACKGROUND_CACHE_SIZE", 512 * 1024 * 1024))
+# Jak długo wynik dla danego stanu filtrów zostaje w cache od ostatniego odczytu (s)
+BACKGROUND_RESULT_TTL = int(os.environ.get("BACKGROUND_RESULT_TTL", 1800))
+BACKGROUND_JOB_TTL = int(os.environ.get("BACKGROUND_JOB_TTL", 600))
+BACKGROUND_POLL_MS = int(os.environ.get("BACKGROUND_POLL_MS", 500))
+
+# Postęp raportowany z checkpoint() – procent i opis etapu
+PROGRESS_STAGES = {
+    "start": (5, "Start obliczeń"),
+    "filter": (30, "Filtrowanie danych"),
+    "aggregate": (60, "Agregacja"),
+    "figure": (90, "Budowanie wykresów"),
+}
+
+# Job o numerze 0 oznacza wynik podany prosto z cache, bez procesu
+CACHED_JOB = 0
+
+background_jobs = metrics.counter("background_jobs_total", "Zlecenia ciężkich callbacków wg sposobu obsługi")
+
+# (manager, set_progress) bieżącego zadania w procesie w tle
+_job = contextvars.ContextVar("background_job", default=None)
+
+
+def filter_key(filter_state):
+    # Stan filtrów bez rewizji i identyfikatora karty – ten sam widok dla wszystkich użytkowników
+    if not isinstance(filter_state, dict):
+        return filter_state
+    return {k: filter_state[k] for k in sorted(filter_state) if k not in ("rev", "client")}
+
+
+class SharedJobManager(DiskcacheManager):
+    # DiskcacheManager, w którym drugie żądanie o ten sam klucz dołącza do trwającego procesu
+    # zamiast uruchamiać kolejny, a gotowy wynik jest zwracany bez procesu
+
+    def build_cache_key(self, fn, args, cache_args_to_ignore, triggered):
+        if isinstance(args, dict):
+            args = {k: filter_key(v) for k, v in args.items()}
+        else:
+            args = [filter_key(arg) for arg in args]
+        return super().build_cache_key(fn, args, cache_args_to_ignore, triggered)
+
+    @staticmethod
+    def _job_key(key):
+        return f"{key}-job"
+
+    @staticmethod
+    def _refs_key(job):
+        return f"job-{job}-refs"
+
+    @staticmethod
+    def _shared_key(job):
+        return f"job-{job}-shared"
+
+    def _join(self, job):
+        self.handle.incr(self._refs_key(job), default=0)
+        self.handle.touch(self._refs_key(job), expire=BACKGROUND_JOB_TTL)
+        # Flaga zostaje do końca zadania, nawet gdy dołączona karta później zrezygnuje
+        self.handle.set(self._shared_key(job), True, expire=BACKGROUND_JOB_TTL)
+        return job
+
+    def call_job_fn(self, key, job_fn, args, context):
+        if self.result_ready(key):
+            background_jobs.inc(state="cached")
+            record_cache("background", hit=True)
+            return CACHED_JOB
+
+        job_key = self._job_key(key)
+        for _ in range(2):
+            # add() jest atomowe – tylko jedno żądanie (z dowolnego workera) uruchamia proces
+            if self.handle.add(job_key, CACHED_JOB, expire=BACKGROUND_JOB_TTL):
+                job = super().call_job_fn(key, job_fn, args, context)
+                self.handle.set(job_key, job, expire=BACKGROUND_JOB_TTL)
+                self.handle.set(self._refs_key(job), 1, expire=BACKGROUND_JOB_TTL)
+                background_jobs.inc(state="started")
+                record_cache("background", hit=False)
+                return job
+
+            job = self._wait_for_job(job_key)
+            if self.result_ready(key):
+                background_jobs.inc(state="cached")
+                record_cache("background", hit=True)
+                return CACHED_JOB
+            if job and self.job_running(job):
+                background_jobs.inc(state="joined")
+                record_cache("background", hit=True)
+                return self._join(job)
+            # Proces zakończył się bez wyniku (przerwany) – zaczynamy od nowa
+            self.handle.delete(job_key)
+        return super().call_job_fn(key, job_fn, args, context)
+
+    def _wait_for_job(self, job_key, timeout=2.0):
+        # Inne żądanie właśnie uruchamia proces – czekamy na jego pid
+        deadline = time.monotonic() + timeout
+        job = self.handle.get(job_key)
+        while job == CACHED_JOB and time.monotonic() < deadline:
+            time.sleep(0.05)
+            job = self.handle.get(job_key)
+        return job
+
+    def job_shared(self, job):
+        return bool(self.handle.get(self._shared_key(job)))
+
+    def terminate_job(self, job):
+        if job is None or not int(job):
+            return
+        job = int(job)
+        refs_key = self._refs_key(job)
+        # Przerwanie przez jedną kartę (oldJob) nie zabija obliczeń, na które czekają inne
+        if self.handle.get(refs_key) is not None and self.handle.decr(refs_key, default=1) > 0:
+            return
+        self.handle.delete(refs_key)
+        self.handle.delete(self._shared_key(job))
+        super().terminate_job(job)
+
+    def job_running(self, job):
+        if job is None or not int(job):
+            return False
+        return super().job_running(job)
+
+    def get_progress(self, key):
+        # Postęp zostaje w cache do końca zadania – widzą go wszystkie dołączone żądania
+        return self.handle.get(self._make_progress_key(key))
+
+    def get_result(self, key, job):
+        result = self.handle.get(key, self.UNDEFINED)
+        if result is self.UNDEFINED:
+            return result
+        self.clear_cache_entry(self._job_key(key))
+        if isinstance(result, dict) and ("_dash_no_update" in result or "background_callback_error" in result):
+            # Przerwane albo błędne obliczenia nie mogą zostać w cache wyników
+            self.clear_cache_entry(key)
+            self.clear_cache_entry(self._make_progress_key(key))
+            self.terminate_job(job)
+            return result
+        return super().get_result(key, job)
+
+
+def create_background_manager(data_version):
+    if not BACKGROUND_CALLBACKS:
+        return None
+    if diskcache is None:
+        logger.warning("Brak diskcache/multiprocess/psutil – ciężkie callbacki liczone w żądaniu HTTP")
+        return None
+    cache = diskcache.Cache(BACKGROUND_CACHE_DIR, size_limit=BACKGROUND_CACHE_SIZE)
+    # Wersja danych w kluczu – po przeładowaniu danych stare wyniki przestają pasować
+    return SharedJobManager(cache, cache_by=[data_version], expire=BACKGROUND_RESULT_TTL)
+
+
+def background_options(manager, progress=None, running=None, ignore=None):
+    # Argumenty @app.callback; bez managera callback działa synchronicznie
+    if manager is None:
+        return {}
+    options = {"background": True, "interval": BACKGROUND_POLL_MS, "cache_args_to_ignore": ignore or []}
+    if progress:
+        options["progress"] = progress
+        options["progress_default"] = [0, ""]
+    if running:
+        options["running"] = running
+    return options
+
+
+def in_background(manager, progress=False):
+    # Dash przekazuje set_progress jako pierwszy argument – callback dostaje go przez report_progress()
+    def decorator(function):
+        if manager is None:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            set_progress = None
+            if progress:
+                set_progress, args = args[0], args[1:]
+            reset = _job.set((manager, set_progress))
+            # Pomiar etapów w procesie w tle – metryki zostają w procesie zadania, wolne wywołania idą do Redisa
+            trace, reset_trace = begin_trace(context_body())
+            try:
+                report_progress("start")
+                return function(*args, **kwargs)
+            finally:
+                trace.returned = time.perf_counter()
+                end_trace(reset_trace)
+                _job.reset(reset)
+                stages = trace.finish(trace.returned)
+                stages.pop("serialize", None)
+                try:
+                    record_slow(trace, stages, manager.cache_by[0](), background=True)
+                except Exception as e:
+                    logger.warning("Nie udało się zapisać wolnego zadania %s: %s", trace.name, e)
+        return wrapper
+    return decorator
+
+
+def report_progress(stage):
+    job = _job.get()
+    if job is None or job[1] is None:
+        return
+    value, label = PROGRESS_STAGES.get(stage, (None, stage))
+    try:
+        job[1]([value, label])
+    except Exception as e:
+        logger.warning("Nie udało się zapisać postępu: %s", e)
+
+
+def job_shared():
+    # Na wynik tego procesu czeka więcej niż jedna karta – nie porzucamy go przy zmianie filtrów jednej z nich
+    job = _job.get()
+    if job is None:
+        return False
+    try:
+        return job[0].job_shared(os.getpid())
+    except Exception:
+        return False
@@ -0,0 +1,154 @@
+import base64
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from dash import dcc
+
+from main.instrumentation import PAYLOAD_BUCKETS, current_trace
+from monitoring import metrics
+
+# Maksymalna liczba punktów serii liniowej wysyłanej do przeglądarki
+FIGURE_POINT_BUDGET = int(os.environ.get("FIGURE_POINT_BUDGET", 2000))
+FIGURE_PAYLOAD_REPORT = os.environ.get("FIGURE_PAYLOAD_REPORT", "False") == "True"
+
+figure_payload = metrics.histogram("figure_payload_bytes", "Rozmiar wykresu przed i po kompresji (FIGURE_PAYLOAD_REPORT)",
+                                   PAYLOAD_BUCKETS)
+
+NUMERIC_ARRAY_KEYS = ["x", "y", "z", "values"]
+PER_POINT_KEYS = ["customdata", "text", "hovertext", "ids"]
+TYPED_ARRAY_DTYPES = {"int8": "i1", "int16": "i2", "int32": "i4", "float64": "f8"}
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: zwraca indeksy punktów zachowujących kształt serii
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(np.floor(i * bucket_size)) + 1
+        end = int(np.floor((i + 1) * bucket_size)) + 1
+        next_start, next_end = end, min(int(np.floor((i + 2) * bucket_size)) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _numeric_axis(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype("float64")
+    try:
+        return pd.to_datetime(values).asi8.astype("float64")
+    except (TypeError, ValueError):
+        # Oś kategorii – liczy się tylko kolejność punktów
+        return np.arange(len(values), dtype="float64")
+
+
+def downsample_trace(trace, point_budget):
+    if trace.type not in ("scatter", "scattergl") or trace.x is None or trace.y is None:
+        return False
+    if len(trace.y) <= point_budget or len(trace.x) != len(trace.y):
+        return False
+    marker = trace.marker
+    if marker is not None and any(isinstance(getattr(marker, key), (tuple, list, np.ndarray))
+                                  for key in ("color", "size", "symbol")):
+        return False
+    y = np.asarray(trace.y, dtype="float64")
+    if np.isnan(y).any():
+        return False
+    x_values = np.asarray(trace.x)
+    idx = lttb(_numeric_axis(x_values), y, point_budget)
+    updates = {"x": x_values[idx], "y": y[idx]}
+    for key in PER_POINT_KEYS:
+        values = trace[key]
+        if isinstance(values, (tuple, list, np.ndarray)) and len(values) == len(y):
+            updates[key] = np.asarray(values)[idx]
+    trace.update(updates)
+    return True
+
+
+def typed_array(values):
+    # Format typed array plotly.js: {"dtype": ..., "bdata": base64}
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.integer):
+        for dtype in ("int8", "int16", "int32"):
+            info = np.iinfo(dtype)
+            if values.min() >= info.min and values.max() <= info.max:
+                values = values.astype(dtype)
+                break
+        else:
+            values = values.astype("float64")
+    else:
+        values = values.astype("float64")
+    return {"dtype": TYPED_ARRAY_DTYPES[values.dtype.name],
+            "bdata": base64.b64encode(np.ascontiguousarray(values).tobytes()).decode("ascii")}
+
+
+def to_typed_arrays(trace_json):
+    # Liczbowe listy zamieniamy na typed arrays (base64) zamiast tekstowego JSON-a
+    for key in NUMERIC_ARRAY_KEYS:
+        values = trace_json.get(key)
+        if isinstance(values, np.ndarray) and values.ndim == 1 and values.size and \
+                np.issubdtype(values.dtype, np.number):
+            trace_json[key] = typed_array(values)
+        elif isinstance(values, (tuple, list)) and values and \
+                all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in values):
+            trace_json[key] = typed_array(values)
+    return trace_json
+
+
+def strip_template(figure_json):
+    # Z szablonu zostają tylko ustawienia typów śladów obecnych na wykresie
+    template = figure_json.get("layout", {}).get("template")
+    if not template or "data" not in template:
+        return figure_json
+    used_types = {trace.get("type", "scatter") for trace in figure_json.get("data", [])}
+    template["data"] = {key: value for key, value in template["data"].items() if key in used_types}
+    if not template["data"]:
+        del template["data"]
+    return figure_json
+
+
+def figure_payload_bytes(figure):
+    return len(pio.json.to_json_plotly(figure))
+
+
+def compact_figure(figure, point_budget=FIGURE_POINT_BUDGET):
+    if figure is None or isinstance(figure, dict):
+        return figure
+    payload_before = figure_payload_bytes(figure) if FIGURE_PAYLOAD_REPORT else None
+    for trace in figure.data:
+        downsample_trace(trace, point_budget)
+    figure_json = figure.to_plotly_json()
+    for trace_json in figure_json.get("data", []):
+        to_typed_arrays(trace_json)
+    strip_template(figure_json)
+    if FIGURE_PAYLOAD_REPORT:
+        # Rozmiar przed i po kompresji wykresu w /admin/metrics, obok callback_payload_bytes
+        trace = current_trace()
+        callback = trace.name if trace is not None else "unknown"
+        figure_payload.observe(payload_before, callback=callback, stage="before")
+        figure_payload.observe(figure_payload_bytes(figure_json), callback=callback, stage="after")
+    return figure_json
+
+
+def compact_components(component, point_budget=FIGURE_POINT_BUDGET):
+    # Post-processing drzewa komponentów zwracanego przez callback
+    if component is None or not hasattr(component, "_traverse"):
+        return component
+    graphs = [component] if isinstance(component, dcc.Graph) else []
+    graphs.extend(child for child in component._traverse() if isinstance(child, dcc.Graph))
+    for graph in graphs:
+        if isinstance(getattr(graph, "figure", None), go.Figure):
+            graph.figure = compact_figure(graph.figure, point_budget)
+    return component
@@ -0,0 +1,169 @@
+import contextvars
+import functools
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import dash
+from dash.exceptions import PreventUpdate
+
+from main.background import job_shared, report_progress
+from main.instrumentation import mark_stage
+from main.singleflight import flight_shared
+from monitoring import metrics
+from redis_client.redis_client import redis, redis_available
+
+logger = logging.getLogger(__name__)
+
+GENERATION_TTL = int(os.environ.get("GENERATION_TTL", 600))
+GENERATION_LOCAL_SIZE = int(os.environ.get("GENERATION_LOCAL_SIZE", 10000))
+
+# Zapis tylko wtedy, gdy generacja jest nowsza – wspólny dla wszystkich workerów
+_ADVANCE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+local generation = tonumber(ARGV[1])
+if generation > current then
+    redis.call('SET', KEYS[1], generation, 'EX', ARGV[2])
+    return generation
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return current
+"""
+
+stale_callbacks = metrics.counter("callback_stale_total", "Obliczenia callbacków porzucone jako nieaktualne")
+
+# Generacja bieżącego wywołania callbacku (ustawiana przez @cancellable)
+_active = contextvars.ContextVar("active_generation", default=None)
+
+
+class StaleGeneration(PreventUpdate):
+    # Wynik i tak zostałby odrzucony przez przeglądarkę – Dash odpowiada 204
+    pass
+
+
+class GenerationRegistry:
+
+    def __init__(self, prefix="gen", ttl=GENERATION_TTL, maxsize=GENERATION_LOCAL_SIZE):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._script = None
+
+    def _store_local(self, scope, generation):
+        # Wywoływane pod self._lock
+        self._local[scope] = generation
+        self._local.move_to_end(scope)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+        return generation
+
+    def _advance_local(self, scope, generation):
+        with self._lock:
+            return self._store_local(scope, max(self._local.get(scope, -1), generation))
+
+    def advance(self, scope, generation):
+        # Zwraca najnowszą znaną generację dla danego zakresu
+        latest = self._advance_local(scope, generation)
+        if redis_available():
+            try:
+                if self._script is None:
+                    self._script = redis.register_script(_ADVANCE_SCRIPT)
+                latest = max(latest, int(self._script(keys=[f"{self.prefix}:{scope}"], args=[generation, self.ttl])))
+                self._advance_local(scope, latest)
+            except Exception as e:
+                logger.warning("Rejestr generacji bez Redisa: %s", e)
+        return latest
+
+    def next(self, scope):
+        # Nowy token dla żądania – każde kolejne żądanie w tym zakresie unieważnia poprzednie
+        if redis_available():
+            try:
+                key = f"{self.prefix}:{scope}"
+                pipe = redis.pipeline()
+                pipe.incr(key)
+                pipe.expire(key, self.ttl)
+                token = int(pipe.execute()[0])
+                self._advance_local(scope, token)
+                return token
+            except Exception as e:
+                logger.warning("Rejestr generacji bez Redisa: %s", e)
+        # Odczyt i zapis pod jedną blokadą – równoczesne żądania dostają różne tokeny
+        with self._lock:
+            return self._store_local(scope, self._local.get(scope, 0) + 1)
+
+    def latest(self, scope):
+        with self._lock:
+            latest = self._local.get(scope, -1)
+        if redis_available():
+            try:
+                value = redis.get(f"{self.prefix}:{scope}")
+                if value is not None:
+                    latest = max(latest, int(value))
+            except Exception as e:
+                logger.warning("Rejestr generacji bez Redisa: %s", e)
+        return latest
+
+    def is_current(self, scope, generation):
+        return generation >= self.latest(scope)
+
+
+filter_generations = GenerationRegistry(prefix="filter-gen")
+callback_generations = GenerationRegistry(prefix="callback-gen")
+
+
+def _callback_context():
+    try:
+        ctx = dash.callback_context
+        return ctx.states, ctx.inputs
+    except Exception:
+        # Wywołanie poza żądaniem Dash (benchmarki, testy ręczne)
+        return {}, {}
+
+
+def cancellable(name):
+    # Callback dostaje token generacji: nowsze wywołanie tego samego callbacku w tej samej karcie
+    # przeglądarki albo nowsza rewizja filtrów przerywa bieżące obliczenia na najbliższym checkpoint()
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            states, inputs = _callback_context()
+            client = states.get("client-id.data")
+            filter_state = inputs.get("filter-state.data") or states.get("filter-state.data")
+            generation = {"name": name, "client": client, "filter_state": filter_state, "token": None}
+            if client:
+                generation["token"] = callback_generations.next(f"{client}:{name}")
+            if filter_state and filter_state.get("client"):
+                rev = filter_state.get("rev", 0)
+                if filter_generations.advance(filter_state["client"], rev) > rev:
+                    stale_callbacks.inc(callback=name, stage="start")
+                    raise StaleGeneration()
+            reset = _active.set(generation)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _active.reset(reset)
+        return wrapper
+    return decorator
+
+
+def is_stale(generation):
+    if generation["token"] is not None and \
+            not callback_generations.is_current(f"{generation['client']}:{generation['name']}", generation["token"]):
+        return True
+    filter_state = generation["filter_state"]
+    if filter_state and filter_state.get("client"):
+        return not filter_generations.is_current(filter_state["client"], filter_state.get("rev", 0))
+    return False
+
+
+def checkpoint(stage):
+    # Wywoływane między etapami obliczeń (filtr, agregacja, wykresy); zamyka też pomiar etapu
+    mark_stage(stage)
+    generation = _active.get()
+    if generation is not None and is_stale(generation) and not job_shared() and not flight_shared():
+        stale_callbacks.inc(callback=generation["name"], stage=stage)
+        raise StaleGeneration()
+    report_progress(stage)
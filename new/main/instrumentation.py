@@ -0,0 +1,260 @@
+import contextvars
+import datetime
+import functools
+import logging
+import os
+import random
+import re
+import time
+
+from flask import g, request
+from flask_login import current_user
+
+from auth_guard.middleware import ADMIN_ROLES
+from main.slowlog import record_slow
+from monitoring import metrics
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+# Profiler próbkujący: włączany przez administratora flagą ?profile=1 (ciasteczko) albo losowo dla części żądań
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "False") == "True"
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 1000))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.001))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_FORMAT = os.environ.get("PROFILE_FORMAT", "html")
+PROFILE_COOKIE = "profile"
+
+ROW_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000)
+PAYLOAD_BUCKETS = (1024, 10 * 1024, 50 * 1024, 100 * 1024, 250 * 1024, 500 * 1024, 2 ** 20, 5 * 2 ** 20)
+
+callback_duration = metrics.histogram("callback_duration_seconds",
+                                      "Czas callbacków wg etapu (filter, aggregate, figure, serialize, other, total)")
+callback_rows_scanned = metrics.histogram("callback_rows_scanned", "Wiersze przejrzane przez callback", ROW_BUCKETS)
+callback_rows_returned = metrics.histogram("callback_rows_returned", "Wiersze po filtrach", ROW_BUCKETS)
+callback_payload = metrics.histogram("callback_payload_bytes", "Rozmiar odpowiedzi callbacku przed kompresją",
+                                     PAYLOAD_BUCKETS)
+callback_cache = metrics.counter("callback_cache_total", "Trafienia i chybienia cache wyników callbacków")
+callback_responses = metrics.counter("callback_responses_total", "Odpowiedzi callbacków wg statusu HTTP")
+callback_profiles = metrics.counter("callback_profiles_total", "Zapisane profile wolnych callbacków")
+
+# Pomiar bieżącego żądania callbacku (ustawiany w before_request, uzupełniany przez checkpoint())
+_trace = contextvars.ContextVar("callback_trace", default=None)
+
+
+class CallbackTrace:
+
+    def __init__(self, name, body=None):
+        self.name = name
+        self.body = body
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.returned = None
+        self.stages = {}
+        self.rows_scanned = 0
+        self.rows_returned = 0
+        self.cache = []
+
+    def mark(self, stage):
+        # Etap = czas od poprzedniego znacznika; powtórzony etap się sumuje
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last
+        self.last = now
+
+    def finish(self, now=None):
+        now = now or time.perf_counter()
+        stages = dict(self.stages)
+        if self.returned is not None:
+            # Reszta callbacku bez checkpointów (proste callbacki) i serializacja odpowiedzi przez Dash
+            if self.returned > self.last:
+                stages["other"] = stages.get("other", 0.0) + self.returned - self.last
+            stages["serialize"] = now - self.returned
+        stages["total"] = now - self.started
+        return stages
+
+
+def callback_name(output):
+    # "..a.figure...b.figure.." (wiele wyjść) -> "a.figure+b.figure"
+    return "+".join(part for part in (output or "unknown").strip(".").split("...") if part)
+
+
+def current_trace():
+    return _trace.get()
+
+
+def begin_trace(body):
+    # body: treść żądania Dash (output, inputs, state) – do nazwy callbacku i zapisu w logu wolnych wywołań
+    trace = CallbackTrace(callback_name(body.get("output")), body)
+    return trace, _trace.set(trace)
+
+
+def end_trace(reset):
+    _trace.reset(reset)
+
+
+def mark_stage(stage):
+    trace = _trace.get()
+    if trace is not None:
+        trace.mark(stage)
+
+
+def record_rows(scanned, returned):
+    trace = _trace.get()
+    if trace is not None:
+        trace.rows_scanned += scanned
+        trace.rows_returned += returned
+
+
+def record_cache(cache, hit):
+    trace = _trace.get()
+    if trace is not None:
+        trace.cache.append((cache, "hit" if hit else "miss"))
+
+
+def timed(function):
+    # Koniec funkcji callbacku – to, co dalej, to serializacja odpowiedzi w Dash
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        trace = _trace.get()
+        if trace is not None:
+            trace.last = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if trace is not None:
+                trace.returned = time.perf_counter()
+    return wrapper
+
+
+def _instrument_callbacks(dash_app):
+    # Każdy callback rejestrowany przez dash_app.callback dostaje pomiar, bez dekoratora w każdym miejscu
+    register = dash_app.callback
+
+    @functools.wraps(register)
+    def callback(*args, **kwargs):
+        decorator = register(*args, **kwargs)
+
+        def wrap(function):
+            decorator(timed(function))
+            return function
+        return wrap
+
+    dash_app.callback = callback
+
+
+def _profiling_requested():
+    if not PROFILER_ENABLED or Profiler is None:
+        return False
+    if request.cookies.get(PROFILE_COOKIE) == "1" or request.args.get(PROFILE_COOKIE) == "1":
+        return current_user.is_authenticated and current_user.role in ADMIN_ROLES
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _save_profile(profiler, name, elapsed):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(PROFILE_DIR, f"{stamp}-{re.sub(r'[^A-Za-z0-9_.+-]', '_', name)[:80]}-{elapsed * 1000:.0f}ms")
+    if PROFILE_FORMAT == "speedscope":
+        path = base + ".speedscope.json"
+        content = profiler.output(SpeedscopeRenderer())
+    else:
+        path = base + ".html"
+        content = profiler.output(HTMLRenderer())
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    callback_profiles.inc(callback=name)
+    logger.info("Profil wolnego callbacku %s (%.0f ms): %s", name, elapsed * 1000, path)
+
+
+def create_instrumentation(dash_app, data_version=None):
+    server = dash_app.server
+    update_path = dash_app.config.requests_pathname_prefix + "_dash-update-component"
+    dashboard_path = dash_app.config.requests_pathname_prefix
+    if PROFILER_ENABLED and Profiler is None:
+        logger.warning("PROFILER_ENABLED=True, ale pyinstrument nie jest zainstalowany – profilowanie wyłączone")
+
+    _instrument_callbacks(dash_app)
+
+    @server.before_request
+    def start_trace():
+        if request.method != "POST" or request.path != update_path:
+            return None
+        body = request.get_json(silent=True) or {}
+        # Etykieta "callback" tylko dla zarejestrowanych callbacków – wyjście z treści żądania to dane
+        # klienta, a każda nowa etykieta to trwała seria w rejestrze metryk
+        if body.get("output") not in dash_app.callback_map:
+            return None
+        g.callback_trace = begin_trace(body)
+        if _profiling_requested():
+            profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="disabled")
+            profiler.start()
+            g.callback_profiler = profiler
+        return None
+
+    @server.after_request
+    def finish_trace(response):
+        if request.path == dashboard_path and PROFILER_ENABLED and request.args.get(PROFILE_COOKIE) in ("0", "1"):
+            # /dashboard/?profile=1 włącza profilowanie callbacków tej przeglądarki, ?profile=0 wyłącza
+            if request.args[PROFILE_COOKIE] == "1" and current_user.is_authenticated \
+                    and current_user.role in ADMIN_ROLES:
+                response.set_cookie(PROFILE_COOKIE, "1", httponly=True, samesite="Lax")
+            else:
+                response.delete_cookie(PROFILE_COOKIE)
+            return response
+
+        traced = g.pop("callback_trace", None)
+        if traced is None:
+            return response
+        trace, reset = traced
+        now = time.perf_counter()
+        profiler = g.pop("callback_profiler", None)
+        end_trace(reset)
+
+        stages = trace.finish(now)
+        for stage, seconds in stages.items():
+            callback_duration.observe(seconds, callback=trace.name, stage=stage)
+        # Rozbicie czasu widoczne też w narzędziach przeglądarki i przy odtwarzaniu wpisów z logu
+        response.headers["Server-Timing"] = ", ".join(f"{stage};dur={seconds * 1000:.1f}"
+                                                      for stage, seconds in stages.items())
+        callback_responses.inc(callback=trace.name, status=response.status_code)
+        if trace.rows_scanned:
+            callback_rows_scanned.observe(trace.rows_scanned, callback=trace.name)
+            callback_rows_returned.observe(trace.rows_returned, callback=trace.name)
+        payload = None if response.is_streamed else response.calculate_content_length() or 0
+        if payload is not None:
+            callback_payload.observe(payload, callback=trace.name)
+        for cache, result in trace.cache:
+            callback_cache.inc(callback=trace.name, cache=cache, result=result)
+        if trace.returned is not None:
+            # Callbacki w tle zapisuje proces zadania – tu tylko to, co liczyło się w żądaniu
+            try:
+                record_slow(trace, stages, data_version() if data_version else None,
+                            status=response.status_code, payload_bytes=payload)
+            except Exception as e:
+                logger.warning("Nie udało się zapisać wolnego callbacku %s: %s", trace.name, e)
+
+        if profiler is not None:
+            profiler.stop()
+            elapsed = now - trace.started
+            if elapsed * 1000 >= PROFILE_SLOW_MS:
+                try:
+                    _save_profile(profiler, trace.name, elapsed)
+                except Exception as e:
+                    logger.warning("Nie udało się zapisać profilu callbacku %s: %s", trace.name, e)
+        return response
+
+    @server.teardown_request
+    def drop_trace(error=None):
+        # Błąd przed after_request – bez pomiaru, ale profiler musi zostać zatrzymany
+        traced = g.pop("callback_trace", None)
+        if traced is not None:
+            end_trace(traced[1])
+        profiler = g.pop("callback_profiler", None)
+        if profiler is not None and profiler.is_running:
+            profiler.stop()
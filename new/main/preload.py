@@ -0,0 +1,70 @@
+import gc
+import logging
+import os
+import time
+
+import config.init_config  # noqa: F401 – load_dotenv(): REDIS_URL z .env w procesie głównym
+from engine.aggregates import build_product_totals
+from engine.handle import build_engine
+from engine.loader import DATA_FILES, compact_frame, compact_sales, load_sales
+from engine.store import load_store_sales, manifest_path
+from main.reload import source_state
+
+logger = logging.getLogger(__name__)
+
+# Dane wczytywane raz w procesie głównym gunicorna (gunicorn.conf.py), workery dostają je przez fork()
+PRELOAD_DATA = os.environ.get("PRELOAD_DATA", "False") == "True"
+# Katalog partycji miesięcznych (python -m scripts.partitions import ...) zamiast plików xlsx
+SALES_STORE = os.environ.get("SALES_STORE")
+
+_preloaded = None
+
+
+def load_engine(files=DATA_FILES, compact=False, redis_client=None):
+    # compact: kolumny jako kody + słowniki (preload); przy starcie bez preload – układ z plików
+    started = time.monotonic()
+    source = source_state(watched_files(files), redis_client)
+    data = load_store_sales(SALES_STORE) if SALES_STORE else load_sales(files)
+    product_totals = None
+    if compact:
+        data = compact_sales(data)
+        product_totals = compact_frame(build_product_totals(data.df))
+    engine = build_engine(data, product_totals)
+    return engine._replace(load_duration=time.monotonic() - started, source=source)
+
+
+def watched_files(files=DATA_FILES):
+    # Zmiana manifestu (import, archiwizacja) = nowa wersja danych; pliki partycji zapisywane są przed nim
+    return [manifest_path(SALES_STORE)] if SALES_STORE else files
+
+
+def _master_redis():
+    # Proces główny nie tworzy aplikacji Flask – licznik przeładowań czytany przez własne połączenie
+    url = os.environ.get("REDIS_URL")
+    if not url:
+        return None
+    try:
+        from redis import Redis
+        return Redis.from_url(url, socket_timeout=5)
+    except Exception as e:
+        logger.warning("Brak połączenia z Redisem przy wczytywaniu danych: %s", e)
+        return None
+
+
+def preload(files=DATA_FILES):
+    global _preloaded
+    # Poprzednie dane (HUP) wracają pod zwykły GC, zanim wczytamy nowe
+    gc.unfreeze()
+    _preloaded = None
+    _preloaded = load_engine(files, compact=True, redis_client=_master_redis())
+    # Obiekty procesu głównego poza zasięgiem GC workerów – przegląd pokoleń nie zapisuje ich nagłówków
+    gc.collect()
+    gc.freeze()
+    logger.info("Dane wczytane przed startem workerów: %s wierszy w %.1f s", len(_preloaded.data.df),
+                _preloaded.load_duration)
+    return _preloaded
+
+
+def preloaded():
+    # Wersja danych z procesu głównego albo None (zwykły start, benchmarki)
+    return _preloaded
@@ -0,0 +1,161 @@
+import logging
+import os
+import threading
+import time
+import weakref
+
+from monitoring import health, metrics
+from redis_client.redis_client import redis, redis_available
+
+logger = logging.getLogger(__name__)
+
+# Co ile sekund worker sprawdza pliki danych i prośby o przeładowanie z innych workerów (0 – wcale)
+ENGINE_WATCH_INTERVAL = float(os.environ.get("ENGINE_WATCH_INTERVAL", 60))
+# Licznik próśb o przeładowanie (panel administratora) – wspólny dla wszystkich workerów
+ENGINE_RELOAD_KEY = os.environ.get("ENGINE_RELOAD_KEY", "engine:reload")
+
+engine_reloads = metrics.counter("engine_reloads_total", "Przeładowania danych wg powodu i wyniku")
+
+# Wersje danych wciąż w pamięci procesu: bieżąca i dokańczane przez trwające wywołania
+_alive = {}
+_alive_lock = threading.Lock()
+metrics.gauge("engine_versions_alive", "Wersje danych w pamięci procesu", lambda: sum(_alive.values()))
+
+# (uchwyt, funkcja wczytująca, pliki danych, reakcja na nową wersję) – ustawiane przez create_reloader
+_reloader = None
+# Ostatnio obsłużona prośba o przeładowanie i stan plików przy ostatnim wczytaniu
+_seen = {"generation": None, "files": None, "last": None}
+
+
+def _released(version):
+    with _alive_lock:
+        _alive[version] -= 1
+        if not _alive[version]:
+            del _alive[version]
+    logger.info("Zwolniono dane wersji %s", version)
+
+
+def track(engine):
+    # Zwolnienie ramki faktów = koniec ostatniego wywołania na tej wersji
+    with _alive_lock:
+        _alive[engine.version] = _alive.get(engine.version, 0) + 1
+    weakref.finalize(engine.data.df, _released, engine.version)
+
+
+def report_engine(engine, **details):
+    df = engine.data.df
+    health.report("data", "ready", version=engine.version, rows=len(df), months=len(engine.partitions),
+                  load_duration_s=round(engine.load_duration, 1),
+                  memory_mb=round(float(df.memory_usage(deep=True).sum()
+                                        + engine.product_totals.memory_usage(deep=True).sum()) / 2 ** 20, 1),
+                  **details)
+
+
+def reload_engine(handle, load, on_swap=None, reason="request"):
+    # Nowa wersja budowana obok bieżącej, która do końca obsługuje ruch; podmiana dopiero po zbudowaniu
+    if not handle.building.acquire(blocking=False):
+        return "busy"
+    try:
+        health.update("data", reloading=True)
+        engine = load()
+        if engine.data.df.empty:
+            raise Exception("nowa wersja danych nie ma wierszy")
+        if engine.version == handle.current.version:
+            result = "unchanged"
+        else:
+            track(engine)
+            previous = handle.swap(engine)
+            report_engine(engine, previous_version=previous.version, reloaded=reason)
+            logger.info("Dane przeładowane (%s): %s -> %s, %s wierszy w %.1f s", reason, previous.version,
+                        engine.version, len(engine.data.df), engine.load_duration)
+            del previous
+            result = "swapped"
+    except Exception as e:
+        logger.warning("Przeładowanie danych nie powiodło się (%s): %s", reason, e)
+        health.update("data", reload_error=str(e))
+        result = "failed"
+    finally:
+        health.update("data", reloading=False)
+        handle.building.release()
+    engine_reloads.inc(reason=reason, result=result)
+    if result == "swapped" and on_swap is not None:
+        try:
+            on_swap(engine)
+        except Exception as e:
+            logger.warning("Po przeładowaniu danych (%s): %s", reason, e)
+    return result
+
+
+def files_signature(files):
+    signature = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def _generation(client=None):
+    # client – osobne połączenie tam, gdzie nie ma aplikacji Flask (proces główny gunicorna)
+    if client is None:
+        if not redis_available():
+            return None
+        client = redis
+    try:
+        return int(client.get(ENGINE_RELOAD_KEY) or 0)
+    except Exception as e:
+        logger.warning("Brak licznika przeładowań w Redisie: %s", e)
+        return None
+
+
+def source_state(files, client=None):
+    # Odczyt przed wczytaniem danych – zmiana w trakcie wczytywania wywoła kolejne przeładowanie
+    return {"files": files_signature(files), "generation": _generation(client)}
+
+
+def request_reload():
+    # Ten worker przeładowuje od razu, pozostałe przy najbliższym sprawdzeniu (ENGINE_WATCH_INTERVAL)
+    if _reloader is None:
+        return False
+    if redis_available():
+        try:
+            _seen["generation"] = redis.incr(ENGINE_RELOAD_KEY)
+        except Exception as e:
+            logger.warning("Nie udało się przekazać prośby o przeładowanie innym workerom: %s", e)
+    handle, load, files, on_swap = _reloader
+    _seen["files"] = files_signature(files)
+    threading.Thread(target=reload_engine, args=(handle, load, on_swap, "admin"), daemon=True,
+                     name="engine-reload").start()
+    return True
+
+
+def create_reloader(handle, load, files, on_swap=None, interval=ENGINE_WATCH_INTERVAL):
+    global _reloader
+    _reloader = (handle, load, files, on_swap)
+    track(handle.current)
+    if interval <= 0:
+        return
+    # Stan z chwili wczytania danych, nie bieżący: worker uruchomiony po przeładowaniu rodzeństwa
+    # (restart po awarii, max_requests) dostaje z fork() starsze dane procesu głównego i musi je doczytać
+    source = handle.current.source or {}
+    generation = source.get("generation")
+    _seen.update(generation=generation if generation is not None else _generation(),
+                 files=source.get("files") or files_signature(files))
+
+    def watch():
+        while True:
+            time.sleep(interval)
+            generation = _generation()
+            signature = files_signature(files)
+            if generation is not None and generation != _seen["generation"]:
+                _seen.update(generation=generation, files=signature)
+                reload_engine(handle, load, on_swap, "request")
+            # Pliki mogą być właśnie kopiowane – przeładowanie dopiero, gdy dwa sprawdzenia dają to samo
+            elif signature != _seen["files"] and signature == _seen["last"]:
+                _seen["files"] = signature
+                reload_engine(handle, load, on_swap, "files")
+            _seen["last"] = signature
+
+    threading.Thread(target=watch, daemon=True, name="engine-watch").start()
@@ -0,0 +1,91 @@
+import datetime
+import decimal
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.io.json as plotly_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# auto – orjson jeśli zainstalowany, json – standardowy enkoder plotly/Dash
+JSON_ENGINE = os.environ.get("JSON_ENGINE", "auto")
+
+_plotly_to_json = plotly_json.to_json_plotly
+
+# Te same zamiany co w plotly – JSON bezpieczny do osadzenia w HTML
+_UNSAFE_CHARS = (
+    ("<", "\\u003c"),
+    (">", "\\u003e"),
+    ("/", "\\u002f"),
+    ("\u2028", "\\u2028"),
+    ("\u2029", "\\u2029"),
+)
+
+
+def _default(obj):
+    # Wywoływane przez orjson dla typów, których nie zna natywnie
+    if hasattr(obj, "to_plotly_json"):
+        return obj.to_plotly_json()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        obj = obj.to_numpy()
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in ("b", "i", "u", "f"):
+            return np.ascontiguousarray(obj)
+        if obj.dtype.kind == "M":
+            return np.datetime_as_string(obj).tolist()
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, np.datetime64):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        # m.in. pd.Timestamp – orjson obsługuje tylko dokładne typy datetime
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    raise TypeError(f"Typ {type(obj).__name__} nie jest serializowalny do JSON")
+
+
+def orjson_dumps(obj, pretty=False):
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if pretty:
+        options |= orjson.OPT_INDENT_2
+    out = orjson.dumps(obj, default=_default, option=options).decode("utf8")
+    for unsafe_char, safe_char in _UNSAFE_CHARS:
+        if unsafe_char in out:
+            out = out.replace(unsafe_char, safe_char)
+    return out
+
+
+def fast_to_json(plotly_object, pretty=False, engine=None):
+    # Zamiennik plotly.io.json.to_json_plotly, z którego korzysta Dash przy odpowiedziach callbacków
+    if engine == "json":
+        return _plotly_to_json(plotly_object, pretty=pretty, engine="json")
+    try:
+        return orjson_dumps(plotly_object, pretty=pretty)
+    except TypeError as e:
+        logger.debug("orjson nie obsłużył odpowiedzi, powrót do enkodera plotly: %s", e)
+        return _plotly_to_json(plotly_object, pretty=pretty, engine="json")
+
+
+def configure_json_engine(engine=JSON_ENGINE):
+    if engine not in ("auto", "orjson", "json"):
+        raise ValueError(f"Nieznany silnik JSON: {engine}")
+    if engine == "orjson" and orjson is None:
+        logger.warning("JSON_ENGINE=orjson, ale pakiet orjson nie jest zainstalowany – używam json")
+    if engine == "json" or orjson is None:
+        plotly_json.to_json_plotly = _plotly_to_json
+        plotly_json.config.default_engine = "json"
+        return "json"
+    plotly_json.to_json_plotly = fast_to_json
+    plotly_json.config.default_engine = "orjson"
+    return "orjson"
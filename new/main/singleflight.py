@@ -0,0 +1,192 @@
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+
+from dash.exceptions import PreventUpdate
+
+from main.background import filter_key
+from main.instrumentation import record_cache
+from monitoring import metrics
+from redis_client.redis_client import redis, redis_available
+
+logger = logging.getLogger(__name__)
+
+# Jak długo czekający czekają na wynik lidera (s) i jak długo wynik leży w Redisie do odbioru
+SINGLEFLIGHT_WAIT = float(os.environ.get("SINGLEFLIGHT_WAIT", 60))
+SINGLEFLIGHT_LOCK_TTL = int(os.environ.get("SINGLEFLIGHT_LOCK_TTL", 120))
+SINGLEFLIGHT_RESULT_TTL = int(os.environ.get("SINGLEFLIGHT_RESULT_TTL", 15))
+SINGLEFLIGHT_POLL = float(os.environ.get("SINGLEFLIGHT_POLL", 0.05))
+
+# Zwolnienie blokady tylko przez tego, kto ją założył
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+computations = metrics.counter("singleflight_computations_total", "Obliczenia wykonane przez lidera single-flight")
+coalesced = metrics.counter("singleflight_coalesced_total", "Żądania obsłużone wynikiem cudzego obliczenia")
+
+# Bieżące obliczenie lidera – checkpoint() nie porzuca go, gdy czekają na nie inni
+_leading = contextvars.ContextVar("singleflight_leading", default=None)
+
+
+def flight_key(name, *parts):
+    # Kanoniczny hash: stan filtrów bez rewizji i karty, klucze posortowane
+    payload = json.dumps([name, *[filter_key(part) for part in parts]], sort_keys=True, default=str)
+    return f"{name}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class _Call:
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+
+    def __init__(self, prefix="flight"):
+        self.prefix = prefix
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._release = None
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            # Ten sam worker już liczy identyczny widok – czekamy na jego wynik
+            name = key.split(":", 1)[0]
+            if not call.event.wait(SINGLEFLIGHT_WAIT):
+                computations.inc(callback=name)
+                record_cache("singleflight", hit=False)
+                return function()
+            if call.error is None:
+                coalesced.inc(callback=name, scope="process")
+                record_cache("singleflight", hit=True)
+                return call.result
+            if not isinstance(call.error, PreventUpdate):
+                raise call.error
+            # Lider przerwał (nieaktualne filtry jego karty) – liczymy od nowa
+            return self.do(key, function)
+
+        reset = _leading.set((self, key, call))
+        try:
+            call.result = self._do_shared(key, function)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            _leading.reset(reset)
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _do_shared(self, key, function):
+        name = key.split(":", 1)[0]
+        if not redis_available():
+            computations.inc(callback=name)
+            record_cache("singleflight", hit=False)
+            return function()
+
+        token = uuid.uuid4().hex
+        lock_key = f"{self.prefix}:lock:{key}"
+        try:
+            acquired = redis.set(lock_key, token, nx=True, ex=SINGLEFLIGHT_LOCK_TTL)
+        except Exception as e:
+            logger.warning("Single-flight bez Redisa: %s", e)
+            computations.inc(callback=name)
+            record_cache("singleflight", hit=False)
+            return function()
+
+        if not acquired:
+            result = self._wait_for_result(key, lock_key)
+            if result is not None:
+                coalesced.inc(callback=name, scope="cluster")
+                record_cache("singleflight", hit=True)
+                return pickle.loads(result)
+            # Lider w innym workerze padł albo przerwał – liczymy bez blokady
+            computations.inc(callback=name)
+            record_cache("singleflight", hit=False)
+            return function()
+
+        try:
+            computations.inc(callback=name)
+            record_cache("singleflight", hit=False)
+            result = function()
+            try:
+                redis.set(f"{self.prefix}:result:{key}", pickle.dumps(result), ex=SINGLEFLIGHT_RESULT_TTL)
+            except Exception as e:
+                logger.warning("Nie udało się udostępnić wyniku single-flight: %s", e)
+            return result
+        finally:
+            self._release_lock(key, lock_key, token)
+
+    def _wait_for_result(self, key, lock_key):
+        result_key = f"{self.prefix}:result:{key}"
+        waiters_key = f"{self.prefix}:waiters:{key}"
+        try:
+            pipe = redis.pipeline()
+            pipe.incr(waiters_key)
+            pipe.expire(waiters_key, SINGLEFLIGHT_LOCK_TTL)
+            pipe.execute()
+            deadline = time.monotonic() + SINGLEFLIGHT_WAIT
+            while time.monotonic() < deadline:
+                result = redis.get(result_key)
+                if result is not None:
+                    return result
+                if not redis.exists(lock_key):
+                    # Wynik mógł zostać zapisany tuż przed zwolnieniem blokady
+                    return redis.get(result_key)
+                time.sleep(SINGLEFLIGHT_POLL)
+        except Exception as e:
+            logger.warning("Single-flight bez Redisa: %s", e)
+        return None
+
+    def _release_lock(self, key, lock_key, token):
+        try:
+            redis.delete(f"{self.prefix}:waiters:{key}")
+            if self._release is None:
+                self._release = redis.register_script(_RELEASE_SCRIPT)
+            self._release(keys=[lock_key], args=[token])
+        except Exception as e:
+            logger.warning("Nie udało się zwolnić blokady single-flight: %s", e)
+
+    def has_waiters(self, key, call):
+        if call.waiters:
+            return True
+        if not redis_available():
+            return False
+        try:
+            return int(redis.get(f"{self.prefix}:waiters:{key}") or 0) > 0
+        except Exception:
+            return False
+
+
+flights = SingleFlight()
+
+
+def flight_shared():
+    # Na wynik bieżącego obliczenia czekają inne żądania
+    leading = _leading.get()
+    if leading is None:
+        return False
+    flight, key, call = leading
+    return flight.has_waiters(key, call)
@@ -0,0 +1,100 @@
+import datetime
+import json
+import logging
+import os
+import uuid
+from collections import deque
+
+import dash
+
+from redis_client.redis_client import redis, redis_available
+
+logger = logging.getLogger(__name__)
+
+# Callbacki wolniejsze niż próg trafiają do ograniczonego bufora w Redisie (najnowsze na początku)
+SLOW_CALLBACK_MS = float(os.environ.get("SLOW_CALLBACK_MS", 2000))
+SLOW_LOG_SIZE = int(os.environ.get("SLOW_LOG_SIZE", 200))
+SLOW_LOG_KEY = os.environ.get("SLOW_LOG_KEY", "slowlog:callbacks")
+
+# Bez Redisa (benchmarki, odtwarzanie) wpisy zostają w procesie
+_local = deque(maxlen=SLOW_LOG_SIZE)
+
+
+def _stringify_id(component_id):
+    if isinstance(component_id, dict):
+        return json.dumps(component_id, sort_keys=True, separators=(",", ":"))
+    return component_id
+
+
+def context_body():
+    # Treść żądania /_dash-update-component odtworzona z kontekstu callbacku – w procesie w tle
+    # nie ma żądania HTTP, a kontekst Dash ma te same wejścia
+    ctx = dash.callback_context
+    outputs = ctx.outputs_list
+    specs = outputs if isinstance(outputs, list) else [outputs]
+    names = [f"{_stringify_id(spec['id'])}.{spec['property']}" for spec in specs]
+    return {
+        "output": names[0] if not isinstance(outputs, list) else ".." + "...".join(names) + "..",
+        "outputs": outputs,
+        "inputs": ctx.inputs_list,
+        "state": ctx.states_list,
+        "changedPropIds": list(ctx.triggered_prop_ids),
+    }
+
+
+def body_inputs(body):
+    # Wartości wejść i stanów po "id.właściwość" (zakładka, stan filtrów, motyw, ...)
+    values = {}
+    for item in (body.get("inputs") or []) + (body.get("state") or []):
+        for spec in item if isinstance(item, list) else [item]:
+            values[f"{_stringify_id(spec['id'])}.{spec['property']}"] = spec.get("value")
+    return values
+
+
+def record_slow(trace, stages, data_version=None, **details):
+    total_ms = stages["total"] * 1000
+    if total_ms < SLOW_CALLBACK_MS or trace.body is None:
+        return None
+    entry = {
+        "id": uuid.uuid4().hex[:12],
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "callback": trace.name,
+        "total_ms": round(total_ms, 1),
+        "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in stages.items()},
+        "rows_scanned": trace.rows_scanned,
+        "rows_returned": trace.rows_returned,
+        "cache": [f"{cache}:{result}" for cache, result in trace.cache],
+        "data_version": data_version,
+        "pid": os.getpid(),
+        **details,
+        "inputs": body_inputs(trace.body),
+        "body": trace.body,
+    }
+    logger.warning("Wolny callback %s: %.0f ms (wpis %s)", trace.name, total_ms, entry["id"])
+    if not redis_available():
+        _local.appendleft(entry)
+        return entry
+    try:
+        pipe = redis.pipeline()
+        pipe.lpush(SLOW_LOG_KEY, json.dumps(entry, default=str))
+        pipe.ltrim(SLOW_LOG_KEY, 0, SLOW_LOG_SIZE - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning("Nie udało się zapisać wolnego callbacku w Redisie: %s", e)
+        _local.appendleft(entry)
+    return entry
+
+
+def slow_entries(client=None, limit=None):
+    # client: osobne połączenie (CLI poza aplikacją); domyślnie Redis aplikacji albo bufor procesu
+    if client is None and not redis_available():
+        return list(_local)[:limit]
+    raw = (client or redis).lrange(SLOW_LOG_KEY, 0, (limit or SLOW_LOG_SIZE) - 1)
+    return [json.loads(item) for item in raw]
+
+
+def find_entry(entries, entry_id):
+    for entry in entries:
+        if entry["id"].startswith(entry_id):
+            return entry
+    return None
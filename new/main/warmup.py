@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from flask import request
+
+from main.background import BACKGROUND_JOB_TTL, filter_key
+from monitoring import health, metrics
+from redis_client.redis_client import redis, redis_available
+
+logger = logging.getLogger(__name__)
+
+# sync – widoki liczone przed obsługą pierwszego żądania; background – w wątku, gotowość po zakończeniu; off
+WARMUP_MODE = os.environ.get("WARMUP_MODE", "sync")
+WARMUP_TOP_K = int(os.environ.get("WARMUP_TOP_K", 20))
+# Limit czasu rozgrzewania (s) – start workera nie może przekroczyć timeoutu gunicorna
+WARMUP_BUDGET = float(os.environ.get("WARMUP_BUDGET", 30))
+# Najczęściej otwierane widoki z poprzednich uruchomień (sorted set w Redisie)
+WARMUP_HISTORY_KEY = os.environ.get("WARMUP_HISTORY_KEY", "warmup:views")
+WARMUP_HISTORY_SIZE = int(os.environ.get("WARMUP_HISTORY_SIZE", 500))
+WARMUP_HISTORY_TTL = int(os.environ.get("WARMUP_HISTORY_TTL", 7 * 24 * 3600))
+
+warmed_views = metrics.counter("warmup_views_total", "Widoki rozgrzane przy starcie wg wyniku")
+
+# output: id wyjścia callbacku; function: funkcja zarejestrowana w Dash (klucz cache);
+# compute: to samo obliczenie bez otoczki callbacku; ignore: argumenty spoza klucza cache
+WarmView = namedtuple("WarmView", ["output", "function", "compute", "ignore"])
+
+
+def view_args(view, body):
+    # Argumenty callbacku w kolejności Dash: wejścia, potem stany; pominięte argumenty jako None
+    values = [item.get("value") for item in (body.get("inputs") or []) + (body.get("state") or [])]
+    return [None if i in view.ignore else filter_key(value) for i, value in enumerate(values)]
+
+
+def _member(name, args):
+    return json.dumps([name, args], sort_keys=True, default=str)
+
+
+def record_view(name, args):
+    pipe = redis.pipeline()
+    pipe.zincrby(WARMUP_HISTORY_KEY, 1, _member(name, args))
+    pipe.zremrangebyrank(WARMUP_HISTORY_KEY, 0, -WARMUP_HISTORY_SIZE - 1)
+    pipe.expire(WARMUP_HISTORY_KEY, WARMUP_HISTORY_TTL)
+    pipe.execute()
+
+
+def popular_views(views, top_k=WARMUP_TOP_K):
+    if not redis_available() or top_k <= 0:
+        return []
+    popular = []
+    for member in redis.zrevrange(WARMUP_HISTORY_KEY, 0, top_k - 1):
+        name, args = json.loads(member)
+        if name in views:
+            popular.append((name, args))
+    return popular
+
+
+def warm_view(manager, view, args):
+    key = manager.build_cache_key(view.function, args, view.ignore, None)
+    if manager.result_ready(key):
+        return "cached"
+    # Workery startują razem – każdy widok liczy tylko jeden z nich, pozostałe biorą kolejne
+    lock_key = f"{key}-warmup"
+    if not manager.handle.add(lock_key, os.getpid(), expire=BACKGROUND_JOB_TTL):
+        return "busy"
+    try:
+        manager.handle.set(key, view.compute(*args), expire=manager.expire)
+        return "computed"
+    finally:
+        manager.handle.delete(lock_key)
+
+
+def run_warmup(manager, views, defaults, top_k=WARMUP_TOP_K, budget=WARMUP_BUDGET, required=True):
+    started = time.monotonic()
+    tasks = list(defaults)
+    try:
+        tasks += [task for task in popular_views(views, top_k) if task not in tasks]
+    except Exception as e:
+        logger.warning("Brak historii popularnych widoków: %s", e)
+
+    counts = {"computed": 0, "cached": 0, "busy": 0, "failed": 0, "skipped": 0}
+    health.report("warmup", "running", required, views=len(tasks), **counts)
+    for name, args in tasks:
+        if time.monotonic() - started > budget:
+            counts["skipped"] += 1
+            continue
+        try:
+            result = warm_view(manager, views[name], args)
+        except Exception as e:
+            logger.warning("Rozgrzewanie widoku %s nie powiodło się: %s", name, e)
+            result = "failed"
+        counts[result] += 1
+        warmed_views.inc(view=name, result=result)
+        health.update("warmup", **counts)
+
+    duration = time.monotonic() - started
+    state = "degraded" if counts["failed"] or counts["skipped"] else "ready"
+    health.report("warmup", state, required, views=len(tasks), duration_s=round(duration, 1), **counts)
+    logger.info("Rozgrzewanie: %s widoków w %.1f s (%s)", len(tasks), duration, counts)
+    return counts
+
+
+def create_warmup(dash_app, manager, views, defaults):
+    # views: nazwa -> WarmView; defaults: [(nazwa, argumenty)] – domyślne widoki każdej zakładki
+    update_path = dash_app.config.requests_pathname_prefix + "_dash-update-component"
+    outputs = {view.output: name for name, view in views.items()}
+
+    @dash_app.server.before_request
+    def track_view():
+        # Popularność widoków na potrzeby rozgrzewania po kolejnym starcie; odpytywanie o wynik się nie liczy
+        if request.method != "POST" or request.path != update_path or "cacheKey" in request.args \
+                or not redis_available():
+            return None
+        body = request.get_json(silent=True) or {}
+        name = outputs.get(body.get("output"))
+        if name is not None:
+            try:
+                record_view(name, view_args(views[name], body))
+            except Exception as e:
+                logger.warning("Nie udało się zapisać popularności widoku: %s", e)
+        return None
+
+    if WARMUP_MODE == "off":
+        health.report("warmup", "skipped", reason="WARMUP_MODE=off")
+    elif manager is None:
+        # Bez cache wyników (callbacki w żądaniu) nie ma czego wypełnić
+        health.report("warmup", "skipped", reason="brak cache wyników")
+    elif WARMUP_MODE == "background":
+        health.report("warmup", "pending", views=len(defaults))
+        threading.Thread(target=run_warmup, args=(manager, views, defaults), daemon=True,
+                         name="warmup").start()
+    else:
+        run_warmup(manager, views, defaults)
+
+
+def rewarm(manager, views, defaults):
+    # Po przeładowaniu danych: ruch obsługuje dotychczasowa wersja, więc rozgrzewanie nie odbiera gotowości
+    if WARMUP_MODE != "off" and manager is not None:
+        run_warmup(manager, views, defaults, required=False)
@@ -0,0 +1,54 @@
+import os
+import resource
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Stan gotowości procesu: komponent (np. data, warmup) -> stan i szczegóły.
+# Worker jest gotowy, gdy żaden wymagany komponent nie jest w toku albo nie padł.
+READY_STATES = ("ready", "degraded", "skipped")
+
+STARTED = time.time()
+
+_components = {}
+_lock = threading.Lock()
+
+
+def report(name, state, required=True, **details):
+    with _lock:
+        _components[name] = {"state": state, "required": required, "since": time.time(), **details}
+
+
+def update(name, **details):
+    with _lock:
+        if name in _components:
+            _components[name].update(details)
+
+
+def components():
+    with _lock:
+        return {name: dict(component) for name, component in _components.items()}
+
+
+def is_ready():
+    return all(component["state"] in READY_STATES
+               for component in components().values() if component["required"])
+
+
+def rss_mb():
+    # Bieżące RSS workera; bez psutil – z /proc, a poza Linuksem szczyt z getrusage
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2 ** 20
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def process_info():
+    return {"pid": os.getpid(), "uptime_s": round(time.time() - STARTED, 1), "rss_mb": round(rss_mb(), 1)}
@@ -0,0 +1,92 @@
+import bisect
+import threading
+
+# Rejestr metryk procesu – każdy worker gunicorna ma własne wartości
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class Counter:
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {key: value for key, value in self._values.items()}
+
+
+class Gauge:
+
+    def __init__(self, name, description, function=None):
+        self.name = name
+        self.description = description
+        self.function = function
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    def snapshot(self):
+        return {(): self.function() if self.function is not None else self._value}
+
+
+class Histogram:
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: {"counts": list(series["counts"]), "sum": series["sum"], "count": series["count"]}
+                    for key, series in self._series.items()}
+
+
+def _register(metric_class, name, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = metric_class(name, *args, **kwargs)
+        return metric
+
+
+def counter(name, description):
+    return _register(Counter, name, description)
+
+
+def gauge(name, description, function=None):
+    return _register(Gauge, name, description, function)
+
+
+def histogram(name, description, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, description, buckets)
+
+
+def registered_metrics():
+    with _registry_lock:
+        return list(_registry.values())
@@ -0,0 +1,53 @@
+import os
+
+from monitoring.metrics import Counter, Histogram, registered_metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_metric(metric):
+    kind = "counter" if isinstance(metric, Counter) else "histogram" if isinstance(metric, Histogram) else "gauge"
+    lines = [f"# HELP {metric.name} {_escape(metric.description)}", f"# TYPE {metric.name} {kind}"]
+    snapshot = metric.snapshot()
+    if isinstance(metric, Histogram):
+        for key, series in sorted(snapshot.items(), key=lambda item: str(item[0])):
+            # Kubełki w formacie Prometheusa są kumulatywne, ostatni to +Inf
+            cumulative = 0
+            for bound, count in zip(list(metric.buckets) + [float("inf")], series["counts"]):
+                cumulative += count
+                lines.append(f"{metric.name}_bucket{_labels(key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{metric.name}_sum{_labels(key)} {_number(series['sum'])}")
+            lines.append(f"{metric.name}_count{_labels(key)} {series['count']}")
+    else:
+        for key, value in sorted(snapshot.items(), key=lambda item: str(item[0])):
+            lines.append(f"{metric.name}{_labels(key)} {_number(value)}")
+    return lines
+
+
+def render_metrics(metrics=None):
+    # Format tekstowy Prometheusa; wartości dotyczą workera, który obsłużył żądanie
+    lines = [f"# worker pid {os.getpid()}"]
+    for metric in sorted(metrics if metrics is not None else registered_metrics(), key=lambda m: m.name):
+        try:
+            lines.extend(_render_metric(metric))
+        except Exception as e:
+            # Gauge liczony funkcją (np. pula DB) nie może zablokować całego eksportu
+            lines.append(f"# {metric.name}: {_escape(e)}")
+    return "\n".join(lines) + "\n"
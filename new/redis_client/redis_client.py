@@ -4,3 +4,8 @@ redis = FlaskRedis()
 def create_redis_client(app):
     redis.init_app(app)
     return redis
+
+
+def redis_available():
+    # Aplikacja bez create_redis_client (np. benchmarki) działa na samym stanie w procesie
+    return redis._redis_client is not None
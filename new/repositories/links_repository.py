@@ -1,27 +1,21 @@
-import contextlib
 from sqlalchemy import select
 
-from db import get_db
+from db import session_scope
 from entities.magiclink import Magiclink
 from entities.user import User
 
 class LinksRepository:
     @staticmethod
     def add_link(link):
-        db = next(get_db())
-        try:
+        with session_scope() as db:
             db.add(link)
             db.commit()
             db.refresh(link)
             return link
-        except Exception as e:
-            db.rollback()
-            raise e
 
     @staticmethod
     def update_link(link_to_update):
-        db = next(get_db())
-        try:
+        with session_scope() as db:
             existing_link = db.get(Magiclink, link_to_update.id)
             if not existing_link:
                 return None
@@ -34,33 +28,19 @@ class LinksRepository:
             db.commit()
             db.refresh(existing_link)
             return existing_link
-        except Exception as e:
-            db.rollback()
-            raise e
-        finally:
-            db.close()
     @staticmethod
     def find_link(link_dto, date):
-        with contextlib.closing(next(get_db())) as db:
-            try:
-                query = select(Magiclink).where(Magiclink.link == link_dto.link).where(Magiclink.created_at < date).where(Magiclink.cancelled_at > date).where(Magiclink.is_active == True)
-                return db.scalar(query)
-            except Exception as e:
-                raise e
+        with session_scope() as db:
+            query = select(Magiclink).where(Magiclink.link == link_dto.link).where(Magiclink.created_at < date).where(Magiclink.cancelled_at > date).where(Magiclink.is_active == True)
+            return db.scalar(query)
     @staticmethod
     def find_user_by_id(id):
-        with contextlib.closing(next(get_db())) as db:
-            try:
-                query = select(User).where(User.id == id)
-                return db.scalar(query)
-            except Exception as e:
-                raise e
+        with session_scope() as db:
+            query = select(User).where(User.id == id)
+            return db.scalar(query)
 
     @staticmethod
     def get_users():
-        with contextlib.closing(next(get_db())) as db:
-            try:
-                query = select(User.id,User.name,User.email,User.created_at,User.updated_at,User.role,User.is_active)
-                return db.execute(query).all()
-            except Exception as e:
-                raise e
\ No newline at end of file
+        with session_scope() as db:
+            query = select(User.id,User.name,User.email,User.created_at,User.updated_at,User.role,User.is_active)
+            return db.execute(query).all()
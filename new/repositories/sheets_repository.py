@@ -1,26 +1,19 @@
 from sqlalchemy import select
 
-from db import get_db
+from db import session_scope
 from entities.sheet import Sheet
 
 class SheetsRepository:
     @staticmethod
     def add_sheet(sheet):
-        db = next(get_db())
-        try:
+        with session_scope() as db:
             db.add(sheet)
             db.commit()
             db.refresh(sheet)
             return sheet
-        except Exception as e:
-            db.rollback()
-            raise e
 
     @staticmethod
     def get_sheets():
-        db = next(get_db())
-        try:
+        with session_scope() as db:
             query = select(Sheet)
             return db.execute(query).scalars().all()
-        except Exception as e:
-            raise e
\ No newline at end of file
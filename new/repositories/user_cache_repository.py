@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from redis_client.redis_client import redis
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+USER_INVALIDATION_CHANNEL = "user-invalidate"
+
+
+class TTLCache:
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class UserCacheRepository:
+    # Lokalny cache zalogowanych użytkowników przed Redisem – callbacki Dash nie robią GET na każdy POST
+    _cache = TTLCache(maxsize=int(os.environ.get("USER_CACHE_SIZE", 1024)),
+                      ttl=float(os.environ.get("USER_CACHE_TTL", 60)))
+    _listener_pid = None
+    _listener_lock = threading.Lock()
+
+    @staticmethod
+    def get_user(id):
+        UserCacheRepository.ensure_listener()
+        return UserCacheRepository._cache.get(str(id))
+
+    @staticmethod
+    def cache_user(user):
+        UserCacheRepository._cache.set(str(user.id), user)
+
+    @staticmethod
+    def invalidate(id):
+        UserCacheRepository._cache.delete(str(id))
+
+    @staticmethod
+    def publish_invalidation(id):
+        # Czyścimy lokalnie od razu, pozostałe workery dostają wiadomość przez pub/sub
+        UserCacheRepository.invalidate(id)
+        try:
+            redis.publish(USER_INVALIDATION_CHANNEL, str(id))
+        except Exception as e:
+            logger.warning("Nie udało się opublikować unieważnienia użytkownika %s: %s", id, e)
+
+    @staticmethod
+    def ensure_listener():
+        # Wątek nasłuchu startuje leniwie w każdym procesie (także po forku workera gunicorna)
+        if UserCacheRepository._listener_pid == os.getpid():
+            return
+        with UserCacheRepository._listener_lock:
+            if UserCacheRepository._listener_pid == os.getpid():
+                return
+            UserCacheRepository._cache.clear()
+            thread = threading.Thread(target=UserCacheRepository._listen, name="user-cache-invalidation",
+                                      daemon=True)
+            thread.start()
+            UserCacheRepository._listener_pid = os.getpid()
+
+    @staticmethod
+    def _listen():
+        backoff = 1
+        while True:
+            try:
+                pubsub = redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(USER_INVALIDATION_CHANNEL)
+                backoff = 1
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        data = message["data"]
+                        UserCacheRepository.invalidate(data.decode() if isinstance(data, bytes) else data)
+            except Exception as e:
+                # Bez połączenia mogliśmy przegapić unieważnienia – czyścimy cache i próbujemy ponownie
+                logger.warning("Nasłuch unieważnień użytkowników przerwany: %s", e)
+                UserCacheRepository._cache.clear()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
@@ -1,26 +1,20 @@
-import contextlib
 from sqlalchemy import select
 
-from db import get_db
+from db import session_scope
 from entities.user import User
 
 class UsersRepository:
     @staticmethod
     def add_user(user):
-        db = next(get_db())
-        try:
+        with session_scope() as db:
             db.add(user)
             db.commit()
             db.refresh(user)
             return user
-        except Exception as e:
-            db.rollback()
-            raise e
 
     @staticmethod
     def update_user(user_to_update):
-        db = next(get_db())
-        try:
+        with session_scope() as db:
             existing_user = db.get(User, user_to_update.id)
             if not existing_user:
                 return None
@@ -33,34 +27,20 @@ class UsersRepository:
             db.commit()
             db.refresh(existing_user)
             return existing_user
-        except Exception as e:
-            db.rollback()
-            raise e
-        finally:
-            db.close()
 
     @staticmethod
     def find_user_by_email(email):
-        with contextlib.closing(next(get_db())) as db:
-            try:
-                query = select(User).where(User.email == email)
-                return db.scalar(query)
-            except Exception as e:
-                raise e
+        with session_scope() as db:
+            query = select(User).where(User.email == email)
+            return db.scalar(query)
     @staticmethod
     def find_user_by_id(id):
-        with contextlib.closing(next(get_db())) as db:
-            try:
-                query = select(User).where(User.id == id)
-                return db.scalar(query)
-            except Exception as e:
-                raise e
+        with session_scope() as db:
+            query = select(User).where(User.id == id)
+            return db.scalar(query)
 
     @staticmethod
     def get_users():
-        with contextlib.closing(next(get_db())) as db:
-            try:
-                query = select(User.id,User.name,User.email,User.created_at,User.updated_at,User.role,User.is_active, User.is_signed)
-                return db.execute(query).all()
-            except Exception as e:
-                raise e
\ No newline at end of file
+        with session_scope() as db:
+            query = select(User.id,User.name,User.email,User.created_at,User.updated_at,User.role,User.is_active, User.is_signed)
+            return db.execute(query).all()
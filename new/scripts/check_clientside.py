@@ -0,0 +1,48 @@
+import sys
+
+from benchmarks.dash_requests import create_bench_app
+
+# Callbacki bez pracy na danych – muszą działać w przeglądarce, bez żądania do serwera
+CLIENTSIDE_OUTPUTS = [
+    'station-dropdown.value',
+    'group-dropdown.value',
+    'filter-panel.className',
+    'filter-column.className',
+    'content-column.className',
+    'trigger-graph-resize.data',
+    'theme-store.data',
+    'theme-toggle-button.children',
+]
+
+
+def callback_outputs(output):
+    return output.strip('.').split('...')
+
+
+def main():
+    server, app = create_bench_app()
+    dependencies = server.test_client().get('/dashboard/_dash-dependencies').get_json()
+    # Wpisy callback_map bez funkcji 'callback' to callbacki clientside
+    server_outputs = {out for key, entry in app.callback_map.items() if 'callback' in entry
+                      for out in callback_outputs(key)}
+
+    errors = []
+    for expected in CLIENTSIDE_OUTPUTS:
+        declared = [dep for dep in dependencies if expected in callback_outputs(dep['output'])]
+        if not declared:
+            errors.append(f"{expected}: brak callbacku")
+        elif any(not dep.get('clientside_function') for dep in declared):
+            errors.append(f"{expected}: callback po stronie serwera")
+        if expected in server_outputs:
+            errors.append(f"{expected}: ma handler po stronie serwera")
+
+    for error in errors:
+        print(f"NIE OK {error}")
+    if errors:
+        return 1
+    print(f"OK: {len(CLIENTSIDE_OUTPUTS)} wyjść obsługiwanych w przeglądarce, serwer nie ma dla nich handlera")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+
+from engine.loader import DATA_FILES
+from engine.store import (ACTIVE, archive_partitions, drop_partitions, import_files, months_before,
+                          read_manifest, restore_partitions)
+
+# Domyślnie ten sam katalog co dashboard (SALES_STORE)
+DEFAULT_STORE = os.environ.get("SALES_STORE", "sales_store")
+
+
+def show(args):
+    partitions = read_manifest(args.store)["partitions"]
+    if not partitions:
+        print(f"Brak partycji w {args.store}")
+        return 0
+    print(f"{'miesiąc':<8} {'stan':<9} {'wiersze':>9}  {'zakres dat':<23} {'źródło':<30} aktualizacja")
+    for month, entry in sorted(partitions.items()):
+        print(f"{month:<8} {entry['state']:<9} {entry['rows']:>9}  {entry['min_date']}..{entry['max_date']}  "
+              f"{entry.get('source') or '-':<30} {entry['updated']}")
+    active = [entry for entry in partitions.values() if entry["state"] == ACTIVE]
+    print(f"Aktywne: {len(active)} miesięcy, {sum(entry['rows'] for entry in active)} wierszy; "
+          f"zarchiwizowane: {len(partitions) - len(active)}")
+    return 0
+
+
+def do_import(args):
+    written = import_files(args.store, args.files,
+                           on_loaded=lambda file, rows: print(f"Wczytano {file}: {rows} wierszy"))
+    for month, rows in written:
+        print(f"Zapisano partycję {month}: {rows} wierszy")
+    return 0
+
+
+def archive(args):
+    months = list(args.months) + (months_before(args.store, args.before) if args.before else [])
+    if not months:
+        print("Brak miesięcy do archiwizacji (podaj miesiące albo --before RRRR-MM)")
+        return 1
+    changed = archive_partitions(args.store, months)
+    print(f"Zarchiwizowano: {', '.join(changed) or 'nic'}")
+    return 0
+
+
+def restore(args):
+    changed = restore_partitions(args.store, args.months)
+    print(f"Przywrócono: {', '.join(changed) or 'nic'}")
+    return 0
+
+
+def drop(args):
+    dropped = drop_partitions(args.store, args.months)
+    skipped = [month for month in args.months if month not in dropped]
+    print(f"Usunięto: {', '.join(dropped) or 'nic'}")
+    if skipped:
+        print(f"Pominięto (brak albo nie zarchiwizowane): {', '.join(skipped)}")
+    return 0 if not skipped else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Partycje miesięczne danych sprzedaży (SALES_STORE). '
+                                                 'Działające workery przeładowują dane po zmianie manifestu')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='Katalog partycji (domyślnie SALES_STORE)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='Lista partycji').set_defaults(run=show)
+    command = commands.add_parser('import', help='Wczytanie plików xlsx; ich miesiące zastępują partycje')
+    command.add_argument('files', nargs='*', default=DATA_FILES)
+    command.set_defaults(run=do_import)
+    command = commands.add_parser('archive', help='Wyłączenie miesięcy z wczytywania (pliki do archive/)')
+    command.add_argument('months', nargs='*', help='Miesiące RRRR-MM')
+    command.add_argument('--before', help='Wszystkie aktywne miesiące starsze niż RRRR-MM')
+    command.set_defaults(run=archive)
+    command = commands.add_parser('restore', help='Przywrócenie zarchiwizowanych miesięcy')
+    command.add_argument('months', nargs='+')
+    command.set_defaults(run=restore)
+    command = commands.add_parser('drop', help='Trwałe usunięcie zarchiwizowanych miesięcy')
+    command.add_argument('months', nargs='+')
+    command.set_defaults(run=drop)
+    args = parser.parse_args()
+    sys.exit(args.run(args))
@@ -0,0 +1,162 @@
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+
+import config.init_config  # noqa: F401 – load_dotenv(): REDIS_URL z .env
+from benchmarks.dash_requests import UPDATE_URL, create_bench_app
+from engine.loader import DATA_FILES, data_version, load_sales
+from main.preload import load_engine
+from main.slowlog import SLOW_LOG_KEY, find_entry, slow_entries
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+
+def load_entries(args):
+    if args.source:
+        with open(args.source, encoding="utf-8") as f:
+            entries = json.load(f)
+        return entries if isinstance(entries, list) else [entries]
+    from redis import Redis
+    url = args.redis_url or os.environ.get("REDIS_URL")
+    if not url:
+        raise Exception("Brak REDIS_URL – podaj --redis-url albo plik z wpisami (--source)")
+    return slow_entries(Redis.from_url(url), args.limit)
+
+
+def describe(entry):
+    inputs = entry.get("inputs", {})
+    filters = inputs.get("filter-state.data") or {}
+    selected = inputs.get("tabs.value") or inputs.get("metric-selector.value") or inputs.get("top-n-selector.value")
+    products = filters.get("products") or []
+    return (f"{entry['id']}  {entry['time']}  {entry['callback']:<28} {entry['total_ms']:>8.0f} ms  "
+            f"{selected or '-':<8} {filters.get('start_date', '?')}..{filters.get('end_date', '?')}  "
+            f"stacje {len(filters.get('stations') or [])}, grupy {len(filters.get('groups') or [])}, "
+            f"B2B {','.join(filters.get('b2b') or []) or '-'}, produkty {len(products)}, "
+            f"{'miesięcznie' if filters.get('monthly') else 'dziennie'}, dane {entry.get('data_version')}")
+
+
+def server_timing(header):
+    # "filter;dur=12.3, aggregate;dur=45.6" -> {"filter": 12.3, ...}
+    stages = {}
+    for part in (header or "").split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if name and duration:
+            stages[name] = float(duration)
+    return stages
+
+
+def profile_request(client, body, output):
+    if Profiler is not None and not (output or "").endswith(".prof"):
+        profiler = Profiler(interval=0.001, async_mode="disabled")
+        profiler.start()
+        response = client.post(UPDATE_URL, json=body)
+        profiler.stop()
+        if output:
+            renderer = SpeedscopeRenderer() if output.endswith(".json") else HTMLRenderer()
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(profiler.output(renderer))
+            print(f"Zapisano profil do {output}")
+        else:
+            print(profiler.output_text(unicode=True, color=False, show_all=False))
+        return response
+
+    # Bez pyinstrument: cProfile z biblioteki standardowej
+    profiler = cProfile.Profile()
+    response = profiler.runcall(client.post, UPDATE_URL, json=body)
+    if output:
+        profiler.dump_stats(output)
+        print(f"Zapisano profil cProfile do {output} (np. snakeviz {output})")
+    else:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(30)
+        print(stream.getvalue())
+    return response
+
+
+def replay(entry, args):
+    started = time.perf_counter()
+    # Te same dane co dashboard (SALES_STORE albo pliki xlsx); --files – wskazane pliki zamiast nich
+    if args.files:
+        data = load_sales(args.files)
+        version = data_version(data.df)
+    else:
+        engine = load_engine()
+        data, version = engine.data, engine.version
+    print(f"Dane: {len(data.df)} wierszy, wersja {version}, wczytanie {time.perf_counter() - started:.1f} s")
+    if entry.get("data_version") and entry["data_version"] != version:
+        print(f"Wpis nagrany na danych {entry['data_version']}, wczytane dane to {version}")
+        if not args.force:
+            print("NIE OK: inne dane niż w chwili pomiaru (--force, aby odtworzyć mimo to)")
+            return 1
+
+    server, _ = create_bench_app(data)
+    client = server.test_client()
+    for _ in range(args.warmup):
+        client.post(UPDATE_URL, json=entry["body"])
+    runs, stages = [], {}
+    for _ in range(args.repeat):
+        run_started = time.perf_counter()
+        response = client.post(UPDATE_URL, json=entry["body"])
+        runs.append((time.perf_counter() - run_started) * 1000)
+        stages = server_timing(response.headers.get("Server-Timing"))
+    # Ostatnie wywołanie pod profilerem – etapy porównujemy z przebiegów bez narzutu profilera
+    response = profile_request(client, entry["body"], args.output)
+    stages = stages or server_timing(response.headers.get("Server-Timing"))
+
+    print(f"{'etap':<12} {'nagranie':>10} {'odtworzenie':>12}")
+    for stage in sorted(set(entry.get("stages_ms", {})) | set(stages), key=lambda s: (s == "total", s)):
+        before = entry.get("stages_ms", {}).get(stage)
+        after = stages.get(stage)
+        print(f"{stage:<12} {'-' if before is None else f'{before:.1f} ms':>10} "
+              f"{'-' if after is None else f'{after:.1f} ms':>12}")
+    print(f"Odtworzenia: {', '.join(f'{ms:.0f} ms' for ms in runs)}; HTTP {response.status_code}, "
+          f"{len(response.data) / 1024:.1f} KB")
+    return 0 if response.status_code in (200, 204) else 1
+
+
+def main(args):
+    entries = load_entries(args)
+    if not args.entry:
+        for entry in entries:
+            print(describe(entry))
+        if args.export:
+            with open(args.export, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, ensure_ascii=False)
+            print(f"Zapisano {len(entries)} wpisów do {args.export}")
+        return 0
+
+    entry = find_entry(entries, args.entry)
+    if entry is None:
+        print(f"Brak wpisu {args.entry} w {args.source or SLOW_LOG_KEY}")
+        return 1
+    print(describe(entry))
+    if args.show:
+        print(json.dumps(entry, indent=2, ensure_ascii=False))
+        return 0
+    return replay(entry, args)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Log wolnych callbacków: lista wpisów i odtworzenie pod profilerem')
+    parser.add_argument('entry', nargs='?', help='Identyfikator wpisu (wystarczy początek); bez niego – lista')
+    parser.add_argument('--source', help='Plik JSON z wpisami (np. z --export) zamiast Redisa')
+    parser.add_argument('--redis-url', help='Domyślnie REDIS_URL z .env')
+    parser.add_argument('--limit', type=int, help='Ile najnowszych wpisów pobrać')
+    parser.add_argument('--export', help='Zapis pobranych wpisów do pliku JSON (odtwarzanie offline)')
+    parser.add_argument('--show', action='store_true', help='Pokaż pełny wpis zamiast odtwarzać')
+    parser.add_argument('--files', nargs='+', help='Pliki danych zamiast danych dashboardu (SALES_STORE albo '
+                                                   f'{", ".join(DATA_FILES)})')
+    parser.add_argument('--force', action='store_true', help='Odtwórz mimo innej wersji danych')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--output', help='Zapis profilu: .html / .json (speedscope) albo .prof (cProfile)')
+    sys.exit(main(parser.parse_args()))
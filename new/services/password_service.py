@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+from dotenv import load_dotenv
+
+from monitoring import metrics
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+# Ile haszowań liczy się naraz i ile może czekać w kolejce – reszta logowań dostaje odmowę
+BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS", 2))
+BCRYPT_MAX_PENDING = int(os.environ.get("BCRYPT_MAX_PENDING", 8))
+BCRYPT_TIMEOUT = float(os.environ.get("BCRYPT_TIMEOUT", 10))
+
+bcrypt_duration = metrics.histogram("bcrypt_duration_seconds", "Czas haszowania i weryfikacji haseł")
+bcrypt_rejected = metrics.counter("bcrypt_rejected_total", "Operacje bcrypt odrzucone przy pełnej kolejce")
+
+
+class PasswordServiceBusy(Exception):
+    pass
+
+
+class PasswordService:
+    _executor = None
+    _executor_pid = None
+    _slots = threading.BoundedSemaphore(BCRYPT_MAX_PENDING)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def hash_password(raw_password, rounds=None):
+        salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+        pass_bytes = raw_password.encode('utf-8')
+        return PasswordService._run("hash", bcrypt.hashpw, pass_bytes, salt).decode('utf-8')
+
+    @staticmethod
+    def check_password(raw_password, hashed_password):
+        raw_pass_bytes = raw_password.encode('utf-8')
+        hashed_pass_bytes = hashed_password.encode('utf-8')
+        return PasswordService._run("check", bcrypt.checkpw, raw_pass_bytes, hashed_pass_bytes)
+
+    @staticmethod
+    def needs_rehash(hashed_password, rounds=None):
+        # Format: $2b$<koszt>$<sól+hash>
+        try:
+            return int(hashed_password.split('$')[2]) != (rounds or BCRYPT_ROUNDS)
+        except (IndexError, ValueError):
+            return True
+
+    @staticmethod
+    def _get_executor():
+        # Pula tworzona leniwie w każdym workerze – wątki nie przeżywają forka
+        if PasswordService._executor_pid != os.getpid():
+            with PasswordService._lock:
+                if PasswordService._executor_pid != os.getpid():
+                    PasswordService._executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS,
+                                                                   thread_name_prefix="bcrypt")
+                    PasswordService._executor_pid = os.getpid()
+        return PasswordService._executor
+
+    @staticmethod
+    def _run(operation, function, *args):
+        if not PasswordService._slots.acquire(blocking=False):
+            bcrypt_rejected.inc(operation=operation)
+            raise PasswordServiceBusy("Zbyt wiele równoczesnych operacji na hasłach")
+        started = time.perf_counter()
+        try:
+            future = PasswordService._get_executor().submit(function, *args)
+        except Exception:
+            PasswordService._slots.release()
+            raise
+        # Miejsce zwalniane dopiero, gdy zadanie opuści pulę – po przekroczeniu czasu dalej je zajmuje
+        future.add_done_callback(lambda _: PasswordService._slots.release())
+        try:
+            result = future.result(timeout=BCRYPT_TIMEOUT)
+        except FutureTimeoutError:
+            # Zadanie jeszcze w kolejce wypada z niej; już liczone kończy się i wtedy oddaje miejsce
+            future.cancel()
+            bcrypt_rejected.inc(operation=operation)
+            raise PasswordServiceBusy(f"Operacja na haśle przekroczyła {BCRYPT_TIMEOUT} s")
+        bcrypt_duration.observe(time.perf_counter() - started, operation=operation)
+        return result
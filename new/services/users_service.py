@@ -1,14 +1,22 @@
+import logging
+import time
 from datetime import datetime
 
-import bcrypt
 from flask_login import login_user, current_user, logout_user
 import uuid
 
 from entities.magiclink import Magiclink
 from repositories.users_repository import UsersRepository
 from repositories.redis_repository import RedisRepository
+from repositories.user_cache_repository import UserCacheRepository
 from repositories.links_repository import LinksRepository
 from entities.user import User
+from monitoring import metrics
+from services.password_service import PasswordService, PasswordServiceBusy
+
+logger = logging.getLogger(__name__)
+
+login_duration = metrics.histogram("login_duration_seconds", "Czas obsługi logowania (osobno od callbacków dashboardu)")
 
 
 class UsersService:
@@ -27,14 +35,26 @@ class UsersService:
         found_link = LinksRepository.find_link(link_dto, datetime.now())
         if found_link is None:
             return False
+        # Najpierw hasło – odmowa puli bcrypt (PasswordServiceBusy) nie może zużyć zaproszenia
+        userDTO.password = UsersService.__hash_password(userDTO.raw_password)
         found_link.is_active = False
         LinksRepository.update_link(found_link)
-        userDTO.password = UsersService.__hash_password(userDTO.raw_password)
         UsersRepository.add_user(userDTO)
         return True
 
     @staticmethod
     def auth_user(userDTO):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            is_login = UsersService.__auth_user(userDTO)
+            outcome = "success" if is_login else "failure"
+            return is_login
+        finally:
+            login_duration.observe(time.perf_counter() - started, outcome=outcome)
+
+    @staticmethod
+    def __auth_user(userDTO):
         user = UsersRepository.find_user_by_email(userDTO.email)
 
         if user is None or not user.is_active:
@@ -42,19 +62,33 @@ class UsersService:
         if user.email == userDTO.email and UsersService.__check_password(userDTO.raw_password, user.password):
             login_user(user)
             RedisRepository.cache_auth_user(user)
-            user = User(id=user.id, is_signed=True, is_active=True)
+            password = None
+            if PasswordService.needs_rehash(user.password):
+                # Zmiana BCRYPT_ROUNDS – hasło przeliczamy przy udanym logowaniu; przy pełnej puli
+                # bcrypt przeliczenie czeka na kolejne logowanie, a samo logowanie się udaje
+                try:
+                    password = UsersService.__hash_password(userDTO.raw_password)
+                except PasswordServiceBusy as e:
+                    logger.warning("Pominięto przeliczenie hasła użytkownika %s: %s", user.id, e)
+            user = User(id=user.id, password=password, is_signed=True, is_active=True)
             UsersRepository.update_user(user)
             return True
         return False
 
     @staticmethod
     def get_user(id):
+        user = UserCacheRepository.get_user(id)
+        if user is not None:
+            login_user(user)
+            return user
         user = RedisRepository.get_cached_user(id)
         if user is not None:
+            UserCacheRepository.cache_user(user)
             login_user(user)
             return user
         user = UsersService.get_user_from_db(id)
         if user and user.is_signed:
+            UserCacheRepository.cache_user(user)
             return user
         if user and not user.is_signed:
             return None
@@ -67,6 +101,7 @@ class UsersService:
     def update_user(user_to_update):
         user = UsersRepository.update_user(user_to_update)
         RedisRepository.del_cached_user(user.id)
+        UserCacheRepository.publish_invalidation(user.id)
         return user
 
     @staticmethod
@@ -96,16 +131,13 @@ class UsersService:
             RedisRepository.del_cached_user(current_user.id)
             user = User(id=current_user.id, is_signed=False, is_active=True)
             UsersRepository.update_user(user)
+            UserCacheRepository.publish_invalidation(user.id)
             logout_user()
 
     @staticmethod
     def __hash_password(raw_password):
-        salt = bcrypt.gensalt()
-        pass_bytes = raw_password.encode('utf-8')
-        return bcrypt.hashpw(pass_bytes, salt).decode('utf-8')
+        return PasswordService.hash_password(raw_password)
 
     @staticmethod
     def __check_password(raw_password, hashed_password):
-        raw_pass_bytes = raw_password.encode('utf-8')
-        hashed_pass_bytes = hashed_password.encode('utf-8')
-        return bcrypt.checkpw(raw_pass_bytes, hashed_pass_bytes)
+        return PasswordService.check_password(raw_password, hashed_password)
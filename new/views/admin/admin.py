@@ -9,6 +9,8 @@ get_user_action_bp = Blueprint('get_user_action', __name__)
 get_users_bp = Blueprint('get_users', __name__)
 generate_link_bp = Blueprint('generate_link', __name__)
 change_user_data_bp = Blueprint('change_user_data', __name__)
+metrics_bp = Blueprint('metrics', __name__)
+reload_data_bp = Blueprint('reload_data', __name__)
 @admin_root_bp.route('/')
 def admin_root():
     return AdminController.list()
@@ -35,4 +37,10 @@ def get_users():
     return AdminController.get_users()
 @generate_link_bp.route('/users/link', methods=['GET'])
 def generate_link():
-    return AdminController.generate_link()
\ No newline at end of file
+    return AdminController.generate_link()
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    return AdminController.metrics()
+@reload_data_bp.route('/datasheets/reload', methods=['POST'])
+def reload_data():
+    return AdminController.reload_data()
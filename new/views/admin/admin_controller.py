@@ -1,7 +1,10 @@
-from flask import render_template, request, redirect
+from flask import render_template, request, redirect, Response
 from services.sheet_service import SheetService
 from entities.user import User
 from services.users_service import UsersService
+from monitoring.prometheus import render_metrics, CONTENT_TYPE
+from monitoring import health
+from main.reload import request_reload
 class AdminController:
 
 
@@ -9,7 +12,8 @@ class AdminController:
     def list():
         current_sheets = []
         sheets = SheetService.get_sheets()
-        return render_template("secure/datasheet_list.html", datasheets=sheets)
+        data = health.components().get("data", {})
+        return render_template("secure/datasheet_list.html", datasheets=sheets, data=data)
 
     @staticmethod
     def get_new_sheet_form():
@@ -53,4 +57,14 @@ class AdminController:
             is_active=is_active,
             id=id)
         user = UsersService.update_user(user)
-        return redirect("/admin/users")
\ No newline at end of file
+        return redirect("/admin/users")
+
+    @staticmethod
+    def metrics():
+        return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+    @staticmethod
+    def reload_data():
+        # Wczytanie plików od nowa w tle; dashboard do końca przeładowania liczy na dotychczasowych danych
+        request_reload()
+        return redirect('/admin/datasheets/list')
@@ -4,6 +4,7 @@ import logging
 from entities.magiclink import Magiclink
 from enums.user_role import UserRole
 from services.users_service import UsersService
+from services.password_service import PasswordServiceBusy
 
 from entities.user import User
 
@@ -17,7 +18,11 @@ class AuthController:
     def auth_user():
         logger.info("Form data: %s", request.form)
         user = User(email=request.form.get('email').strip(), raw_password=request.form.get('password').strip() )
-        isLogin = UsersService.auth_user(user)
+        try:
+            isLogin = UsersService.auth_user(user)
+        except PasswordServiceBusy as e:
+            logger.warning("Logowanie odrzucone: %s", e)
+            isLogin = False
         if isLogin == True:
             return redirect("/dashboard")
         return redirect('/auth/login')
@@ -39,5 +44,10 @@ class AuthController:
     def register_user():
         user = User(email=request.form.get('email').strip(), name=request.form.get('name').strip(), role=UserRole.USER, raw_password=request.form.get('password').strip())
         magiclink = Magiclink(link_value= request.form.get("link"))
-        UsersService.register_user_by_link(user,magiclink)
+        try:
+            UsersService.register_user_by_link(user,magiclink)
+        except PasswordServiceBusy as e:
+            logger.warning("Rejestracja odrzucona: %s", e)
+            return render_template("open/user_form.html", link=magiclink.link,
+                                   error="Serwer jest chwilowo przeciążony. Spróbuj ponownie za chwilę."), 503
         return render_template("open/user_added.html")
\ No newline at end of file
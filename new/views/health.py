@@ -0,0 +1,9 @@
+from flask import Blueprint
+from views.health_controller import HealthController
+health_bp = Blueprint('health', __name__)
+@health_bp.route('/live', methods=['GET'])
+def live():
+    return HealthController.live()
+@health_bp.route('/ready', methods=['GET'])
+def ready():
+    return HealthController.ready()
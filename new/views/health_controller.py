@@ -0,0 +1,16 @@
+from flask import jsonify
+
+from monitoring import health
+
+
+class HealthController:
+    @staticmethod
+    def live():
+        # Proces odpowiada – restart tylko przy braku odpowiedzi, nie przy wczytywaniu danych
+        return jsonify(alive=True, **health.process_info()), 200
+
+    @staticmethod
+    def ready():
+        # 503 dopóki worker nie jest gotowy (dane w pamięci, rozgrzany cache) – load balancer nie kieruje ruchu
+        ready = health.is_ready()
+        return jsonify(ready=ready, **health.process_info(), components=health.components()), 200 if ready else 503